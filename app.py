@@ -1,12 +1,33 @@
+import os
+
 import dash
 import dash_bootstrap_components as dbc
 from dash import dcc, html
 from dash.dependencies import Input, Output, State
 
-from src.dashboard import Backend, clear_graph, draw_graph
+from src.dashboard import (
+    Backend,
+    PaletteWatcher,
+    QueryExecutor,
+    QueueFullError,
+    clear_swatch,
+    create_api,
+    create_metrics_api,
+    draw_swatch,
+)
 
 
-backend = Backend(dmc_path="data/dmc.csv", ariadna_path="data/ariadna.csv")
+backend = Backend(
+    dmc_path="data/dmc.csv",
+    ariadna_path="data/ariadna.csv",
+    lookup_dir="data/lookup",
+    conversion_path="data/lookup/dmc_ariadna.npz",
+)
+executor = QueryExecutor(
+    backend,
+    workers=int(os.environ.get("FLOSSVERTER_QUERY_THREADS", 4)),
+    max_queue=int(os.environ.get("FLOSSVERTER_QUEUE_DEPTH", 64)),
+)
 
 app = dash.Dash(
     __name__,
@@ -14,6 +35,20 @@ app = dash.Dash(
     title="FlossVerter - Mouline Color Converter",
 )
 server = app.server
+server.register_blueprint(create_api(backend))
+server.register_blueprint(
+    create_metrics_api(
+        backend.timings,
+        allow_profiling=os.environ.get("FLOSSVERTER_PROFILING") == "1",
+        executor=executor,
+    )
+)
+
+
+@server.errorhandler(QueueFullError)
+def handle_queue_full(error: QueueFullError) -> tuple[str, int, dict[str, str]]:
+    return str(error), 503, {"Retry-After": "1"}
+
 
 app.layout = html.Div(
     [
@@ -114,7 +149,7 @@ app.layout = html.Div(
                         [
                             dcc.Graph(
                                 id="graph",
-                                figure=clear_graph(),
+                                figure=clear_swatch(),
                                 config={"staticPlot": True},
                             )
                         ]
@@ -139,7 +174,6 @@ app.layout = html.Div(
     State("input_rgb", "valid"),
     State("drop_metric", "value"),
     State("slider_n", "value"),
-    State("graph", "figure"),
 )
 def find_similar_colors(
     clicks,
@@ -149,28 +183,35 @@ def find_similar_colors(
     rgb_input_valid,
     metric,
     n_colors,
-    current_fig,
 ):
     # clearing
     if not clicks:
-        return clear_graph()
+        return clear_swatch()
 
-    # pass
+    # pass, keeping the current figure in the browser
     if not (dmc_input or rgb_input) or rgb_input_valid:
-        return current_fig
+        return dash.no_update
+
+    timed = backend.timings.timed
 
     if active_tab == "tab_dmc":
-        base_color = backend.dmc_to_hex(dmc_input)
+        with timed("parse", metric, n_colors):
+            base_color = backend.dmc_to_hex(dmc_input)
         base_label = dmc_input
+        result_codes, result_colors = executor.find_similar_dmc(
+            dmc_input, metric, n_colors
+        )
     elif active_tab == "tab_rgb":
         base_color = rgb_input
         base_label = None
+        result_codes, result_colors = executor.find_similar(
+            base_color, metric, n_colors
+        )
     else:
         raise NotImplementedError("Unsupported input tab chosen.")
 
-    result_codes, result_colors = backend.find_similar(base_color, metric, n_colors)
-
-    fig = draw_graph(base_color, base_label, result_colors, result_codes)
+    with timed("draw", metric, n_colors):
+        fig = draw_swatch(base_color, base_label, result_colors, result_codes)
 
     return fig
 
@@ -205,4 +246,7 @@ def on_clear_button(_):
 
 
 if __name__ == "__main__":
+    interval = float(os.environ.get("FLOSSVERTER_RELOAD_INTERVAL", 5))
+    if interval > 0:
+        PaletteWatcher(backend, interval=interval).start()
     app.run_server()
@@ -0,0 +1,94 @@
+"""
+Gunicorn settings of the dashboard server.
+
+The app is preloaded: the backend with all palette coordinates, conversion and lookup
+tables is built once in the master process and its arrays are moved to shared memory
+before workers are forked, so memory use grows little with the number of workers.
+Every worker logs its resident and shared memory once it has booted, which is also
+exposed by the metrics endpoint. Preloading is disabled with FLOSSVERTER_PRELOAD=0.
+
+Every worker polls the palette CSVs and reloads its backend after they are edited,
+every FLOSSVERTER_RELOAD_INTERVAL seconds (5 by default, 0 disables reloading). The
+updated conversion table is saved by the first worker only, the others find it up to
+date under the file lock and skip the save.
+"""
+import gc
+import os
+from typing import Optional
+
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+
+from src.dashboard.instrumentation import process_memory
+from src.dashboard.shared import SharedArrays
+
+
+preload_app = os.environ.get("FLOSSVERTER_PRELOAD", "1") == "1"
+reload_interval = float(os.environ.get("FLOSSVERTER_RELOAD_INTERVAL", "5"))
+
+_shared_arrays: Optional[SharedArrays] = None
+
+
+def when_ready(server: Arbiter) -> None:
+    """
+    Shares arrays of the preloaded backend, before workers are forked.
+
+    Args:
+        server (Arbiter): Master process.
+    """
+    global _shared_arrays
+    if not preload_app:
+        return
+
+    from app import backend
+
+    _shared_arrays = backend.share()
+    server.log.info(
+        "Shared %.1f MiB of palette data in %s",
+        _shared_arrays.nbytes / 2 ** 20,
+        _shared_arrays.directory,
+    )
+
+    # Objects built so far are never collected, so the collector does not write to
+    # their pages and workers keep sharing them
+    gc.collect()
+    gc.freeze()
+
+
+def post_worker_init(worker: Worker) -> None:
+    """
+    Logs memory use of a booted worker and starts watching the palette CSVs.
+
+    Args:
+        worker (Worker): Worker process.
+    """
+    memory = ", ".join(
+        f"{kind}={size / 2 ** 20:.1f} MiB" for kind, size in process_memory().items()
+    )
+    worker.log.info("Worker %s memory: %s", worker.pid, memory)
+
+    if reload_interval > 0:
+        from app import backend
+        from src.dashboard.reload import PaletteWatcher
+
+        PaletteWatcher(
+            backend,
+            interval=reload_interval,
+            on_reload=lambda summary: worker.log.info(
+                "Worker %s reloaded palettes: %s", worker.pid, summary
+            ),
+            on_error=lambda error: worker.log.error(
+                "Worker %s failed to reload palettes: %s", worker.pid, error
+            ),
+        ).start()
+
+
+def on_exit(server: Arbiter) -> None:
+    """
+    Removes files of shared arrays.
+
+    Args:
+        server (Arbiter): Master process.
+    """
+    if _shared_arrays is not None:
+        _shared_arrays.close()
@@ -8,6 +8,18 @@ base_pkgs = [
     "pandas~=1.4",
 ]
 
+image_pkgs = [
+    "pillow~=9.2",
+]
+
+parquet_pkgs = [
+    "pyarrow~=9.0",
+]
+
+jit_pkgs = [
+    "numba~=0.56",
+]
+
 formatter_pkgs = [
     "black==22.6",
 ]
@@ -38,7 +50,7 @@ notebook_pkgs = base_pkgs + [
     "seaborn",
 ]
 
-test_pkgs = base_pkgs + [
+test_pkgs = base_pkgs + image_pkgs + parquet_pkgs + jit_pkgs + [
     "pytest",
     "pytest-cov",
     "pytest-mock",
@@ -55,7 +67,7 @@ dev_pkgs = (
 )
 
 
-user_pkgs = base_pkgs + notebook_pkgs
+user_pkgs = base_pkgs + image_pkgs + notebook_pkgs
 
 setup(
     name="flossverter",
@@ -64,8 +76,11 @@ setup(
         "base": base_pkgs,
         "dev": dev_pkgs,
         "formatter": formatter_pkgs,
+        "image": image_pkgs,
+        "jit": jit_pkgs,
         "linter": linter_pkgs,
         "notebook": notebook_pkgs,
+        "parquet": parquet_pkgs,
         "test": test_pkgs,
         "user": user_pkgs,
     },
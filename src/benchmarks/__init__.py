@@ -0,0 +1,4 @@
+"""
+Benchmarks measuring the speed of converters, metrics and similarity queries.
+"""
+from .suite import collect_benchmarks, compare_results, run_benchmarks, time_benchmark
@@ -0,0 +1,381 @@
+"""
+Benchmarks of converters, metrics and similarity queries.
+
+Every benchmark is timed with `timeit`: the number of loops is chosen so that a single
+repetition takes at least `min_time` seconds and the median time per call over all
+repetitions is reported. Results are saved as JSON and can be compared against a
+baseline, flagging benchmarks which got slower than the given ratio.
+
+Runs also report the share of full metric evaluations skipped by lower-bound pruning
+on a large random palette.
+
+Large-palette search benchmarks ('search.*.large.*') score one random base color
+against `LARGE_PALETTE_SIZE` random sRGB colors drawn from a generator seeded with 0.
+The pruning report searches 64 random base colors in another such palette, drawn with
+seed 1. The data sheets (489 DMC and 375 Ariadna colors) are smaller than
+`PRUNED_SEARCH_MIN_SIZE`, so `backend.find_similar` benchmarks never prune.
+
+Benchmarks are run and compared with:
+    python -m benchmarks.suite run data/dmc.csv data/ariadna.csv results.json
+    python -m benchmarks.suite compare baseline.json results.json --threshold 1.25
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from converters import (
+    hex_to_dec_primaries,
+    hex_to_dec_primaries_batch,
+    hex_to_xyz,
+    hex_to_xyz_batch,
+    lab_to_lch,
+    lab_to_lch_batch,
+    xyz_to_lab,
+    xyz_to_lab_batch,
+)
+from dashboard import Backend
+from metrics.compiled import JIT_AVAILABLE, SCALAR_KERNELS, hex_to_lab, nearest
+from metrics.scoring import (
+    LOWER_BOUNDS,
+    METRIC_KERNELS,
+    palette_coordinates,
+    pruned_top_n_indices,
+    top_n_indices,
+)
+
+
+DEFAULT_THRESHOLD = 1.25
+N_VALUES = (1, 5, 9)
+
+# Number of random colors converted by batch benchmarks
+_BATCH_SIZE = 4096
+
+# Number of colors of the random palette searched by pruning benchmarks
+LARGE_PALETTE_SIZE = 16384
+
+
+def collect_benchmarks(
+    dmc_path: Union[Path, str], ariadna_path: Union[Path, str]
+) -> dict[str, Callable[[], Any]]:
+    """
+    Creates all benchmarks, keyed by names grouped with dots.
+
+    Args:
+        dmc_path (Union[Path, str]): Path to DMC convertion sheet in CSV.
+        ariadna_path (Union[Path, str]): Path to Ariadna convertion sheet in CSV.
+
+    Returns:
+        dict[str, Callable[[], Any]]: Benchmarked functions taking no arguments.
+    """
+    rng = np.random.default_rng(seed=0)
+    colors = [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=_BATCH_SIZE)]
+    color = colors[0]
+    primaries = hex_to_dec_primaries_batch(colors)
+    xyz = hex_to_xyz_batch(colors)
+    lab = xyz_to_lab_batch(xyz)
+
+    benchmarks = {
+        "converters.hex_to_dec_primaries.scalar": lambda: hex_to_dec_primaries(color),
+        "converters.hex_to_dec_primaries.batch": lambda: hex_to_dec_primaries_batch(
+            colors
+        ),
+        "converters.hex_to_xyz.scalar": lambda: hex_to_xyz(color),
+        "converters.hex_to_xyz.batch": lambda: hex_to_xyz_batch(primaries),
+        "converters.xyz_to_lab.scalar": lambda: xyz_to_lab(xyz[0]),
+        "converters.xyz_to_lab.batch": lambda: xyz_to_lab_batch(xyz),
+        "converters.lab_to_lch.scalar": lambda: lab_to_lch(lab[0]),
+        "converters.lab_to_lch.batch": lambda: lab_to_lch_batch(lab),
+        "converters.hex_to_lab.scalar": lambda: xyz_to_lab(hex_to_xyz(color)),
+        "converters.hex_to_lab.compiled": lambda: hex_to_lab(color),
+    }
+
+    backend = Backend(dmc_path=dmc_path, ariadna_path=ariadna_path, cache_size=0)
+    palette = backend.ariadna_df["rgb"].to_list()
+    coords = backend.ariadna_coordinates
+    bases = palette_coordinates([color])
+
+    for metric, metric_f in backend.METRICS.items():
+        kernel, space = METRIC_KERNELS[metric]
+        benchmarks[f"metrics.{metric}.scalar"] = (
+            lambda f=metric_f, other=palette[0]: f(color, other)
+        )
+        benchmarks[f"metrics.{metric}.batch"] = (
+            lambda f=kernel, base=bases[space][0], others=coords[space]: f(base, others)
+        )
+
+    # Scalar kernels convert both codes, the same work as the scalar metrics above
+    for metric, kernel in SCALAR_KERNELS.items():
+        benchmarks[f"metrics.{metric}.compiled"] = (
+            lambda f=kernel, other=palette[0]: f(hex_to_lab(color), hex_to_lab(other))
+        )
+        benchmarks[f"metrics.{metric}.nearest"] = (
+            lambda m=metric, base=bases["lab"][0], others=coords["lab"]: nearest(
+                base, others, m
+            )
+        )
+
+    for metric in backend.METRICS:
+        for n in N_VALUES:
+            benchmarks[f"backend.find_similar.{metric}.n={n}"] = (
+                lambda m=metric, n=n: backend.find_similar(color, m, n)
+            )
+
+    large_lab = _random_palette_lab(rng, LARGE_PALETTE_SIZE)
+    large_chroma = np.sqrt(large_lab[:, 1] ** 2 + large_lab[:, 2] ** 2)
+    for metric in LOWER_BOUNDS:
+        kernel, _ = METRIC_KERNELS[metric]
+        benchmarks[f"search.{metric}.large.exhaustive"] = (
+            lambda f=kernel, base=bases["lab"][0]: top_n_indices(f(base, large_lab), 5)
+        )
+        benchmarks[f"search.{metric}.large.pruned"] = (
+            lambda m=metric, base=bases["lab"][0]: pruned_top_n_indices(
+                base, large_lab, m, 5, large_chroma
+            )
+        )
+
+    benchmarks["backend.init"] = lambda: Backend(
+        dmc_path=dmc_path, ariadna_path=ariadna_path
+    )
+
+    return benchmarks
+
+
+def _random_palette_lab(rng: np.random.Generator, size: int) -> np.ndarray:
+    colors = [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=size)]
+    return palette_coordinates(colors)["lab"]
+
+
+def pruning_report(
+    palette_size: int = LARGE_PALETTE_SIZE, queries: int = 64
+) -> dict[str, dict[str, float]]:
+    """
+    Counts full metric evaluations skipped by lower-bound pruning.
+
+    Random base colors are searched in a random palette for every metric with lower
+    bounds and every n of `N_VALUES`.
+
+    Args:
+        palette_size (int, optional): Number of palette colors. Defaults to
+            `LARGE_PALETTE_SIZE`.
+        queries (int, optional): Number of searched base colors. Defaults to 64.
+
+    Returns:
+        dict[str, dict[str, float]]: Mean numbers of evaluated and pruned colors per
+            query and the pruned share, keyed by names like 'CIEDE2000.n=5'.
+    """
+    rng = np.random.default_rng(seed=1)
+    palette = _random_palette_lab(rng, palette_size)
+    bases = _random_palette_lab(rng, queries)
+    chroma = np.sqrt(palette[:, 1] ** 2 + palette[:, 2] ** 2)
+
+    report = {}
+    for metric in LOWER_BOUNDS:
+        for n in N_VALUES:
+            evaluated = statistics.mean(
+                pruned_top_n_indices(base, palette, metric, n, chroma)[1]
+                for base in bases
+            )
+            report[f"{metric}.n={n}"] = {
+                "evaluated": evaluated,
+                "pruned": palette_size - evaluated,
+                "pruned_ratio": 1 - evaluated / palette_size,
+            }
+
+    return report
+
+
+def time_benchmark(
+    func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2
+) -> dict[str, float]:
+    """
+    Times a function.
+
+    Args:
+        func (Callable[[], Any]): Benchmarked function.
+        repeat (int, optional): Number of repetitions. Defaults to 5.
+        min_time (float, optional): Minimum duration of a repetition in seconds.
+            Defaults to 0.2.
+
+    Returns:
+        dict[str, float]: Median and minimum seconds per call, and the number of
+            calls per repetition.
+    """
+    timer = timeit.Timer(func)
+
+    loops = 1
+    while (elapsed := timer.timeit(loops)) < min_time:
+        loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)) + 1)
+
+    times = [elapsed / loops] + [
+        timer.timeit(loops) / loops for _ in range(repeat - 1)
+    ]
+
+    return {"median": statistics.median(times), "min": min(times), "loops": loops}
+
+
+def run_benchmarks(
+    benchmarks: dict[str, Callable[[], Any]],
+    repeat: int = 5,
+    min_time: float = 0.2,
+    name_filter: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Runs benchmarks and collects results with a description of the environment.
+
+    Args:
+        benchmarks (dict[str, Callable[[], Any]]): Benchmarks keyed by the name.
+        repeat (int, optional): Number of repetitions. Defaults to 5.
+        min_time (float, optional): Minimum duration of a repetition in seconds.
+            Defaults to 0.2.
+        name_filter (Optional[str], optional): Substring of names of benchmarks to
+            run. Defaults to None (all benchmarks).
+
+    Returns:
+        dict[str, Any]: Results ready to be saved as JSON.
+    """
+    results = {
+        name: time_benchmark(func, repeat=repeat, min_time=min_time)
+        for name, func in benchmarks.items()
+        if name_filter is None or name_filter in name
+    }
+
+    return {
+        "environment": {
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "jit": JIT_AVAILABLE,
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[dict[str, Any]]:
+    """
+    Finds benchmarks which got slower than the baseline.
+
+    Only benchmarks present in both results are compared, using median times.
+
+    Args:
+        baseline (dict[str, Any]): Results of the baseline run.
+        current (dict[str, Any]): Results of the current run.
+        threshold (float, optional): Ratio of the current and baseline time above
+            which a benchmark is a regression. Defaults to 1.25.
+
+    Returns:
+        list[dict[str, Any]]: Regressed benchmarks with their baseline and current
+            times and their ratio, from the most regressed.
+    """
+    regressions = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base_time = baseline["results"][name]["median"]
+        ratio = result["median"] / base_time
+        if ratio > threshold:
+            regressions.append(
+                {
+                    "name": name,
+                    "baseline": base_time,
+                    "current": result["median"],
+                    "ratio": ratio,
+                }
+            )
+
+    return sorted(regressions, key=lambda regression: -regression["ratio"])
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.3g} {unit}"
+    return f"{seconds / 1e-9:.3g} ns"
+
+
+def main(args: Optional[list[str]] = None) -> int:
+    """
+    Runs or compares benchmarks from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+
+    Returns:
+        int: Exit code, 1 if regressions were found.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("dmc", help="path to the DMC CSV")
+    run_parser.add_argument("ariadna", help="path to the Ariadna CSV")
+    run_parser.add_argument("output", help="path of the JSON results")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2)
+    run_parser.add_argument(
+        "-k", "--filter", help="run benchmarks with names containing a substring"
+    )
+
+    compare_parser = commands.add_parser("compare", help="compare against a baseline")
+    compare_parser.add_argument("baseline", help="path of the baseline JSON results")
+    compare_parser.add_argument("current", help="path of the current JSON results")
+    compare_parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    parsed = parser.parse_args(args)
+
+    if parsed.command == "run":
+        start_time = time.perf_counter()
+        results = run_benchmarks(
+            collect_benchmarks(parsed.dmc, parsed.ariadna),
+            repeat=parsed.repeat,
+            min_time=parsed.min_time,
+            name_filter=parsed.filter,
+        )
+        results["pruning"] = pruning_report()
+        Path(parsed.output).write_text(json.dumps(results, indent=2) + "\n")
+        for name, result in results["results"].items():
+            print(f"{name:60} {_format_time(result['median']):>10}")  # noqa: T201
+        for name, counts in results["pruning"].items():
+            print(  # noqa: T201
+                f"pruning.{name:52} {counts['pruned']:>10.0f} of {LARGE_PALETTE_SIZE} "
+                f"({counts['pruned_ratio']:.1%}) evaluations pruned"
+            )
+        print(  # noqa: T201
+            f"{len(results['results'])} benchmarks in "
+            f"{time.perf_counter() - start_time:.1f} s"
+        )
+        return 0
+
+    regressions = compare_results(
+        json.loads(Path(parsed.baseline).read_text()),
+        json.loads(Path(parsed.current).read_text()),
+        threshold=parsed.threshold,
+    )
+    for regression in regressions:
+        print(  # noqa: T201
+            f"{regression['name']:60} {_format_time(regression['baseline']):>10} -> "
+            f"{_format_time(regression['current']):>10} ({regression['ratio']:.2f}x)"
+        )
+    print(f"{len(regressions)} regressions found")  # noqa: T201
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
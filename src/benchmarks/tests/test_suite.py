@@ -0,0 +1,91 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from benchmarks import collect_benchmarks, compare_results, run_benchmarks
+from benchmarks.suite import N_VALUES, main, pruning_report, time_benchmark
+from metrics.scoring import METRIC_KERNELS
+
+
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+
+@pytest.fixture(scope="module")
+def benchmarks() -> dict:
+    return collect_benchmarks(DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv")
+
+
+def test_collect_benchmarks(benchmarks: dict):
+    for metric in METRIC_KERNELS:
+        assert f"metrics.{metric}.scalar" in benchmarks
+        assert f"metrics.{metric}.batch" in benchmarks
+        assert f"backend.find_similar.{metric}.n=5" in benchmarks
+    assert "metrics.CIEDE2000.compiled" in benchmarks
+    assert "metrics.CMC 2:1.nearest" in benchmarks
+    assert "search.CIEDE2000.large.pruned" in benchmarks
+    assert "converters.hex_to_xyz.batch" in benchmarks
+    assert "converters.hex_to_lab.compiled" in benchmarks
+    assert "backend.init" in benchmarks
+
+    for name, func in benchmarks.items():
+        if name != "backend.init":
+            func()
+
+
+def test_time_benchmark():
+    result = time_benchmark(lambda: sum(range(100)), repeat=3, min_time=0.01)
+
+    assert result["loops"] > 1
+    assert 0 < result["min"] <= result["median"]
+
+
+def test_run_benchmarks_filter(benchmarks: dict):
+    results = run_benchmarks(benchmarks, repeat=1, min_time=0, name_filter="lab_to")
+
+    assert set(results["results"]) == {
+        "converters.lab_to_lch.scalar",
+        "converters.lab_to_lch.batch",
+    }
+    assert "numpy" in results["environment"]
+
+
+def _results(**medians: float) -> dict:
+    return {"results": {k: {"median": v} for k, v in medians.items()}}
+
+
+def test_pruning_report():
+    report = pruning_report(palette_size=2048, queries=4)
+
+    assert set(report) == {
+        f"{metric}.n={n}"
+        for metric in ("CIEDE2000", "CMC 1:1", "CMC 2:1")
+        for n in N_VALUES
+    }
+    for counts in report.values():
+        assert counts["evaluated"] + counts["pruned"] == 2048
+    assert report["CIEDE2000.n=5"]["pruned_ratio"] > 0.5
+
+
+def test_compare_results():
+    baseline = _results(fast=1.0, slow=1.0, removed=1.0)
+    current = _results(fast=1.1, slow=2.0, added=5.0)
+
+    regressions = compare_results(baseline, current, threshold=1.25)
+
+    assert [r["name"] for r in regressions] == ["slow"]
+    assert regressions[0]["ratio"] == 2.0
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture):
+    data = [str(DATA_DIR / "dmc.csv"), str(DATA_DIR / "ariadna.csv")]
+    current = tmp_path / "current.json"
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(_results(**{"converters.lab_to_lch.batch": 1e-9})))
+
+    args = ["--repeat", "1", "--min-time", "0", "-k", "lab_to_lch.batch"]
+    assert main(["run", *data, str(current), *args]) == 0
+    assert "CIEDE2000.n=5" in json.loads(current.read_text())["pruning"]
+    assert main(["compare", str(current), str(current)]) == 0
+    assert main(["compare", str(baseline), str(current)]) == 1
+    assert "1 regressions found" in capsys.readouterr().out
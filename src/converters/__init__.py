@@ -1,6 +1,13 @@
 """
 Converters for translating different representations of colors.
 """
-from .hexadec import hex_to_dec_primaries, hex_to_xyz
-from .lab import lab_to_lch
-from .xyz import xyz_to_lab
+from .hexadec import (
+    InvalidColorError,
+    decode_hex_colors,
+    hex_to_dec_primaries,
+    hex_to_dec_primaries_batch,
+    hex_to_xyz,
+    hex_to_xyz_batch,
+)
+from .lab import lab_to_lch, lab_to_lch_batch
+from .xyz import xyz_to_lab, xyz_to_lab_batch
@@ -1,17 +1,59 @@
 """
 Converters for RGB colors in hexadecimal format.
 """
-from typing import Union
+from typing import Sequence, Union
 
 import numpy as np
 
 
+SRGB_MATRIX = np.array(
+    [
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ]
+)
+
+Colors = Union[Sequence[str], np.ndarray]
+
+
+def srgb_to_linear(rgb: np.ndarray) -> np.ndarray:
+    """
+    Removes the sRGB gamma companding from primaries.
+
+    Args:
+        rgb (np.ndarray): Array of primaries scaled to 0-1.
+
+    Returns:
+        np.ndarray[float]: Array of linear primaries (0-1) with the same shape.
+    """
+    A = 0.055
+    return np.where(rgb > 0.04045, ((rgb + A) / (1 + A)) ** 2.4, rgb / 12.92)
+
+
+# Linear values of all 8-bit primaries, so decoded colors need a lookup instead of a
+# power per channel
+SRGB_LINEAR_TABLE = srgb_to_linear(np.arange(256) / 255)
+SRGB_LINEAR_TABLE.setflags(write=False)
+
+# Plain Python copies used by the scalar converter, faster for a single color
+_SRGB_LINEAR_VALUES = SRGB_LINEAR_TABLE.tolist()
+_SRGB_MATRIX_ROWS = SRGB_MATRIX.tolist()
+
+
+# Characters of hexadecimal digits accepted by the scalar parser
+_HEX_DIGITS = frozenset("0123456789abcdefABCDEF")
+
+
 def hex_to_dec_primaries(
     color: str, arithmetic: bool = False
 ) -> Union[list[int], list[float]]:
     """
     Splits hex color code into three decimal values of the primary colors.
 
+    Codes are checked like by `decode_hex_colors`, so malformed codes raise
+    `InvalidColorError`.
+
     Args:
         color (str): Color code string (hex), can include '#' prefix
         arithmetic (bool, optional): If True returns float values between 0 and 1.
@@ -20,22 +62,136 @@ def hex_to_dec_primaries(
     Returns:
         Union[list[int], list[float]]: List of three integers (0-255) or floats (0-1)
     """
-    color = color.lstrip("#")
+    code = color[1:] if color[:1] == "#" else color
+    if len(code) != 6 or not _HEX_DIGITS.issuperset(code):
+        raise InvalidColorError([0])
+
+    value = int(code, 16)
+    primaries = [value >> 16, (value >> 8) & 0xFF, value & 0xFF]
+    if arithmetic:
+        return [primary / 255 for primary in primaries]
+    return primaries
+
+
+class InvalidColorError(ValueError):
+    """
+    Error raised for malformed hexadecimal color codes.
+
+    Args:
+        rows (list[int]): Positions of the malformed codes.
+        source (str, optional): Description of the parsed codes. Defaults to "colors".
+    """
+
+    def __init__(self, rows: list[int], source: str = "colors"):
+        shown = ", ".join(map(str, rows[:10])) + (", ..." if len(rows) > 10 else "")
+        super().__init__(f"Malformed color codes in {source} at rows: {shown}.")
+        self.rows = rows
+
+
+# Values of hexadecimal digits indexed by the character code, 16 marks the zero which
+# pads unused characters and 255 any other character (codes above 127 are clipped)
+_HEX_DIGIT_VALUES = np.full(128, 255, dtype=np.uint8)
+_HEX_DIGIT_VALUES[np.frombuffer(b"0123456789abcdefABCDEF", dtype=np.uint8)] = [
+    *range(16),
+    *range(10, 16),
+]
+_HEX_DIGIT_VALUES[0] = 16
+_HEX_DIGIT_VALUES.setflags(write=False)
+
+
+def decode_hex_colors(colors: Colors) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Decodes hex color codes into primaries in a single vectorized pass.
+
+    Codes are copied into a fixed-width buffer of 8 characters, whose raw character
+    codes are mapped to digit values with a lookup table, so no string is parsed on
+    its own. Codes must have six hexadecimal digits and can include the '#' prefix.
+
+    Args:
+        colors (Colors): Sequence (list, array, pandas column) of color code strings.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Nx3 array of primaries (uint8, zeros for
+            malformed codes) and a boolean array marking valid codes.
+    """
+    codes = np.asarray(colors, dtype="U8").reshape(-1)
+    chars = codes.view(np.uint32).reshape(len(codes), 8)
+
+    # Six digits followed by the padding, longer codes fill all 8 characters
+    has_hash = chars[:, 0] == ord("#")
+    window = np.where(has_hash[:, np.newaxis], chars[:, 1:], chars[:, :7])
+    nibbles = _HEX_DIGIT_VALUES[np.minimum(window, 127)]
+    valid = (nibbles[:, :6].max(axis=1, initial=0) < 16) & (nibbles[:, 6] == 16)
+
+    primaries = (nibbles[:, 0:6:2] << 4) | nibbles[:, 1:6:2]
+    primaries[~valid] = 0
+
+    return primaries, valid
+
+
+def hex_to_dec_primaries_batch(colors: Colors) -> np.ndarray:
+    """
+    Converts a sequence of hex color codes into an array of primary colors values.
+
+    Codes are decoded by `decode_hex_colors`. An array of primaries (any shape with a
+    last axis of 3) is passed through unchanged, so callers can hand either hex
+    strings or already decoded colors to the batch converters. Malformed codes raise
+    `InvalidColorError` listing all their positions.
 
-    def to_dec(h: str) -> int:
-        dec = int("0x" + h, 16)
-        if arithmetic:
-            dec /= 255
-        return dec
+    Args:
+        colors (Colors): Sequence of color code strings (hex), can include '#' prefix,
+            or an (..., 3) array of integer primaries (0-255).
+
+    Returns:
+        np.ndarray[uint8]: Nx3 (or ...x3) numpy array of integers (0-255).
+    """
+    if isinstance(colors, np.ndarray) and colors.dtype.kind in "iuf":
+        return colors
 
-    return [to_dec(color[i : i + 2]) for i in range(0, len(color), 2)]
+    primaries, valid = decode_hex_colors(colors)
+    if not valid.all():
+        raise InvalidColorError(np.flatnonzero(~valid).tolist())
+
+    return primaries
+
+
+def hex_to_xyz_batch(colors: Colors) -> np.ndarray:
+    """
+    Converts standard RGB colors to XYZ coordinates in a single vectorized pass.
+
+    Uses the standard illuminant D65 with 2° observer. Integer primaries are
+    linearized with `SRGB_LINEAR_TABLE`.
+
+    Args:
+        colors (Colors): Sequence of color code strings (hex), can include '#' prefix,
+            or an (..., 3) array of integer primaries (0-255).
+
+    Returns:
+        np.ndarray[float]: Nx3 (or ...x3) numpy array of float XYZ coordinates (0-1)
+    """
+    primaries = hex_to_dec_primaries_batch(colors)
+    if primaries.dtype.kind in "iu":
+        rgb_lin = SRGB_LINEAR_TABLE[primaries]
+    else:
+        rgb_lin = srgb_to_linear(primaries / 255)
+
+    # Explicit channel sums keep results independent of the batch size (BLAS matmul
+    # may round differently for different array shapes). Whole channels are combined
+    # at once, which is faster than broadcasting over the short last axis.
+    r, g, b = rgb_lin[..., 0], rgb_lin[..., 1], rgb_lin[..., 2]
+    xyz = np.empty(rgb_lin.shape)
+    for i, (m_r, m_g, m_b) in enumerate(SRGB_MATRIX):
+        xyz[..., i] = r * m_r + g * m_g + b * m_b
+
+    return xyz
 
 
 def hex_to_xyz(color: str) -> np.ndarray:
     """
     Converts standard RGB color code to XYZ coordinates.
 
-    Uses the standard illuminant D65 with 2° observer.
+    Uses the standard illuminant D65 with 2° observer. Gives the same results as
+    `hex_to_xyz_batch` using plain Python arithmetic, which is faster for one color.
 
     Args:
         color (str): Color code string (hex), can include '#' prefix
@@ -43,24 +199,8 @@ def hex_to_xyz(color: str) -> np.ndarray:
     Returns:
         np.ndarray[float]: 1x3 numpy array of float XYZ coordinates (0-1)
     """
-    rgb = hex_to_dec_primaries(color, arithmetic=True)
-
-    def to_lin(c: float) -> float:
-        if c > 0.04045:
-            A = 0.055
-            return ((c + A) / (1 + A)) ** 2.4
-        else:
-            return c / 12.92
-
-    rgb_lin = np.array([[to_lin(c)] for c in rgb])
-
-    SRGB_MATRIX = np.array(
-        [
-            [0.4124564, 0.3575761, 0.1804375],
-            [0.2126729, 0.7151522, 0.0721750],
-            [0.0193339, 0.1191920, 0.9503041],
-        ]
-    )
-    xyz = np.matmul(SRGB_MATRIX, rgb_lin).flatten()
+    r, g, b = (_SRGB_LINEAR_VALUES[p] for p in hex_to_dec_primaries(color))
 
-    return xyz
+    return np.array(
+        [r * m_r + g * m_g + b * m_b for m_r, m_g, m_b in _SRGB_MATRIX_ROWS]
+    )
@@ -6,19 +6,34 @@ from typing import Sequence
 import numpy as np
 
 
-def lab_to_lch(lab: Sequence[float]) -> list[float]:
+def lab_to_lch_batch(lab: np.ndarray) -> np.ndarray:
     """
-    Converts Lab coordinates to LCHab.
+    Converts an array of Lab coordinates to LCHab in a single vectorized pass.
 
     Args:
-    lab (Sequence[float]): List or numpy array with Lab coordinates.
+        lab (np.ndarray): Nx3 (or ...x3) array with Lab coordinates.
 
     Returns:
-    list[float]: List containing LCH coordinates with H expressed in degrees.
+        np.ndarray[float]: Array of LCH coordinates with the same shape as the input,
+            with H expressed in degrees.
     """
-    L, a, b = lab
+    lab = np.asarray(lab, dtype=float)
+    L, a, b = lab[..., 0], lab[..., 1], lab[..., 2]
 
     C = np.sqrt(a ** 2 + b ** 2)
     H = np.degrees(np.arctan2(b, a)) % 360
 
-    return [L, C, H]
+    return np.stack((L, C, H), axis=-1)
+
+
+def lab_to_lch(lab: Sequence[float]) -> list[float]:
+    """
+    Converts Lab coordinates to LCHab.
+
+    Args:
+    lab (Sequence[float]): List or numpy array with Lab coordinates.
+
+    Returns:
+    list[float]: List containing LCH coordinates with H expressed in degrees.
+    """
+    return list(lab_to_lch_batch(lab))
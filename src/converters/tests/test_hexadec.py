@@ -1,7 +1,18 @@
+import numpy as np
 import pytest
 from pytest import approx
 
-from converters import hex_to_dec_primaries, hex_to_xyz
+from converters import (
+    InvalidColorError,
+    decode_hex_colors,
+    hex_to_dec_primaries,
+    hex_to_dec_primaries_batch,
+    hex_to_xyz,
+    hex_to_xyz_batch,
+)
+from converters.hexadec import SRGB_LINEAR_TABLE, SRGB_MATRIX, srgb_to_linear
+
+from .conftest import Color
 
 
 @pytest.mark.parametrize("color", ["red", "blue"])
@@ -17,3 +28,94 @@ def test_hex_to_xyz(color: str, request: pytest.FixtureRequest):
     color = request.getfixturevalue(color)
 
     assert hex_to_xyz(color.hexadec) == approx(color.xyz, abs=1e-3)
+
+
+def test_hex_to_dec_primaries_batch(red: Color, blue: Color):
+    result = hex_to_dec_primaries_batch([red.hexadec, "#" + blue.hexadec])
+
+    assert result.shape == (2, 3)
+    assert result.tolist() == [red.rgb, blue.rgb]
+    np.testing.assert_array_equal(hex_to_dec_primaries_batch(result), result)
+    assert hex_to_dec_primaries_batch([]).shape == (0, 3)
+
+
+def test_decode_hex_colors_matches_scalar_parser():
+    colors = [f"#{c:06x}" for c in range(0, 2 ** 24, 4099)] + ["A0b1C2", "#FFFFFF"]
+
+    primaries, valid = decode_hex_colors(colors)
+
+    assert primaries.dtype == np.uint8
+    assert valid.all()
+    assert primaries.tolist() == [hex_to_dec_primaries(c) for c in colors]
+
+
+def test_decode_hex_colors_marks_malformed_codes():
+    colors = ["#c25b08", "#56517", "c25b08a", "#c25b0g", "##c25b0", "", "#c25b08 ", "ą"]
+
+    primaries, valid = decode_hex_colors(np.array(colors))
+
+    assert valid.tolist() == [True] + [False] * 7
+    assert primaries[1:].tolist() == [[0, 0, 0]] * 7
+    for color in colors[1:]:
+        with pytest.raises(InvalidColorError):
+            hex_to_dec_primaries(color)
+
+
+def test_hex_to_dec_primaries_batch_reports_malformed_rows():
+    with pytest.raises(InvalidColorError, match="rows: 1, 3") as error:
+        hex_to_dec_primaries_batch(["#000000", "#00000", "#ffffff", "xyz"])
+
+    assert error.value.rows == [1, 3]
+
+
+def test_hex_to_xyz_batch(red: Color, blue: Color):
+    from_hex = hex_to_xyz_batch([red.hexadec, blue.hexadec])
+    from_rgb = hex_to_xyz_batch(np.array([red.rgb, blue.rgb]))
+
+    assert from_hex.shape == (2, 3)
+    assert from_hex[0] == approx(red.xyz, abs=1e-3)
+    assert from_hex[1] == approx(blue.xyz, abs=1e-3)
+    np.testing.assert_array_equal(from_hex, from_rgb)
+    np.testing.assert_array_equal(from_hex[0], hex_to_xyz(red.hexadec))
+
+
+def test_hex_to_xyz_batch_keeps_leading_axes(red: Color, blue: Color):
+    image = np.array([[red.rgb, blue.rgb], [blue.rgb, red.rgb]], dtype=np.uint8)
+
+    result = hex_to_xyz_batch(image)
+
+    assert result.shape == (2, 2, 3)
+    np.testing.assert_array_equal(result[0, 0], result[1, 1])
+    assert result[0, 1] == approx(blue.xyz, abs=1e-3)
+
+
+def _reference_to_linear(rgb: np.ndarray) -> np.ndarray:
+    return np.where(rgb > 0.04045, ((rgb + 0.055) / 1.055) ** 2.4, rgb / 12.92)
+
+
+def test_srgb_linear_table_matches_formula():
+    values = np.arange(256) / 255
+
+    np.testing.assert_allclose(
+        SRGB_LINEAR_TABLE, _reference_to_linear(values), rtol=1e-15, atol=0
+    )
+    np.testing.assert_array_equal(srgb_to_linear(values), SRGB_LINEAR_TABLE)
+
+
+def test_hex_to_xyz_batch_matches_formula():
+    primaries = np.random.default_rng(seed=0).integers(0, 256, size=(1000, 3))
+    expected = _reference_to_linear(primaries / 255) @ SRGB_MATRIX.T
+
+    np.testing.assert_allclose(hex_to_xyz_batch(primaries), expected, rtol=1e-13)
+    np.testing.assert_allclose(
+        hex_to_xyz_batch(primaries.astype(float)), expected, rtol=1e-13
+    )
+
+
+def test_hex_to_xyz_matches_batch_exactly():
+    rng = np.random.default_rng(seed=1)
+    colors = [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=500)]
+
+    scalar = np.array([hex_to_xyz(color) for color in colors])
+
+    np.testing.assert_array_equal(scalar, hex_to_xyz_batch(colors))
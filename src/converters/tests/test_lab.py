@@ -1,7 +1,9 @@
 import pytest
 from pytest import approx
 
-from converters import lab_to_lch
+from converters import lab_to_lch, lab_to_lch_batch
+
+from .conftest import Color
 
 
 @pytest.mark.parametrize("color", ["red", "blue"])
@@ -10,3 +12,12 @@ def test_xyz_to_lab(color: str, request: pytest.FixtureRequest):
 
     assert lab_to_lch(color.lab) == approx(color.lch, abs=1e-3)
     assert lab_to_lch(color.lab) == approx(color.lch, abs=1e-3)
+
+
+def test_lab_to_lch_batch(red: Color, blue: Color):
+    result = lab_to_lch_batch([red.lab, blue.lab])
+
+    assert result.shape == (2, 3)
+    assert result[0] == approx(red.lch, abs=1e-3)
+    assert result[1] == approx(blue.lch, abs=1e-3)
+    assert list(result[0]) == lab_to_lch(red.lab)
@@ -1,7 +1,10 @@
+import numpy as np
 import pytest
 from pytest import approx
 
-from converters import xyz_to_lab
+from converters import xyz_to_lab, xyz_to_lab_batch
+
+from .conftest import Color
 
 
 @pytest.mark.parametrize("color", ["red", "blue"])
@@ -10,3 +13,43 @@ def test_xyz_to_lab(color: str, request: pytest.FixtureRequest):
 
     assert xyz_to_lab(color.xyz) == approx(color.lab, abs=1e-3)
     assert xyz_to_lab(color.xyz) == approx(color.lab, abs=1e-3)
+
+
+def test_xyz_to_lab_batch(red: Color, blue: Color):
+    result = xyz_to_lab_batch([red.xyz, blue.xyz])
+
+    assert result.shape == (2, 3)
+    assert result[0] == approx(red.lab, abs=1e-3)
+    assert result[1] == approx(blue.lab, abs=1e-3)
+    assert list(result[1]) == xyz_to_lab(blue.xyz)
+
+
+def _reference_xyz_to_lab(xyz: np.ndarray) -> np.ndarray:
+    xyz_r = xyz / np.array([0.95047, 1, 1.08883])
+    f = np.where(xyz_r > 0.008856, np.cbrt(xyz_r), (903.3 * xyz_r + 16) / 116)
+    return np.stack(
+        (116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])),
+        axis=-1,
+    )
+
+
+def test_xyz_to_lab_batch_matches_formula():
+    rng = np.random.default_rng(seed=0)
+    # Include dark colors handled by the linear segment
+    xyz = np.concatenate((rng.random((1000, 3)), rng.random((1000, 3)) * 0.01))
+
+    result = xyz_to_lab_batch(xyz)
+
+    expected = _reference_xyz_to_lab(xyz)
+    np.testing.assert_allclose(result, expected, rtol=1e-13, atol=1e-12)
+    assert xyz_to_lab_batch(xyz.reshape(20, 100, 3)).shape == (20, 100, 3)
+    np.testing.assert_array_equal(xyz_to_lab_batch(xyz[7]), result[7])
+
+
+def test_xyz_to_lab_matches_batch_exactly():
+    rng = np.random.default_rng(seed=1)
+    xyz = np.concatenate((rng.random((500, 3)), rng.random((500, 3)) * 0.01))
+
+    scalar = np.array([xyz_to_lab(coordinates) for coordinates in xyz])
+
+    np.testing.assert_array_equal(scalar, xyz_to_lab_batch(xyz))
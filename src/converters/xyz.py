@@ -6,30 +6,79 @@ from typing import Sequence
 import numpy as np
 
 
+XYZ_N = np.array([0.95047, 1, 1.08883])
+EPSILON = 0.008856  # 216 / 24389
+KAPPA = 903.3  # 24389 / 27
+
+_XYZ_N_VALUES = XYZ_N.tolist()
+
+
+def _lab_f(channel: np.ndarray, white: float) -> np.ndarray:
+    """
+    Applies the Lab companding function to a channel relative to the white point.
+
+    The cube root is computed for the whole channel and only the dark values below
+    EPSILON are replaced with the linear segment, instead of evaluating both branches.
+
+    Args:
+        channel (np.ndarray): Array of X, Y or Z coordinates.
+        white (float): Coordinate of the reference white.
+
+    Returns:
+        np.ndarray[float]: Companded values.
+    """
+    relative = channel / white
+    f = np.cbrt(relative)
+
+    dark = relative <= EPSILON
+    if dark.any():
+        f[dark] = (KAPPA * relative[dark] + 16) / 116
+
+    return f
+
+
+def xyz_to_lab_batch(xyz: np.ndarray) -> np.ndarray:
+    """
+    Converts an array of XYZ coordinates to Lab in a single vectorized pass.
+
+    Uses the standard illuminant D65 with 2° observer. Channels are processed whole,
+    which is faster than broadcasting over the short last axis.
+
+    Args:
+        xyz (np.ndarray): Nx3 (or ...x3) array with XYZ coordinates (0-1).
+
+    Returns:
+        np.ndarray[float]: Array of Lab coordinates with the same shape as the input.
+    """
+    xyz = np.asarray(xyz, dtype=float)
+    flat = xyz.reshape(-1, 3)
+    f_x, f_y, f_z = (_lab_f(flat[:, i], XYZ_N[i]) for i in range(3))
+
+    lab = np.empty(flat.shape)
+    lab[:, 0] = 116 * f_y - 16
+    lab[:, 1] = 500 * (f_x - f_y)
+    lab[:, 2] = 200 * (f_y - f_z)
+
+    return lab.reshape(xyz.shape)
+
+
 def xyz_to_lab(xyz: Sequence[float]) -> list[float]:
     """
     Converts XYZ coordinates to Lab using the standard illuminant D65 with 2° observer.
 
+    Gives the same results as `xyz_to_lab_batch` using plain Python arithmetic, which
+    is faster for one color.
+
     Args:
         xyz (Sequence[float]): List or numpy array with XYZ coordinates (0-1).
 
     Returns:
         list[float]: List containing Lab coordinates.
     """
-    XYZ_N = [0.95047, 1, 1.08883]
-    EPSILON = 0.008856  # 216 / 24389
-    KAPPA = 903.3  # 24389 / 27
-
-    x_r, y_r, z_r = np.array(xyz) / XYZ_N
-
-    def f(t: float) -> float:
-        if t > EPSILON:
-            return np.cbrt(t)
-        else:
-            return (KAPPA * t + 16) / 116
-
-    L = 116 * f(y_r) - 16
-    a = 500 * (f(x_r) - f(y_r))
-    b = 200 * (f(y_r) - f(z_r))
+    relative = [float(c) / white for c, white in zip(xyz, _XYZ_N_VALUES)]
+    f_x, f_y, f_z = (
+        root if r > EPSILON else (KAPPA * r + 16) / 116
+        for r, root in zip(relative, np.cbrt(relative).tolist())
+    )
 
-    return [L, a, b]
+    return [116 * f_y - 16, 500 * (f_x - f_y), 200 * (f_y - f_z)]
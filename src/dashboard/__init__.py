@@ -1,5 +1,52 @@
 """
 Classes and functions used for the dashboard creation.
+
+Submodules are imported on the first access to their names, so command line tools
+such as `dashboard.batch` start without loading pandas, plotly and Flask.
 """
-from .backend import Backend
-from .graph_manipulation import clear_graph, draw_graph
+import importlib
+from typing import Any
+
+
+_EXPORTS = {
+    "create_api": ".api",
+    "Backend": ".backend",
+    "clear_graph": ".graph_manipulation",
+    "clear_swatch": ".graph_manipulation",
+    "draw_graph": ".graph_manipulation",
+    "draw_swatch": ".graph_manipulation",
+    "StageTimings": ".instrumentation",
+    "QueryExecutor": ".executor",
+    "QueueFullError": ".executor",
+    "Palette": ".palettes",
+    "PaletteRegistry": ".palettes",
+    "PaletteWatcher": ".reload",
+    "create_metrics_api": ".api",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Imports the submodule defining the requested name.
+
+    Args:
+        name (str): Exported name.
+
+    Returns:
+        Any: Exported object.
+    """
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """
+    Lists module attributes including the lazily imported names.
+    """
+    return sorted(set(globals()) | set(_EXPORTS))
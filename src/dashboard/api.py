@@ -0,0 +1,254 @@
+"""
+JSON APIs answering similarity queries and exposing timings of query stages.
+
+The API is served by the Flask server underlying the Dash app:
+    POST /api/similar
+    {"colors": ["#c25b08", ...], "metric": "CIEDE2000", "n": 5}
+or, for DMC colors:
+    {"dmc": ["310", ...], "metric": "CIEDE2000", "n": 5}
+
+Responses keep one list per queried color:
+    {"metric": "CIEDE2000", "n": 5, "numbers": [[...], ...], "colors": [[...], ...]}
+
+Every response has a Server-Timing header with parsing, scoring and total durations in
+milliseconds, which helps to tune batch sizes.
+
+Histograms of query stage durations, counters of the query pool and the memory use
+of the worker serving the request are exposed in the Prometheus text format:
+    GET /metrics
+
+If profiling is allowed, a request sent with the 'X-Profile: 1' header is sampled by
+a background thread, and its queries run in the request thread instead of the query
+pool. Its id is returned in the 'X-Profile-Id' header and the collapsed stacks (the
+flame graph input format) are served at:
+    GET /metrics/profiles/<id>
+"""
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+from flask import Blueprint, Response, abort, g, jsonify, request
+
+from converters import decode_hex_colors
+from metrics.scoring import METRIC_KERNELS
+
+from .backend import Backend
+from .cache import normalize_color
+from .executor import QueryExecutor
+from .instrumentation import SamplingProfiler, StageTimings, memory_to_prometheus
+
+
+MAX_COLORS = 10_000
+MAX_N = 50
+MAX_CONTENT_LENGTH = 1024 * 1024
+
+PROFILE_HEADER = "X-Profile"
+
+
+class ApiError(Exception):
+    """
+    Error returned to the client with the given HTTP status.
+
+    Args:
+        message (str): Error description.
+        status (int, optional): HTTP status code. Defaults to 400.
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _parse_query(
+    query: object, max_colors: int, max_n: int
+) -> tuple[str, list[str], str, int]:
+    """
+    Validates a query.
+
+    Args:
+        query (object): Decoded JSON body, of any JSON type until validated.
+        max_colors (int): Maximum number of colors in a query.
+        max_n (int): Maximum number of similar colors.
+
+    Returns:
+        tuple[str, list[str], str, int]: Input type ('colors' or 'dmc'), queried
+            colors, metric and number of similar colors.
+    """
+    if not isinstance(query, dict):
+        raise ApiError("Expected a JSON object.")
+
+    kinds = [kind for kind in ("colors", "dmc") if kind in query]
+    if len(kinds) != 1:
+        raise ApiError("Expected exactly one of 'colors' and 'dmc'.")
+    kind = kinds[0]
+
+    entries = query[kind]
+    if not isinstance(entries, list) or not all(isinstance(e, str) for e in entries):
+        raise ApiError(f"'{kind}' must be a list of strings.")
+    if len(entries) > max_colors:
+        raise ApiError(f"At most {max_colors} colors are allowed per request.", 413)
+
+    if kind == "colors":
+        _, valid = decode_hex_colors(entries)
+        if not valid.all():
+            invalid = np.flatnonzero(~valid)[:10].tolist()
+            raise ApiError(f"Invalid colors at positions: {invalid}.")
+        entries = [normalize_color(color) for color in entries]
+
+    metric = query.get("metric", "CIEDE2000")
+    if metric not in METRIC_KERNELS:
+        raise ApiError(f"Unknown metric, expected one of: {list(METRIC_KERNELS)}.")
+
+    n = query.get("n", 5)
+    if not isinstance(n, int) or isinstance(n, bool) or not 0 < n <= max_n:
+        raise ApiError(f"'n' must be an integer between 1 and {max_n}.")
+
+    return kind, entries, metric, n
+
+
+def create_api(
+    backend: Backend,
+    max_colors: int = MAX_COLORS,
+    max_n: int = MAX_N,
+    max_content_length: int = MAX_CONTENT_LENGTH,
+) -> Blueprint:
+    """
+    Creates the blueprint of the JSON API.
+
+    Args:
+        backend (Backend): Backend answering queries.
+        max_colors (int, optional): Maximum number of colors in a request. Defaults to
+            10000.
+        max_n (int, optional): Maximum number of similar colors. Defaults to 50.
+        max_content_length (int, optional): Maximum size of a request body in bytes.
+            Defaults to 1 MiB.
+
+    Returns:
+        Blueprint: Blueprint to register on the Flask server.
+    """
+    api = Blueprint("api", __name__, url_prefix="/api")
+
+    @api.errorhandler(ApiError)
+    def handle_api_error(error: ApiError) -> tuple[Response, int]:
+        return jsonify(error=str(error)), error.status
+
+    @api.post("/similar")
+    def similar() -> Response:
+        start_time = time.perf_counter()
+
+        if request.content_length is None:
+            raise ApiError("The request must declare its Content-Length.", 411)
+        if request.content_length > max_content_length:
+            raise ApiError(f"Requests are limited to {max_content_length} bytes.", 413)
+
+        kind, entries, metric, n = _parse_query(
+            request.get_json(silent=True), max_colors, max_n
+        )
+        parsed_time = time.perf_counter()
+
+        if kind == "colors":
+            codes, colors = backend.find_similar_batch(entries, metric, n)
+        else:
+            try:
+                codes, colors = backend.find_similar_dmc_batch(entries, metric, n)
+            except KeyError as error:
+                raise ApiError(f"Unknown DMC codes: {error.args[0][:10]}.") from None
+        scored_time = time.perf_counter()
+
+        response = jsonify(metric=metric, n=n, numbers=codes, colors=colors)
+        end_time = time.perf_counter()
+
+        response.headers["Server-Timing"] = ", ".join(
+            f"{name};dur={(stop - start) * 1000:.3f}"
+            for name, start, stop in (
+                ("parse", start_time, parsed_time),
+                ("score", parsed_time, scored_time),
+                ("total", start_time, end_time),
+            )
+        )
+        return response
+
+    return api
+
+
+def create_metrics_api(
+    timings: StageTimings,
+    allow_profiling: bool = False,
+    interval: float = 0.001,
+    max_profiles: int = 16,
+    executor: Optional[QueryExecutor] = None,
+) -> Blueprint:
+    """
+    Creates the blueprint exposing stage timings and request profiles.
+
+    Args:
+        timings (StageTimings): Exposed timings.
+        allow_profiling (bool, optional): Whether requests can ask to be profiled with
+            the 'X-Profile: 1' header. Defaults to False.
+        interval (float, optional): Seconds between profiler samples. Defaults to
+            0.001.
+        max_profiles (int, optional): Number of the most recent profiles kept.
+            Defaults to 16.
+        executor (Optional[QueryExecutor], optional): Pool whose query counts and
+            queue depth are exposed, and which runs queries of profiled requests
+            inline. Defaults to None.
+
+    Returns:
+        Blueprint: Blueprint to register on the Flask server.
+    """
+    api = Blueprint("metrics", __name__, url_prefix="/metrics")
+    profiles: OrderedDict[str, str] = OrderedDict()
+    profile_ids = itertools.count(1)
+    profiles_lock = threading.Lock()
+
+    @api.get("")
+    def metrics() -> Response:
+        return Response(
+            timings.to_prometheus()
+            + (executor.to_prometheus() if executor is not None else "")
+            + memory_to_prometheus(),
+            mimetype="text/plain; version=0.0.4",
+        )
+
+    if not allow_profiling:
+        return api
+
+    @api.before_app_request
+    def start_profiler() -> None:
+        if request.headers.get(PROFILE_HEADER) == "1":
+            g.profiler = SamplingProfiler(threading.get_ident(), interval)
+            g.profiler.start()
+            if executor is not None:
+                executor.run_inline()
+
+    @api.after_app_request
+    def stop_profiler(response: Response) -> Response:
+        profiler: Optional[SamplingProfiler] = g.pop("profiler", None)
+        if profiler is not None:
+            profiler.stop()
+            profile_id = str(next(profile_ids))
+            with profiles_lock:
+                profiles[profile_id] = profiler.collapsed()
+                while len(profiles) > max_profiles:
+                    profiles.popitem(last=False)
+            response.headers["X-Profile-Id"] = profile_id
+        return response
+
+    @api.teardown_app_request
+    def stop_inline_queries(_: Optional[BaseException]) -> None:
+        # Server threads are reused, so the next request goes to the pool again
+        if executor is not None:
+            executor.run_inline(False)
+
+    @api.get("/profiles/<profile_id>")
+    def profile(profile_id: str) -> Response:
+        with profiles_lock:
+            collapsed = profiles.get(profile_id)
+        if collapsed is None:
+            abort(404)
+        return Response(collapsed, mimetype="text/plain")
+
+    return api
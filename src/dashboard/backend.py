@@ -1,11 +1,25 @@
 """
 Dashboard backend class.
 """
+import dataclasses
+import io
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Union
+from threading import Lock
+from typing import Any, Iterator, Optional, Union
 
+import numpy as np
 import pandas as pd
 
+from converters import (
+    InvalidColorError,
+    decode_hex_colors,
+    hex_to_dec_primaries,
+    hex_to_dec_primaries_batch,
+)
 from metrics import (
     cie76,
     cie94,
@@ -15,20 +29,155 @@ from metrics import (
     rgb_euclidean,
     rgb_euclidean_gamma_correction,
 )
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, to_color_space
+
+from .cache import ResultCache, normalize_color
+from .conversion_table import ConversionTable
+from .instrumentation import StageTimings
+from .lookup_table import LookupTable, content_digest, load_lookup_tables
+from .palette_diff import PaletteDiff
+from .palettes import find_similar_rows
+from .shared import SharedArrays
+from .spatial_index import SPATIAL_INDEX_MIN_SIZE, SpatialIndex
+
+
+# Number of base colors scored at once by batch queries
+BATCH_CHUNK_SIZE = 1024
+
+# Modification time in nanoseconds and size of a file, (-1, -1) if it is missing
+FileSignature = tuple[int, int]
+
+
+def file_signature(path: Union[Path, str]) -> FileSignature:
+    """
+    Reads the modification time and size of a file, which change when it is edited.
+
+    Args:
+        path (Union[Path, str]): Path to the file.
+
+    Returns:
+        FileSignature: Modification time in nanoseconds and size in bytes.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return -1, -1
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass(frozen=True)
+class _Palettes:
+    """
+    Snapshot of palette sheets and everything derived from them.
+
+    Queries read the snapshot once and use it throughout, and a reload replaces it
+    with a single assignment, so a query never mixes two versions of a palette.
+    """
+
+    dmc_df: pd.DataFrame
+    ariadna_df: pd.DataFrame
+    dmc_coords: dict[str, np.ndarray]
+    ariadna_coords: dict[str, np.ndarray]
+    ariadna_chroma: np.ndarray
+    ariadna_index: Optional[SpatialIndex]
+    lookup_tables: dict[str, LookupTable]
+    conversion_table: ConversionTable
+    cache: ResultCache
+    digests: tuple[str, str]
+    signature: tuple[FileSignature, FileSignature]
+
+
+def _check_n(n: int) -> None:
+    """
+    Rejects negative numbers of similar colors, which would slice results from the end.
+
+    Args:
+        n (int): Expected number of similar colors.
+    """
+    if n < 0:
+        raise ValueError(f"Number of similar colors cannot be negative, got {n}.")
+
+
+def _chroma(lab: np.ndarray) -> np.ndarray:
+    """
+    Computes chroma of Lab colors.
+
+    Args:
+        lab (np.ndarray): Nx3 array of Lab coordinates.
+
+    Returns:
+        np.ndarray: Chroma of every color.
+    """
+    return np.sqrt(lab[:, 1] ** 2 + lab[:, 2] ** 2)
 
 
 class Backend:
     """
     Class storing all CSV files with mouline codes to RGB convertions.
 
+    Coordinates of every palette color are computed once, at construction, so that
+    queries only need to convert the base color. Queries never modify the instance,
+    so a single backend can be shared between threads.
+
+    Results of recent queries are kept in a bounded LRU cache. If a directory with
+    full-gamut lookup tables is given, metrics with an up-to-date table are answered
+    by a single table lookup. Large palettes are searched with a spatial index, or
+    with lower-bound pruning for CIEDE2000.
+
+    Substitutes of every DMC color are precomputed for all metrics at startup, and
+    persisted if a path is given, so DMC queries need no metric evaluation.
+
+    Durations of query stages are recorded in histograms labeled by the metric and n.
+
+    Edited palette CSVs are picked up by `reload`, which recomputes only what depends
+    on the changed rows and then swaps all palette data at once.
+
     Args:
         dmc_path (Union[Path, str],): Path to DMC convertion sheet in CSV.
         ariadna_path (Union[Path, str],): Path to Ariadna convertion sheet in CSV.
+        cache_size (int, optional): Maximum number of cached query results, 0 disables
+            the cache. Defaults to 1024.
+        lookup_dir (Optional[Union[Path, str]], optional): Directory with lookup tables
+            built by `dashboard.lookup_table`. Defaults to None.
+        conversion_path (Optional[Union[Path, str]], optional): Path of the persisted
+            DMC to Ariadna conversion table, rebuilt if out of date. Processes sharing
+            the path save a rebuilt table once. Defaults to None (built in memory
+            only).
+        timings (Optional[StageTimings], optional): Histograms recording durations of
+            query stages. Defaults to None (a new instance).
     """
 
-    def __init__(self, dmc_path: Union[Path, str], ariadna_path: Union[Path, str]):
-        self._dmc_df = pd.read_csv(dmc_path, index_col="number")
-        self._ariadna_df = pd.read_csv(ariadna_path, index_col="number")
+    def __init__(
+        self,
+        dmc_path: Union[Path, str],
+        ariadna_path: Union[Path, str],
+        cache_size: int = 1024,
+        lookup_dir: Optional[Union[Path, str]] = None,
+        conversion_path: Optional[Union[Path, str]] = None,
+        timings: Optional[StageTimings] = None,
+    ):
+        self._startup_times: dict[str, float] = {}
+        self._dmc_path, self._ariadna_path = Path(dmc_path), Path(ariadna_path)
+        self._lookup_dir = lookup_dir
+        self._conversion_path = conversion_path
+        self._reload_lock = Lock()
+
+        with self._startup_stage("read_csv"):
+            signature = self._palette_signature()
+            dmc_df, dmc_primaries, dmc_digest = self._read_sheet(dmc_path)
+            ariadna_df, ariadna_primaries, ariadna_digest = self._read_sheet(
+                ariadna_path
+            )
+        with self._startup_stage("coordinates"):
+            dmc_coords = palette_coordinates(dmc_primaries)
+            ariadna_coords = palette_coordinates(ariadna_primaries)
+            ariadna_chroma = _chroma(ariadna_coords["lab"])
+        with self._startup_stage("spatial_index"):
+            ariadna_index = (
+                SpatialIndex(ariadna_coords)
+                if len(ariadna_df) >= SPATIAL_INDEX_MIN_SIZE
+                else None
+            )
         self.METRICS = {
             "RGB euclidean": rgb_euclidean,
             "RGB with gamma correction": rgb_euclidean_gamma_correction,
@@ -39,20 +188,311 @@ class Backend:
             "CMC 2:1": cmc_2_1,
         }
         self.DEFAULT_METRIC = "CIEDE2000"
+        with self._startup_stage("lookup_tables"):
+            lookup_tables = (
+                load_lookup_tables(lookup_dir, ariadna_path, digest=ariadna_digest)
+                if lookup_dir
+                else {}
+            )
+        with self._startup_stage("conversion_table"):
+            digests = (dmc_digest, ariadna_digest)
+            conversion_table = (
+                ConversionTable.load_if_current(conversion_path, digests)
+                if conversion_path
+                else None
+            )
+            if conversion_table is None:
+                # Built from the sheets read above, not from the files again
+                conversion_table = ConversionTable.from_coordinates(
+                    dmc_coords, ariadna_coords, digests
+                )
+                if conversion_path:
+                    conversion_table.save_once(conversion_path)
+        self._palettes = _Palettes(
+            dmc_df=dmc_df,
+            ariadna_df=ariadna_df,
+            dmc_coords=dmc_coords,
+            ariadna_coords=ariadna_coords,
+            ariadna_chroma=ariadna_chroma,
+            ariadna_index=ariadna_index,
+            lookup_tables=lookup_tables,
+            conversion_table=conversion_table,
+            cache=ResultCache(cache_size),
+            digests=digests,
+            signature=signature,
+        )
+        self._timings = timings if timings is not None else StageTimings()
 
     @property
     def dmc_df(self) -> pd.DataFrame:
         """
         Returns DMC dataframe.
         """
-        return self._dmc_df.copy()
+        return self._palettes.dmc_df.copy()
 
     @property
     def ariadna_df(self) -> pd.DataFrame:
         """
         Returns Ariadna dataframe.
         """
-        return self._ariadna_df.copy()
+        return self._palettes.ariadna_df.copy()
+
+    @property
+    def dmc_coordinates(self) -> dict[str, np.ndarray]:
+        """
+        Returns read-only coordinates of DMC colors keyed by the color space.
+        """
+        return self._palettes.dmc_coords
+
+    @property
+    def ariadna_coordinates(self) -> dict[str, np.ndarray]:
+        """
+        Returns read-only coordinates of Ariadna colors keyed by the color space.
+        """
+        return self._palettes.ariadna_coords
+
+    @property
+    def cache_stats(self) -> dict[str, int]:
+        """
+        Returns hit, miss and eviction counters of the results cache.
+        """
+        return self._palettes.cache.stats
+
+    @property
+    def palette_paths(self) -> tuple[Path, Path]:
+        """
+        Returns paths of the DMC and Ariadna convertion sheets.
+        """
+        return self._dmc_path, self._ariadna_path
+
+    @property
+    def palette_signature(self) -> tuple[FileSignature, FileSignature]:
+        """
+        Returns modification times and sizes of the palette CSVs when they were read.
+        """
+        return self._palettes.signature
+
+    @property
+    def startup_times(self) -> dict[str, float]:
+        """
+        Returns durations of construction steps in seconds.
+        """
+        return dict(self._startup_times)
+
+    @property
+    def timings(self) -> StageTimings:
+        """
+        Returns histograms of durations of query stages.
+        """
+        return self._timings
+
+    @staticmethod
+    def _read_sheet(
+        path: Union[Path, str]
+    ) -> tuple[pd.DataFrame, np.ndarray, str]:
+        """
+        Reads a convertion sheet and decodes all its color codes at once.
+
+        Args:
+            path (Union[Path, str]): Path to the convertion sheet in CSV.
+
+        Returns:
+            tuple[pd.DataFrame, np.ndarray, str]: Sheet indexed by the number, Nx3
+                array of primaries of its colors and digest of the file contents.
+        """
+        data = Path(path).read_bytes()
+        df = pd.read_csv(io.BytesIO(data), index_col="number")
+        primaries, valid = decode_hex_colors(df["rgb"])
+        if not valid.all():
+            raise InvalidColorError(np.flatnonzero(~valid).tolist(), source=str(path))
+        return df, primaries, content_digest(data)
+
+    def _palette_signature(self) -> tuple[FileSignature, FileSignature]:
+        # Taken before reading, so an edit made meanwhile changes it afterwards
+        return file_signature(self._dmc_path), file_signature(self._ariadna_path)
+
+    @contextmanager
+    def _startup_stage(self, stage: str) -> Iterator[None]:
+        start_time = time.perf_counter()
+        yield
+        self._startup_times[stage] = time.perf_counter() - start_time
+
+    def share(self, arrays: Optional[SharedArrays] = None) -> SharedArrays:
+        """
+        Moves palette coordinates and the conversion table into shared memory.
+
+        Meant to be called in the gunicorn master process in preload mode, before
+        workers are forked, so that all workers map the same pages. Lookup tables are
+        memory-mapped already; the spatial index of large palettes keeps its own
+        copy of coordinates.
+
+        Args:
+            arrays (Optional[SharedArrays], optional): Storage of shared arrays.
+                Defaults to None (a new storage).
+
+        Returns:
+            SharedArrays: Storage of shared arrays, to be closed on shutdown.
+        """
+        arrays = arrays if arrays is not None else SharedArrays()
+        state = self._palettes
+        self._palettes = dataclasses.replace(
+            state,
+            dmc_coords=arrays.share_all("dmc", state.dmc_coords),
+            ariadna_coords=arrays.share_all("ariadna", state.ariadna_coords),
+            ariadna_chroma=arrays.share("ariadna-chroma", state.ariadna_chroma),
+            conversion_table=state.conversion_table.shared(arrays),
+        )
+        return arrays
+
+    def reload(self) -> Optional[dict[str, Any]]:
+        """
+        Picks up edits of the palette CSVs.
+
+        Sheets are diffed row by row against the loaded ones. Only coordinates of
+        added or changed colors are computed, only DMC colors whose substitutes can
+        be affected are rescored in the conversion table, and cached results are
+        dropped only if an edited color could enter them. The spatial index and
+        lookup tables of an edited Ariadna palette are rebuilt or reloaded whole.
+
+        Queries keep being answered from the old data until everything is ready, then
+        all palette data is replaced at once. If a sheet cannot be read or contains
+        an invalid color, the error is raised and the old data stays in use. Arrays
+        of a reloaded palette are private to the process, even after `share`.
+
+        Returns:
+            Optional[dict[str, Any]]: Added, changed and removed identifiers of both
+                sheets, the number of rescored DMC colors and dropped cache entries
+                and the duration in seconds, or None if the sheets did not change.
+        """
+        with self._reload_lock:
+            start_time = time.perf_counter()
+            old = self._palettes
+            signature = self._palette_signature()
+            dmc_df, dmc_primaries, dmc_digest = self._read_sheet(self._dmc_path)
+            ariadna_df, ariadna_primaries, ariadna_digest = self._read_sheet(
+                self._ariadna_path
+            )
+            if (dmc_digest, ariadna_digest) == old.digests:
+                self._palettes = dataclasses.replace(old, signature=signature)
+                return None
+
+            dmc_diff = PaletteDiff.between(old.dmc_df, dmc_df)
+            ariadna_diff = PaletteDiff.between(old.ariadna_df, ariadna_df)
+            dmc_coords = dmc_diff.update_coordinates(old.dmc_coords, dmc_primaries)
+            ariadna_coords = ariadna_diff.update_coordinates(
+                old.ariadna_coords, ariadna_primaries
+            )
+
+            if ariadna_digest == old.digests[1]:
+                ariadna_chroma = old.ariadna_chroma
+                ariadna_index = old.ariadna_index
+                lookup_tables = old.lookup_tables
+            else:
+                ariadna_chroma = _chroma(ariadna_coords["lab"])
+                ariadna_index = (
+                    SpatialIndex(ariadna_coords)
+                    if len(ariadna_df) >= SPATIAL_INDEX_MIN_SIZE
+                    else None
+                )
+                lookup_tables = (
+                    load_lookup_tables(
+                        self._lookup_dir, self._ariadna_path, digest=ariadna_digest
+                    )
+                    if self._lookup_dir
+                    else {}
+                )
+
+            conversion_table, conversion_rows = old.conversion_table.updated(
+                dmc_coords,
+                ariadna_coords,
+                dmc_diff,
+                ariadna_diff,
+                (dmc_digest, ariadna_digest),
+            )
+            if self._conversion_path:
+                # Written once when several processes reload the same edit
+                conversion_table.save_once(self._conversion_path)
+
+            cache = self._updated_cache(
+                old.cache, ariadna_df, ariadna_coords, old.ariadna_df, ariadna_diff
+            )
+
+            self._palettes = _Palettes(
+                dmc_df=dmc_df,
+                ariadna_df=ariadna_df,
+                dmc_coords=dmc_coords,
+                ariadna_coords=ariadna_coords,
+                ariadna_chroma=ariadna_chroma,
+                ariadna_index=ariadna_index,
+                lookup_tables=lookup_tables,
+                conversion_table=conversion_table,
+                cache=cache,
+                digests=(dmc_digest, ariadna_digest),
+                signature=signature,
+            )
+
+            return {
+                "dmc": dmc_diff.summary(old.dmc_df, dmc_df),
+                "ariadna": ariadna_diff.summary(old.ariadna_df, ariadna_df),
+                "conversion_rows": conversion_rows,
+                "cache_dropped": len(old.cache) - len(cache),
+                "seconds": time.perf_counter() - start_time,
+            }
+
+    @staticmethod
+    def _updated_cache(
+        cache: ResultCache,
+        ariadna_df: pd.DataFrame,
+        ariadna_coords: dict[str, np.ndarray],
+        old_ariadna_df: pd.DataFrame,
+        ariadna_diff: PaletteDiff,
+    ) -> ResultCache:
+        """
+        Keeps cached results which an edit of the Ariadna palette cannot change.
+
+        A result is kept if none of its colors was removed or changed and every
+        added or changed color scores more than its last color.
+
+        Args:
+            cache (ResultCache): Cache of results for the old palette.
+            ariadna_df (pd.DataFrame): New Ariadna sheet.
+            ariadna_coords (dict[str, np.ndarray]): Coordinates of the new palette.
+            old_ariadna_df (pd.DataFrame): Old Ariadna sheet.
+            ariadna_diff (PaletteDiff): Difference of the palette versions.
+
+        Returns:
+            ResultCache: Cache of results for the new palette.
+        """
+        if not ariadna_diff.keeps_order:
+            return cache.filtered(lambda *entry: False)
+        if not ariadna_diff.changed:
+            return cache.filtered(lambda *entry: True)
+
+        stale_codes = set(old_ariadna_df.index[ariadna_diff.stale])
+        checked: dict[str, list[tuple[str, int, int]]] = {}
+        for color, metric, n, (codes, _) in cache.entries():
+            if len(codes) >= n and stale_codes.isdisjoint(codes):
+                last_row = ariadna_df.index.get_loc(codes[-1])
+                checked.setdefault(metric, []).append((color, n, last_row))
+
+        kept = set()
+        fresh = ariadna_diff.fresh
+        for metric, entries in checked.items():
+            metric_f, space = METRIC_KERNELS[metric]
+            colors, ns, last_rows = zip(*entries)
+            bases = to_color_space(list(colors), space)
+            palette = ariadna_coords[space]
+            last_scores = metric_f(bases, palette[list(last_rows)])
+            fresh_scores = metric_f(bases[:, np.newaxis], palette[fresh])
+            entered = (fresh_scores <= last_scores[:, np.newaxis]).any(axis=1)
+            kept.update(
+                (color, metric, n)
+                for color, n, dropped in zip(colors, ns, entered)
+                if not dropped
+            )
+
+        # Entries put meanwhile are checked against their n, so they are dropped
+        return cache.filtered(lambda color, metric, n, _: (color, metric, n) in kept)
 
     def dmc_to_hex(self, dmc: str) -> str:
         """
@@ -64,7 +504,7 @@ class Backend:
         Returns:
             str: Hexadecimal color code preceded by '#'.
         """
-        return self._dmc_df.at[dmc, "rgb"]
+        return self._palettes.dmc_df.at[dmc, "rgb"]
 
     def find_similar(
         self, base_color: str, metric: str, n: int = 5
@@ -72,6 +512,10 @@ class Backend:
         """
         Finds colors similar to the given one using passed.
 
+        The color is normalized like cache keys (surrounding whitespace and case are
+        ignored) and validated before the cache is checked, so cached and computed
+        results accept the same codes. Malformed codes raise `InvalidColorError`.
+
         Args:
             base_color (str): Hex RGB code of the base color.
             metric (str): Metric to use.
@@ -81,14 +525,144 @@ class Backend:
             tuple[list[str], list[str]]: Lists of Ariadna identifiers and hexadecimal
                 codes of similar colors.
         """
-        metric_f = self.METRICS[metric]
+        _check_n(n)
+        with self._timings.timed("find_similar", metric, n):
+            return self._find_similar(self._palettes, base_color, metric, n)
+
+    def _find_similar(
+        self, state: _Palettes, base_color: str, metric: str, n: int
+    ) -> tuple[list[str], list[str]]:
+        base_color = normalize_color(base_color)
+        hex_to_dec_primaries(base_color)
+        if (cached := state.cache.get(base_color, metric, n)) is not None:
+            return cached
+
+        timed = self._timings.timed
+        table = state.lookup_tables.get(metric)
+        if table is not None and n <= table.k:
+            with timed("table_lookup", metric, n):
+                top_rows = table.lookup(base_color, n)
+        else:
+            space = METRIC_KERNELS[metric][1]
+            with timed("conversion", metric, n):
+                base = to_color_space([base_color], space)[0]
+            top_rows = find_similar_rows(
+                base,
+                metric,
+                n,
+                state.ariadna_coords,
+                state.ariadna_chroma,
+                state.ariadna_index,
+                timed,
+            )
+
+        top_ariadna_codes = state.ariadna_df.index[top_rows].to_list()
+        top_colors = state.ariadna_df["rgb"].iloc[top_rows].to_list()
+
+        state.cache.put(base_color, metric, n, (top_ariadna_codes, top_colors))
+
+        return top_ariadna_codes, top_colors
+
+    def find_similar_dmc(
+        self, dmc: str, metric: str, n: int = 5
+    ) -> tuple[list[str], list[str]]:
+        """
+        Finds colors similar to the given DMC color using the conversion table.
+
+        Args:
+            dmc (str): DMC mouline identifier.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[str], list[str]]: Lists of Ariadna identifiers and hexadecimal
+                codes of similar colors.
+        """
+        _check_n(n)
+        state = self._palettes
+        if n > state.conversion_table.k:
+            with self._timings.timed("find_similar", metric, n):
+                return self._find_similar(
+                    state, state.dmc_df.at[dmc, "rgb"], metric, n
+                )
 
-        self._ariadna_df["score"] = [
-            metric_f(base_color, c) for c in self._ariadna_df["rgb"]
-        ]
-        top_colors_rows = self._ariadna_df.nsmallest(n, "score")
+        with self._timings.timed("table_lookup", metric, n):
+            dmc_row = state.dmc_df.index.get_loc(dmc)
+            top_rows = state.conversion_table.lookup(dmc_row, metric, n)
 
-        top_ariadna_codes = top_colors_rows.index.to_list()
-        top_colors = top_colors_rows["rgb"].to_list()
+        top_ariadna_codes = state.ariadna_df.index[top_rows].to_list()
+        top_colors = state.ariadna_df["rgb"].iloc[top_rows].to_list()
 
         return top_ariadna_codes, top_colors
+
+    def find_similar_batch(
+        self, base_colors: list[str], metric: str, n: int = 5
+    ) -> tuple[list[list[str]], list[list[str]]]:
+        """
+        Finds colors similar to every given color in a vectorized pass.
+
+        All base colors are decoded at once and scored against the whole palette in
+        chunks, bypassing the results cache.
+
+        Args:
+            base_colors (list[str]): Hex RGB codes of the base colors.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[list[str]], list[list[str]]]: Lists of Ariadna identifiers and
+                hexadecimal codes of similar colors, one per base color.
+        """
+        _check_n(n)
+        state = self._palettes
+        metric_f, space = METRIC_KERNELS[metric]
+        palette = state.ariadna_coords[space]
+
+        primaries = hex_to_dec_primaries_batch(base_colors)
+
+        top_rows = np.empty((len(primaries), min(n, len(palette))), dtype=np.intp)
+        for start in range(0, len(primaries), BATCH_CHUNK_SIZE):
+            chunk = primaries[start : start + BATCH_CHUNK_SIZE]
+            scores = metric_f(to_color_space(chunk, space)[:, np.newaxis], palette)
+            top_rows[start : start + len(chunk)] = np.argsort(
+                scores, axis=1, kind="stable"
+            )[:, :n]
+
+        return self._rows_to_results(state, top_rows)
+
+    def find_similar_dmc_batch(
+        self, dmcs: list[str], metric: str, n: int = 5
+    ) -> tuple[list[list[str]], list[list[str]]]:
+        """
+        Finds colors similar to every given DMC color using the conversion table.
+
+        Args:
+            dmcs (list[str]): DMC mouline identifiers.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[list[str]], list[list[str]]]: Lists of Ariadna identifiers and
+                hexadecimal codes of similar colors, one per DMC color.
+        """
+        _check_n(n)
+        state = self._palettes
+        dmc_rows = state.dmc_df.index.get_indexer(dmcs)
+        if (dmc_rows < 0).any():
+            raise KeyError([dmc for dmc, row in zip(dmcs, dmc_rows) if row < 0])
+
+        if n > state.conversion_table.k:
+            base_colors = state.dmc_df["rgb"].iloc[dmc_rows].to_list()
+            return self.find_similar_batch(base_colors, metric, n)
+
+        return self._rows_to_results(
+            state, state.conversion_table.lookup(dmc_rows, metric, n)
+        )
+
+    @staticmethod
+    def _rows_to_results(
+        state: _Palettes, top_rows: np.ndarray
+    ) -> tuple[list[list[str]], list[list[str]]]:
+        codes = state.ariadna_df.index.to_numpy()[top_rows].tolist()
+        colors = state.ariadna_df["rgb"].to_numpy()[top_rows].tolist()
+        return codes, colors
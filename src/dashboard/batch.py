@@ -0,0 +1,351 @@
+"""
+Offline conversion of many colors or DMC codes into Ariadna substitutes.
+
+Input is streamed in chunks, one hexadecimal color or DMC number per line, so memory
+use does not depend on the input size. Chunks are scored by a pool of worker processes
+which receive the palette coordinates once, at startup, and results are written as
+soon as the chunks preceding them are done.
+
+Colors can be converted from the command line with:
+    python -m dashboard.batch data/dmc.csv data/ariadna.csv colors.txt -o out.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TextIO, Union
+
+import numpy as np
+
+from converters import InvalidColorError, decode_hex_colors
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, to_color_space
+
+
+OUTPUT_FORMATS = ("csv", "jsonl")
+
+# Writes a single result: input entry, its color, codes and colors of substitutes
+Writer = Callable[
+    [str, Optional[str], Optional[np.ndarray], Optional[np.ndarray]], None
+]
+
+# Palette coordinates in the metric's color space, set in every worker at startup
+_worker_palette: Optional[np.ndarray] = None
+
+
+def _init_worker(palette: np.ndarray) -> None:
+    """
+    Stores palette coordinates used by the worker.
+
+    Args:
+        palette (np.ndarray): Palette coordinates in the metric's color space.
+    """
+    global _worker_palette
+    _worker_palette = palette
+
+
+def _score_chunk(primaries: np.ndarray, metric: str, n: int) -> np.ndarray:
+    """
+    Finds palette rows of the colors most similar to a chunk of colors.
+
+    Args:
+        primaries (np.ndarray): Nx3 array of primaries of the chunk (0-255).
+        metric (str): Metric name.
+        n (int): Expected number of similar colors.
+
+    Returns:
+        np.ndarray[int]: Nxn array of palette rows sorted from the most similar.
+    """
+    metric_f, space = METRIC_KERNELS[metric]
+    scores = metric_f(to_color_space(primaries, space)[:, np.newaxis], _worker_palette)
+    return np.argsort(scores, axis=1, kind="stable")[:, :n]
+
+
+class _CompletedFuture(Future):
+    """
+    Future of a result computed in the calling process.
+    """
+
+    def __init__(self, result: np.ndarray):
+        super().__init__()
+        self.set_result(result)
+
+
+class BatchConverter:
+    """
+    Class converting streams of colors or DMC codes into Ariadna substitutes.
+
+    Args:
+        dmc_path (Union[Path, str],): Path to DMC convertion sheet in CSV.
+        ariadna_path (Union[Path, str],): Path to Ariadna convertion sheet in CSV.
+    """
+
+    def __init__(self, dmc_path: Union[Path, str], ariadna_path: Union[Path, str]):
+        # Sheets are read with the csv module, so the tool starts without pandas
+        with open(dmc_path, newline="") as file:
+            self._dmc_colors = {
+                row["number"]: row["rgb"] for row in csv.DictReader(file)
+            }
+        # Numbers like 'Ecru' are matched in any case, exact matches take precedence
+        self._dmc_colors_folded = {
+            number.casefold(): color for number, color in self._dmc_colors.items()
+        }
+        with open(ariadna_path, newline="") as file:
+            rows = list(csv.DictReader(file))
+        self._ariadna_codes = np.array([row["number"] for row in rows])
+        self._ariadna_colors = np.array([row["rgb"] for row in rows])
+
+        for path, colors in (
+            (dmc_path, list(self._dmc_colors.values())),
+            (ariadna_path, self._ariadna_colors),
+        ):
+            _, valid = decode_hex_colors(colors)
+            if not valid.all():
+                rows = np.flatnonzero(~valid).tolist()
+                raise InvalidColorError(rows, source=str(path))
+        self._ariadna_coords = palette_coordinates(self._ariadna_colors)
+
+    def parse(self, entry: str) -> Optional[str]:
+        """
+        Converts an input entry into a hexadecimal color code.
+
+        DMC numbers are matched in any case and take precedence over six digit
+        hexadecimal codes without '#'.
+
+        Args:
+            entry (str): DMC number or hexadecimal color code.
+
+        Returns:
+            Optional[str]: Hexadecimal color code preceded by '#', None if the entry
+                is neither a known DMC number nor a color.
+        """
+        return self.parse_batch([entry])[0][0]
+
+    def parse_batch(self, entries: list[str]) -> tuple[list[Optional[str]], np.ndarray]:
+        """
+        Converts input entries into hexadecimal color codes and their primaries.
+
+        DMC numbers are resolved first, then all codes are decoded and validated at
+        once by `decode_hex_colors`.
+
+        Args:
+            entries (list[str]): DMC numbers or hexadecimal color codes.
+
+        Returns:
+            tuple[list[Optional[str]], np.ndarray]: Hexadecimal color codes preceded
+                by '#', None for entries which are neither a known DMC number nor a
+                color, and Nx3 array of primaries of the valid entries.
+        """
+        resolved = []
+        for entry in entries:
+            color = None
+            if not entry.startswith("#"):
+                color = self._dmc_colors.get(entry)
+                if color is None:
+                    color = self._dmc_colors_folded.get(entry.casefold())
+            resolved.append(entry if color is None else color)
+
+        primaries, valid = decode_hex_colors(resolved)
+        colors = [
+            "#" + color.lstrip("#").lower() if is_color else None
+            for color, is_color in zip(resolved, valid.tolist())
+        ]
+        return colors, primaries[valid]
+
+    def convert(
+        self,
+        entries: Iterable[str],
+        output: TextIO,
+        metric: str,
+        n: int = 5,
+        output_format: str = "csv",
+        chunk_size: int = 1024,
+        workers: Optional[int] = None,
+    ) -> int:
+        """
+        Writes Ariadna substitutes of every entry, in the order of the input.
+
+        At most two chunks per worker are in flight, so memory use is bounded by the
+        chunk size. Invalid entries are written with an error message instead of
+        substitutes.
+
+        Args:
+            entries (Iterable[str]): DMC numbers or hexadecimal color codes, blank
+                entries are skipped.
+            output (TextIO): Stream the results are written to.
+            metric (str): Metric name.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+            output_format (str, optional): One of `OUTPUT_FORMATS`. Defaults to "csv".
+            chunk_size (int, optional): Number of entries scored at once. Defaults to
+                1024.
+            workers (Optional[int], optional): Number of worker processes, 0 scores
+                in the calling process. Defaults to None (all cores).
+
+        Returns:
+            int: Number of written entries.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+
+        n = min(n, len(self._ariadna_codes))
+        palette = self._ariadna_coords[METRIC_KERNELS[metric][1]]
+        write = (
+            self._csv_writer(output, n)
+            if output_format == "csv"
+            else self._jsonl_writer(output)
+        )
+
+        executor = None
+        if workers != 0:
+            workers = workers or os.cpu_count() or 1
+            executor = ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(palette,)
+            )
+        else:
+            _init_worker(palette)
+        in_flight = 2 * workers if executor else 1
+
+        count = 0
+        pending: deque[tuple[list[str], list[Optional[str]], Future]] = deque()
+        try:
+            for chunk in self._chunks(entries, chunk_size):
+                colors, primaries = self.parse_batch(chunk)
+                future = (
+                    executor.submit(_score_chunk, primaries, metric, n)
+                    if executor
+                    else _CompletedFuture(_score_chunk(primaries, metric, n))
+                )
+                pending.append((chunk, colors, future))
+
+                while len(pending) >= in_flight:
+                    count += self._write_chunk(write, *pending.popleft())
+
+            while pending:
+                count += self._write_chunk(write, *pending.popleft())
+        finally:
+            if executor:
+                executor.shutdown(cancel_futures=True)
+
+        return count
+
+    @staticmethod
+    def _chunks(entries: Iterable[str], chunk_size: int) -> Iterator[list[str]]:
+        entries = (entry.strip() for entry in entries)
+        entries = (entry for entry in entries if entry)
+        while chunk := list(itertools.islice(entries, chunk_size)):
+            yield chunk
+
+    def _write_chunk(
+        self,
+        write: Writer,
+        chunk: list[str],
+        colors: list[Optional[str]],
+        future: Future,
+    ) -> int:
+        top_rows = iter(future.result())
+        for entry, color in zip(chunk, colors):
+            if color is None:
+                write(entry, None, None, None)
+            else:
+                rows = next(top_rows)
+                write(
+                    entry, color, self._ariadna_codes[rows], self._ariadna_colors[rows]
+                )
+        return len(chunk)
+
+    @staticmethod
+    def _csv_writer(output: TextIO, n: int) -> Writer:
+        writer = csv.writer(output)
+        writer.writerow(["input", "rgb", *range(1, n + 1), "error"])
+
+        def write(
+            entry: str,
+            color: Optional[str],
+            codes: Optional[np.ndarray],
+            colors: Optional[np.ndarray],
+        ) -> None:
+            if color is None:
+                writer.writerow([entry, "", *[""] * n, "unknown color"])
+            else:
+                writer.writerow([entry, color, *codes, ""])
+
+        return write
+
+    @staticmethod
+    def _jsonl_writer(output: TextIO) -> Writer:
+        def write(
+            entry: str,
+            color: Optional[str],
+            codes: Optional[np.ndarray],
+            colors: Optional[np.ndarray],
+        ) -> None:
+            if color is None:
+                record = {"input": entry, "error": "unknown color"}
+            else:
+                record = {
+                    "input": entry,
+                    "rgb": color,
+                    "numbers": codes.tolist(),
+                    "colors": colors.tolist(),
+                }
+            output.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+        return write
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Converts colors from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dmc", help="path to the DMC CSV")
+    parser.add_argument("ariadna", help="path to the Ariadna CSV")
+    parser.add_argument(
+        "input", nargs="?", default="-", help="file with one entry per line (- stdin)"
+    )
+    parser.add_argument("-o", "--output", default="-", help="output file (- stdout)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default=None)
+    parser.add_argument("--metric", choices=list(METRIC_KERNELS), default="CIEDE2000")
+    parser.add_argument("-n", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=1024)
+    parser.add_argument("--workers", type=int, default=None)
+    parsed = parser.parse_args(args)
+
+    output_format = parsed.format or (
+        "jsonl" if parsed.output.endswith(".jsonl") else "csv"
+    )
+    converter = BatchConverter(parsed.dmc, parsed.ariadna)
+
+    with ExitStack() as stack:
+        input_file = (
+            sys.stdin
+            if parsed.input == "-"
+            else stack.enter_context(open(parsed.input))
+        )
+        output_file = (
+            sys.stdout
+            if parsed.output == "-"
+            else stack.enter_context(open(parsed.output, "w", newline=""))
+        )
+        converter.convert(
+            input_file,
+            output_file,
+            parsed.metric,
+            n=parsed.n,
+            output_format=output_format,
+            chunk_size=parsed.chunk_size,
+            workers=parsed.workers,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Cache of similarity query results.
+"""
+from collections import OrderedDict
+from threading import Lock
+from typing import Callable, Optional
+
+
+Result = tuple[list, list[str]]
+
+
+def normalize_color(color: str) -> str:
+    """
+    Brings a hexadecimal color code to the lowercase '#rrggbb' form.
+
+    Args:
+        color (str): Color code string (hex), can include '#' prefix.
+
+    Returns:
+        str: Normalized color code.
+    """
+    return "#" + color.strip().lstrip("#").lower()
+
+
+class ResultCache:
+    """
+    Thread-safe, bounded cache of similarity results with LRU eviction.
+
+    Entries are keyed on the normalized color and the metric. Each entry keeps the
+    result for the largest n requested so far. Results for a smaller n are prefixes of
+    it, so one entry answers every n up to that size.
+
+    Args:
+        max_size (int, optional): Maximum number of entries, 0 disables caching.
+            Defaults to 1024.
+    """
+
+    def __init__(self, max_size: int = 1024):
+        if max_size < 0:
+            raise ValueError("Cache size cannot be negative.")
+
+        self._max_size = max_size
+        self._entries: OrderedDict[tuple[str, str], tuple[int, Result]] = OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        """
+        Returns the number of cached entries.
+        """
+        return len(self._entries)
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        Returns hit, miss and eviction counters together with the cache size.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "size": len(self._entries),
+                "max_size": self._max_size,
+            }
+
+    def get(self, color: str, metric: str, n: int) -> Optional[Result]:
+        """
+        Looks up the result of a query.
+
+        Args:
+            color (str): Hex RGB code of the base color.
+            metric (str): Metric name.
+            n (int): Expected number of similar colors.
+
+        Returns:
+            Optional[Result]: Lists of identifiers and hexadecimal codes of similar
+                colors, or None if the query is not cached.
+        """
+        key = (normalize_color(color), metric)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < n:
+                self._misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._hits += 1
+
+        _, (codes, colors) = entry
+        return codes[:n], colors[:n]
+
+    def put(self, color: str, metric: str, n: int, result: Result) -> None:
+        """
+        Stores the result of a query, evicting the least recently used entries.
+
+        Args:
+            color (str): Hex RGB code of the base color.
+            metric (str): Metric name.
+            n (int): Number of similar colors requested.
+            result (Result): Lists of identifiers and hexadecimal codes of similar
+                colors.
+        """
+        if not self._max_size:
+            return
+
+        key = (normalize_color(color), metric)
+        codes, colors = result
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < n:
+                self._entries[key] = (n, (list(codes), list(colors)))
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def entries(self) -> list[tuple[str, str, int, Result]]:
+        """
+        Lists cached entries from the least recently used.
+
+        Returns:
+            list[tuple[str, str, int, Result]]: Normalized color, metric, cached n and
+                result of every entry.
+        """
+        with self._lock:
+            return [
+                (color, metric, n, result)
+                for (color, metric), (n, result) in self._entries.items()
+            ]
+
+    def filtered(self, keep: Callable[[str, str, int, Result], bool]) -> "ResultCache":
+        """
+        Creates a cache with the entries passing a filter, in the same LRU order.
+
+        The counters are carried over and the dropped entries are counted as
+        evictions. The cache itself is not modified, so it can keep serving queries
+        until it is replaced.
+
+        Args:
+            keep (Callable[[str, str, int, Result], bool]): Called with the normalized
+                color, the metric, the cached n and the result of every entry.
+
+        Returns:
+            ResultCache: Cache with the kept entries.
+        """
+        cache = ResultCache(self._max_size)
+
+        with self._lock:
+            entries = list(self._entries.items())
+            cache._hits, cache._misses = self._hits, self._misses
+            cache._evictions = self._evictions
+
+        for (color, metric), (n, result) in entries:
+            if keep(color, metric, n, result):
+                cache._entries[color, metric] = (n, result)
+            else:
+                cache._evictions += 1
+
+        return cache
+
+    def clear(self) -> None:
+        """
+        Removes all entries, counters are kept.
+        """
+        with self._lock:
+            self._entries.clear()
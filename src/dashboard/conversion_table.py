@@ -0,0 +1,458 @@
+"""
+Precomputed DMC to Ariadna conversion table for every metric.
+
+The table keeps, for every DMC color and metric, uint16 row indexes of the k most
+similar Ariadna colors. It is stored in a compressed .npz file together with digests
+of both palette CSVs, so editing a CSV triggers a rebuild. A table in memory can also
+be updated after an edit, rescoring only the DMC colors the edit can affect.
+
+The table can be exported as a CSV conversion chart with:
+    python -m dashboard.conversion_table data/dmc.csv data/ariadna.csv chart.csv
+"""
+import argparse
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from metrics.scoring import METRIC_KERNELS, palette_coordinates
+
+from .lookup_table import DEFAULT_K, palette_digest
+from .palette_diff import PaletteDiff
+from .shared import SharedArrays
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+# Number of source colors scored at once, bounding the memory of large palettes
+_CHUNK_SIZE = 1024
+
+
+class ConversionTable:
+    """
+    Top-k Ariadna substitutes of every DMC color for every metric.
+
+    Args:
+        table (np.ndarray): (metrics, DMC colors, k) array of Ariadna row indexes.
+        metrics (list[str]): Metric names in the order of the first table axis.
+        digests (tuple[str, str]): Digests of the DMC and Ariadna CSVs the table was
+            built from.
+        target_size (Optional[int], optional): Number of Ariadna colors the table was
+            built from, which bounds k. Defaults to None (unknown, for tables saved
+            without it).
+    """
+
+    def __init__(
+        self,
+        table: np.ndarray,
+        metrics: list[str],
+        digests: tuple[str, str],
+        target_size: Optional[int] = None,
+    ):
+        self._table = table
+        self._table.setflags(write=False)
+        self._metrics = {metric: i for i, metric in enumerate(metrics)}
+        self._digests = digests
+        self._target_size = target_size
+
+    @property
+    def k(self) -> int:
+        """
+        Returns the number of similar colors stored per DMC color.
+        """
+        return self._table.shape[2]
+
+    @property
+    def target_size(self) -> Optional[int]:
+        """
+        Returns the number of Ariadna colors the table was built from, if known.
+        """
+        return self._target_size
+
+    @property
+    def metrics(self) -> list[str]:
+        """
+        Returns names of metrics stored in the table.
+        """
+        return list(self._metrics)
+
+    @property
+    def digests(self) -> tuple[str, str]:
+        """
+        Returns digests of the DMC and Ariadna CSVs the table was built from.
+        """
+        return self._digests
+
+    @classmethod
+    def build(
+        cls,
+        dmc_path: Union[Path, str],
+        ariadna_path: Union[Path, str],
+        k: int = DEFAULT_K,
+    ) -> "ConversionTable":
+        """
+        Scores all DMC and Ariadna pairs with every metric in a vectorized pass.
+
+        Args:
+            dmc_path (Union[Path, str]): Path to DMC convertion sheet in CSV.
+            ariadna_path (Union[Path, str]): Path to Ariadna convertion sheet in CSV.
+            k (int, optional): Number of the most similar colors stored per DMC color.
+                Defaults to 9.
+
+        Returns:
+            ConversionTable: Built table.
+        """
+        return cls.from_coordinates(
+            palette_coordinates(pd.read_csv(dmc_path)["rgb"]),
+            palette_coordinates(pd.read_csv(ariadna_path)["rgb"]),
+            (palette_digest(dmc_path), palette_digest(ariadna_path)),
+            k,
+        )
+
+    @classmethod
+    def from_coordinates(
+        cls,
+        source: dict[str, np.ndarray],
+        target: dict[str, np.ndarray],
+        digests: tuple[str, str],
+        k: int = DEFAULT_K,
+    ) -> "ConversionTable":
+        """
+        Scores all pairs of colors of two palettes with every metric, in chunks.
+
+        Args:
+            source (dict[str, np.ndarray]): Coordinates of the converted palette (DMC),
+                as built by `palette_coordinates`.
+            target (dict[str, np.ndarray]): Coordinates of the palette of substitutes
+                (Ariadna).
+            digests (tuple[str, str]): Digests of the source and target palettes.
+            k (int, optional): Number of the most similar colors stored per source
+                color. Defaults to 9.
+
+        Returns:
+            ConversionTable: Built table.
+        """
+        k = min(k, len(target["rgb"]))
+        table = _top_k(source, target, np.arange(len(source["rgb"])), k)
+
+        return cls(table, list(METRIC_KERNELS), digests, len(target["rgb"]))
+
+    def updated(
+        self,
+        source: dict[str, np.ndarray],
+        target: dict[str, np.ndarray],
+        source_diff: PaletteDiff,
+        target_diff: PaletteDiff,
+        digests: tuple[str, str],
+    ) -> tuple["ConversionTable", int]:
+        """
+        Creates a table for edited palettes, rescoring only the affected rows.
+
+        Rows of fresh source colors are scored anew. A kept source color is rescored
+        only if a stale target color was among its k most similar, or if a fresh target
+        color scores at most as much as its k-th substitute with any metric. Results
+        are identical to building the table from scratch.
+
+        Args:
+            source (dict[str, np.ndarray]): Coordinates of the new source palette.
+            target (dict[str, np.ndarray]): Coordinates of the new target palette.
+            source_diff (PaletteDiff): Difference of the source palette versions.
+            target_diff (PaletteDiff): Difference of the target palette versions.
+            digests (tuple[str, str]): Digests of the new source and target palettes.
+
+        Returns:
+            tuple[ConversionTable, int]: Updated table and the number of rescored
+                source colors.
+        """
+        if (
+            self.metrics != list(METRIC_KERNELS)
+            or len(target["rgb"]) < self.k
+            or not target_diff.keeps_order
+        ):
+            table = ConversionTable.from_coordinates(source, target, digests, self.k)
+            return table, len(source["rgb"])
+
+        kept = source_diff.kept
+        substitutes = target_diff.old_to_new[self._table[:, source_diff.old_rows[kept]]]
+        affected = (substitutes < 0).any(axis=(0, 2))
+
+        fresh_targets = target_diff.fresh
+        for i, (metric_f, space) in enumerate(METRIC_KERNELS.values()):
+            if not len(fresh_targets):
+                break
+            for start in range(0, len(kept), _CHUNK_SIZE):
+                rows = slice(start, start + _CHUNK_SIZE)
+                base = source[space][kept[rows]]
+                last = substitutes[i, rows, -1]
+                kth_scores = metric_f(base, target[space][np.maximum(last, 0)])
+                fresh_scores = metric_f(
+                    base[:, np.newaxis], target[space][fresh_targets]
+                )
+                affected[rows] |= (fresh_scores <= kth_scores[:, np.newaxis]).any(1)
+
+        table = np.empty((len(METRIC_KERNELS), len(source["rgb"]), self.k), np.uint16)
+        table[:, kept] = substitutes
+        rescored = np.sort(np.concatenate((source_diff.fresh, kept[affected])))
+        table[:, rescored] = _top_k(source, target, rescored, self.k)
+
+        table = ConversionTable(table, self.metrics, digests, len(target["rgb"]))
+        return table, len(rescored)
+
+    @classmethod
+    def load(cls, path: Union[Path, str]) -> "ConversionTable":
+        """
+        Loads a table saved with `save`.
+
+        Args:
+            path (Union[Path, str]): Path of the .npz file.
+
+        Returns:
+            ConversionTable: Loaded table.
+        """
+        with np.load(path) as data:
+            return cls(
+                data["table"],
+                data["metrics"].tolist(),
+                tuple(data["digests"].tolist()),
+                int(data["target_size"]) if "target_size" in data else None,
+            )
+
+    @classmethod
+    def load_or_build(
+        cls,
+        path: Union[Path, str],
+        dmc_path: Union[Path, str],
+        ariadna_path: Union[Path, str],
+        k: int = DEFAULT_K,
+    ) -> "ConversionTable":
+        """
+        Loads the table if it matches the CSVs, otherwise builds and saves it.
+
+        Args:
+            path (Union[Path, str]): Path of the .npz file.
+            dmc_path (Union[Path, str]): Path to DMC convertion sheet in CSV.
+            ariadna_path (Union[Path, str]): Path to Ariadna convertion sheet in CSV.
+            k (int, optional): Number of the most similar colors stored per DMC color.
+                Defaults to 9.
+
+        Returns:
+            ConversionTable: Up-to-date table.
+        """
+        digests = (palette_digest(dmc_path), palette_digest(ariadna_path))
+
+        table = cls.load_if_current(path, digests, k)
+        if table is None:
+            table = cls.build(dmc_path, ariadna_path, k)
+            table.save(path)
+        return table
+
+    @classmethod
+    def load_if_current(
+        cls, path: Union[Path, str], digests: tuple[str, str], k: int = DEFAULT_K
+    ) -> Optional["ConversionTable"]:
+        """
+        Loads the table if it was built for palettes with the given digests.
+
+        Tables of palettes with fewer than k Ariadna colors store all of them, so they
+        are current with a smaller k. Tables saved without their Ariadna palette size
+        need the full k.
+
+        Args:
+            path (Union[Path, str]): Path of the .npz file.
+            digests (tuple[str, str]): Digests of the DMC and Ariadna palettes.
+            k (int, optional): Minimum number of the most similar colors stored per
+                DMC color. Defaults to 9.
+
+        Returns:
+            Optional[ConversionTable]: Loaded table, or None if it is missing or out
+                of date.
+        """
+        if not Path(path).exists():
+            return None
+
+        table = cls.load(path)
+        if table.target_size is not None:
+            k = min(k, table.target_size)
+        if (
+            table.digests == digests
+            and set(table.metrics) == set(METRIC_KERNELS)
+            and table.k >= k
+        ):
+            return table
+        return None
+
+    def save_once(self, path: Union[Path, str]) -> bool:
+        """
+        Saves the table unless the file already holds an up-to-date one.
+
+        Processes sharing the file, like server workers reloading the same edit, check
+        and save it holding an exclusive lock of '<path>.lock', so the table is written
+        by the first of them only. The lock needs `fcntl`, without it (on Windows)
+        processes can still write the same table concurrently.
+
+        Args:
+            path (Union[Path, str]): Path of the .npz file.
+
+        Returns:
+            bool: True if the table was written.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(f"{path.name}.lock"), "ab") as lock:
+            if fcntl is not None:
+                # Released when the file is closed
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if self.load_if_current(path, self._digests, self.k) is not None:
+                return False
+            self.save(path)
+            return True
+
+    def save(self, path: Union[Path, str]) -> None:
+        """
+        Saves the table to a compressed .npz file.
+
+        Written to a temporary file first, so processes loading the table never read
+        a partially written one.
+
+        Args:
+            path (Union[Path, str]): Path of the .npz file.
+        """
+        arrays = {
+            "table": self._table,
+            "metrics": np.array(self.metrics),
+            "digests": np.array(self._digests),
+        }
+        if self._target_size is not None:
+            arrays["target_size"] = np.array(self._target_size)
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as file:
+                np.savez_compressed(file, **arrays)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+    def shared(self, arrays: SharedArrays) -> "ConversionTable":
+        """
+        Returns a copy of the table stored in a memory-mapped file.
+
+        Args:
+            arrays (SharedArrays): Storage of shared arrays.
+
+        Returns:
+            ConversionTable: Table backed by shared memory.
+        """
+        return ConversionTable(
+            arrays.share("conversion-table", self._table),
+            self.metrics,
+            self._digests,
+            self._target_size,
+        )
+
+    def lookup(
+        self, dmc_row: Union[int, np.ndarray], metric: str, n: int
+    ) -> np.ndarray:
+        """
+        Returns Ariadna row indexes of the colors most similar to DMC colors.
+
+        Args:
+            dmc_row (Union[int, np.ndarray]): Row index of the DMC color, or an array
+                of row indexes.
+            metric (str): Metric name.
+            n (int): Expected number of similar colors, at most k.
+
+        Returns:
+            np.ndarray[int]: Ariadna row indexes sorted from the most similar, with a
+                row per DMC color if an array was given.
+        """
+        return self._table[self._metrics[metric], dmc_row, :n].astype(np.intp)
+
+    def to_chart(self, dmc_df: pd.DataFrame, ariadna_df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Creates a conversion chart with Ariadna codes of the substitutes.
+
+        Args:
+            dmc_df (pd.DataFrame): DMC dataframe the table was built from.
+            ariadna_df (pd.DataFrame): Ariadna dataframe the table was built from.
+
+        Returns:
+            pd.DataFrame: Chart with a row per DMC code and metric, and a column per
+                rank of the substitute.
+        """
+        codes = ariadna_df.index.to_numpy()
+        charts = []
+        for metric, i in self._metrics.items():
+            chart = pd.DataFrame(codes[self._table[i]], columns=range(1, self.k + 1))
+            chart.insert(0, "metric", metric)
+            chart.insert(0, "rgb", dmc_df["rgb"].to_numpy())
+            chart.insert(0, "dmc", dmc_df.index.to_numpy())
+            charts.append(chart)
+
+        return pd.concat(charts, ignore_index=True)
+
+
+def _top_k(
+    source: dict[str, np.ndarray],
+    target: dict[str, np.ndarray],
+    rows: np.ndarray,
+    k: int,
+) -> np.ndarray:
+    """
+    Scores the given source colors against all target colors with every metric.
+
+    Args:
+        source (dict[str, np.ndarray]): Coordinates of the source palette.
+        target (dict[str, np.ndarray]): Coordinates of the target palette.
+        rows (np.ndarray): Scored source rows.
+        k (int): Number of the most similar colors stored per source color.
+
+    Returns:
+        np.ndarray[np.uint16]: (metrics, rows, k) array of target row indexes.
+    """
+    table = np.empty((len(METRIC_KERNELS), len(rows), k), dtype=np.uint16)
+    for i, (metric_f, space) in enumerate(METRIC_KERNELS.values()):
+        for start in range(0, len(rows), _CHUNK_SIZE):
+            chunk = source[space][rows[start : start + _CHUNK_SIZE]]
+            scores = metric_f(chunk[:, np.newaxis], target[space])
+            table[i, start : start + len(chunk)] = np.argsort(
+                scores, axis=1, kind="stable"
+            )[:, :k]
+
+    return table
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Exports the conversion chart from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dmc", help="path to the DMC CSV")
+    parser.add_argument("ariadna", help="path to the Ariadna CSV")
+    parser.add_argument("output", help="path of the exported CSV chart")
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parsed = parser.parse_args(args)
+
+    table = ConversionTable.build(parsed.dmc, parsed.ariadna, k=parsed.k)
+    chart = table.to_chart(
+        pd.read_csv(parsed.dmc, index_col="number"),
+        pd.read_csv(parsed.ariadna, index_col="number"),
+    )
+    chart.to_csv(parsed.output, index=False)
+
+
+if __name__ == "__main__":
+    main()
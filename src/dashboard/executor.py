@@ -0,0 +1,269 @@
+"""
+Bounded pool of threads answering similarity queries off the request threads.
+
+Concurrent identical queries (the same color or DMC code, metric and n) are coalesced:
+only the first one is scored and all of them receive its result. The number of
+queries waiting for a free thread is limited, further queries are rejected with
+`QueueFullError`, which the server answers with '503 Service Unavailable' so that
+clients back off instead of piling up.
+
+Time spent in the queue is recorded as the 'queue_wait' stage of the backend timings.
+Counts of executed, coalesced and rejected queries, the coalescing ratio and the queue
+depth are exposed in the Prometheus text format.
+
+Threads are started on the first query, so a pool created in a preloading server's
+master process only runs threads in the forked workers.
+
+A thread can ask for its queries to run inline, in that thread. Profiled requests do
+so, so that sampling the request thread captures the scoring instead of the wait for
+a pool thread.
+"""
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Optional, Union
+
+from .backend import Backend
+from .cache import Result, normalize_color
+
+
+OUTCOMES = ("executed", "coalesced", "rejected")
+
+
+class QueueFullError(Exception):
+    """
+    Error raised when too many queries wait for a free thread.
+    """
+
+
+class QueryExecutor:
+    """
+    Class scoring similarity queries in a bounded pool of threads.
+
+    Args:
+        backend (Backend): Backend answering queries.
+        workers (int, optional): Number of threads. Defaults to 4.
+        max_queue (int, optional): Maximum number of queries waiting for a free
+            thread. Defaults to 64.
+    """
+
+    def __init__(self, backend: Backend, workers: int = 4, max_queue: int = 64):
+        if workers < 1 or max_queue < 0:
+            raise ValueError("Expected at least one worker and a non-negative queue.")
+
+        self._backend = backend
+        self._max_queue = max_queue
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="query"
+        )
+        self._in_flight: dict[Hashable, Future] = {}
+        self._queued = 0
+        self._counts = dict.fromkeys(OUTCOMES, 0)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def stats(self) -> dict[str, float]:
+        """
+        Returns counts of queries by outcome, the coalescing ratio and queue depth.
+        """
+        with self._lock:
+            counts = dict(self._counts)
+            queued = self._queued
+
+        answered = counts["executed"] + counts["coalesced"]
+        return {
+            **counts,
+            "coalescing_ratio": counts["coalesced"] / answered if answered else 0.0,
+            "queued": queued,
+        }
+
+    def find_similar(
+        self,
+        base_color: str,
+        metric: str,
+        n: int = 5,
+        timeout: Optional[float] = None,
+    ) -> tuple[list[str], list[str]]:
+        """
+        Finds colors similar to the given one, see `Backend.find_similar`.
+
+        Args:
+            base_color (str): Hex RGB code of the base color.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+            timeout (Optional[float], optional): Seconds to wait for the result.
+                Defaults to None (no limit).
+
+        Returns:
+            tuple[list[str], list[str]]: Lists of Ariadna identifiers and hexadecimal
+                codes of similar colors.
+        """
+        base_color = normalize_color(base_color)
+        future = self.submit(
+            ("color", base_color, metric, n),
+            metric,
+            n,
+            self._backend.find_similar,
+            base_color,
+            metric,
+            n,
+        )
+        return future.result(timeout)
+
+    def find_similar_dmc(
+        self,
+        dmc: str,
+        metric: str,
+        n: int = 5,
+        timeout: Optional[float] = None,
+    ) -> tuple[list[str], list[str]]:
+        """
+        Finds colors similar to the given DMC color, see `Backend.find_similar_dmc`.
+
+        Args:
+            dmc (str): DMC mouline identifier.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+            timeout (Optional[float], optional): Seconds to wait for the result.
+                Defaults to None (no limit).
+
+        Returns:
+            tuple[list[str], list[str]]: Lists of Ariadna identifiers and hexadecimal
+                codes of similar colors.
+        """
+        future = self.submit(
+            ("dmc", dmc, metric, n),
+            metric,
+            n,
+            self._backend.find_similar_dmc,
+            dmc,
+            metric,
+            n,
+        )
+        return future.result(timeout)
+
+    def run_inline(self, enabled: bool = True) -> None:
+        """
+        Makes queries submitted by the calling thread run in that thread.
+
+        Inline queries are counted as executed, but they are neither queued nor
+        coalesced.
+
+        Args:
+            enabled (bool, optional): Whether queries run inline. Defaults to True.
+        """
+        self._local.inline = enabled
+
+    def submit(
+        self,
+        key: Hashable,
+        metric: str,
+        n: int,
+        func: Callable[..., Result],
+        *args: Union[str, int],
+    ) -> Future:
+        """
+        Schedules a query, or joins an identical query which is still running.
+
+        Args:
+            key (Hashable): Key identifying identical queries.
+            metric (str): Metric name, used to label the queue wait time.
+            n (int): Number of similar colors, used to label the queue wait time.
+            func (Callable[..., Result]): Function answering the query.
+            *args (Union[str, int]): Arguments of the function.
+
+        Returns:
+            Future: Future result of the query, shared by coalesced queries.
+        """
+        if getattr(self._local, "inline", False):
+            with self._lock:
+                self._counts["executed"] += 1
+            future: Future = Future()
+            try:
+                future.set_result(func(*args))
+            except Exception as error:
+                future.set_exception(error)
+            return future
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._counts["coalesced"] += 1
+                return future
+
+            if self._queued >= self._max_queue:
+                self._counts["rejected"] += 1
+                raise QueueFullError(
+                    f"{self._queued} queries are already waiting, try again later."
+                )
+
+            self._counts["executed"] += 1
+            self._queued += 1
+            future = self._pool.submit(
+                self._run, time.perf_counter(), metric, n, func, args
+            )
+            self._in_flight[key] = future
+
+        future.add_done_callback(functools.partial(self._release, key))
+        return future
+
+    def _run(
+        self,
+        submit_time: float,
+        metric: str,
+        n: int,
+        func: Callable[..., Result],
+        args: tuple[Union[str, int], ...],
+    ) -> Result:
+        wait = time.perf_counter() - submit_time
+        with self._lock:
+            self._queued -= 1
+        self._backend.timings.observe("queue_wait", metric, n, wait)
+
+        return func(*args)
+
+    def _release(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+
+    def shutdown(self) -> None:
+        """
+        Waits for running queries and stops the threads.
+        """
+        self._pool.shutdown(wait=True)
+
+    def to_prometheus(self, prefix: str = "flossverter") -> str:
+        """
+        Renders query counts and the queue depth in the Prometheus text format.
+
+        Args:
+            prefix (str, optional): Prefix of metric names. Defaults to "flossverter".
+
+        Returns:
+            str: Exposition text.
+        """
+        stats = self.stats
+        lines = [
+            f"# HELP {prefix}_queries_total Similarity queries by outcome.",
+            f"# TYPE {prefix}_queries_total counter",
+        ]
+        lines.extend(
+            f'{prefix}_queries_total{{outcome="{outcome}"}} {stats[outcome]}'
+            for outcome in OUTCOMES
+        )
+        lines.extend(
+            [
+                f"# HELP {prefix}_coalescing_ratio Share of queries answered by "
+                "another identical query.",
+                f"# TYPE {prefix}_coalescing_ratio gauge",
+                f"{prefix}_coalescing_ratio {stats['coalescing_ratio']!r}",
+                f"# HELP {prefix}_queue_depth Queries waiting for a free thread.",
+                f"# TYPE {prefix}_queue_depth gauge",
+                f"{prefix}_queue_depth {stats['queued']}",
+            ]
+        )
+
+        return "\n".join(lines) + "\n"
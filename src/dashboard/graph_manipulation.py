@@ -1,7 +1,8 @@
 """
 Functions used for displaying colors swatches.
 """
-from typing import Optional
+from functools import lru_cache
+from typing import Any, Optional
 
 import plotly.graph_objects as go
 
@@ -67,3 +68,56 @@ def draw_graph(
     )
 
     return fig
+
+
+@lru_cache(maxsize=1)
+def clear_swatch() -> dict[str, Any]:
+    """
+    Returns the serialized empty graph, created once.
+
+    The returned dictionary is shared between calls and must not be modified.
+
+    Returns:
+        dict[str, Any]: Plotly figure as a dictionary.
+    """
+    return clear_graph().to_plotly_json()
+
+
+def draw_swatch(
+    base_color: str,
+    base_label: Optional[str],
+    compared_colors: list[str],
+    compared_labels: list[str],
+) -> dict[str, Any]:
+    """
+    Returns the serialized swatch of given colors, cached by the displayed colors.
+
+    Repeated queries skip building and validating the Plotly figure. The returned
+    dictionary is shared between calls and must not be modified.
+
+    Args:
+        base_color (str): Base hexadecimal color.
+        base_label (Optional[str]): Base mouline identifier if the algorithm input was
+            DMC code.
+        compared_colors (list[str]): Hexadecimal codes of compared colors.
+        compared_labels (str): Mouline identifiers of compared colors.
+
+    Returns:
+        dict[str, Any]: Plotly figure as a dictionary.
+    """
+    return _cached_swatch(
+        base_color, base_label, tuple(compared_colors), tuple(compared_labels)
+    )
+
+
+@lru_cache(maxsize=1024)
+def _cached_swatch(
+    base_color: str,
+    base_label: Optional[str],
+    compared_colors: tuple[str, ...],
+    compared_labels: tuple[str, ...],
+) -> dict[str, Any]:
+    fig = draw_graph(
+        base_color, base_label, list(compared_colors), list(compared_labels)
+    )
+    return fig.to_plotly_json()
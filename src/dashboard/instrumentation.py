@@ -0,0 +1,271 @@
+"""
+Low-overhead timing of similarity query stages and an on-demand sampling profiler.
+
+Durations of every stage (input parsing, color conversion, metric scoring, top-n
+selection, figure drawing etc.) are recorded in histograms labeled by the stage, the
+metric and n, which can be rendered in the Prometheus text format. Both are served by
+`dashboard.api.create_metrics_api`, together with the memory use of the process, so
+every worker of a preforking server reports its own resident and shared memory.
+"""
+import bisect
+import itertools
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+DEFAULT_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+Labels = tuple[str, str, int]
+
+
+class _StageTimer:
+    """
+    Context manager recording the duration of its body.
+
+    Args:
+        timings (StageTimings): Histograms the duration is recorded in.
+        labels (Labels): Stage, metric and n.
+    """
+
+    __slots__ = ("_timings", "_labels", "_start")
+
+    def __init__(self, timings: "StageTimings", labels: Labels):
+        self._timings = timings
+        self._labels = labels
+
+    def __enter__(self) -> "_StageTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *_) -> None:
+        self._timings.observe(*self._labels, time.perf_counter() - self._start)
+
+
+class StageTimings:
+    """
+    Thread-safe histograms of durations of query stages.
+
+    Args:
+        buckets (tuple[float, ...], optional): Upper bounds of histogram buckets in
+            seconds, the last bucket is unbounded. Defaults to `DEFAULT_BUCKETS`.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self._buckets = buckets
+        self._histograms: dict[Labels, list] = {}
+        self._lock = threading.Lock()
+
+    def timed(self, stage: str, metric: str, n: int) -> _StageTimer:
+        """
+        Creates a context manager recording the duration of a stage.
+
+        Args:
+            stage (str): Stage name.
+            metric (str): Metric name.
+            n (int): Number of similar colors.
+
+        Returns:
+            _StageTimer: Context manager.
+        """
+        return _StageTimer(self, (stage, metric, n))
+
+    def observe(self, stage: str, metric: str, n: int, seconds: float) -> None:
+        """
+        Records the duration of a stage.
+
+        Args:
+            stage (str): Stage name.
+            metric (str): Metric name.
+            n (int): Number of similar colors.
+            seconds (float): Duration.
+        """
+        bucket = bisect.bisect_left(self._buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((stage, metric, n))
+            if histogram is None:
+                histogram = self._histograms[(stage, metric, n)] = [
+                    [0] * (len(self._buckets) + 1),
+                    0.0,
+                ]
+            histogram[0][bucket] += 1
+            histogram[1] += seconds
+
+    def snapshot(self) -> dict[Labels, tuple[list[int], float]]:
+        """
+        Returns a copy of all histograms.
+
+        Returns:
+            dict[Labels, tuple[list[int], float]]: Counts of every bucket and the sum
+                of durations, keyed by the stage, metric and n.
+        """
+        with self._lock:
+            return {
+                labels: (list(counts), total)
+                for labels, (counts, total) in self._histograms.items()
+            }
+
+    def clear(self) -> None:
+        """
+        Removes all recorded durations.
+        """
+        with self._lock:
+            self._histograms.clear()
+
+    def to_prometheus(self, name: str = "flossverter_stage_seconds") -> str:
+        """
+        Renders histograms in the Prometheus text exposition format.
+
+        Args:
+            name (str, optional): Metric name. Defaults to "flossverter_stage_seconds".
+
+        Returns:
+            str: Exposition text.
+        """
+        lines = [
+            f"# HELP {name} Duration of similarity query stages in seconds.",
+            f"# TYPE {name} histogram",
+        ]
+        bounds = [repr(float(bound)) for bound in self._buckets] + ["+Inf"]
+
+        for (stage, metric, n), (counts, total) in sorted(self.snapshot().items()):
+            labels = (
+                f'stage="{_escape(stage)}",metric="{_escape(metric)}",n="{n}"'
+            )
+            for bound, count in zip(bounds, itertools.accumulate(counts)):
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {total!r}")
+            lines.append(f"{name}_count{{{labels}}} {sum(counts)}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def process_memory() -> dict[str, int]:
+    """
+    Measures memory use of the current process.
+
+    On Linux resident memory is split into pages shared with other processes (such
+    as preloaded arrays mapped by every worker) and private pages, and the
+    proportional set size divides shared pages between the processes using them.
+    Elsewhere only the peak resident set size is known.
+
+    Returns:
+        dict[str, int]: Sizes in bytes keyed by 'rss' and, on Linux, 'pss', 'shared'
+            and 'private'.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            fields = dict(line.split(":", 1) for line in file if ":" in line)
+    except OSError:
+        import resource
+
+        # Reported in kilobytes on Linux and in bytes on macOS
+        scale = 1 if sys.platform == "darwin" else 1024
+        return {"rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale}
+
+    def size(*names: str) -> int:
+        return sum(int(fields[name].split()[0]) * 1024 for name in names)
+
+    return {
+        "rss": size("Rss"),
+        "pss": size("Pss"),
+        "shared": size("Shared_Clean", "Shared_Dirty"),
+        "private": size("Private_Clean", "Private_Dirty"),
+    }
+
+
+def memory_to_prometheus(name: str = "flossverter_process_memory_bytes") -> str:
+    """
+    Renders memory use of the current process in the Prometheus text format.
+
+    Args:
+        name (str, optional): Metric name. Defaults to
+            "flossverter_process_memory_bytes".
+
+    Returns:
+        str: Exposition text, with a gauge per kind of memory labeled by the pid.
+    """
+    lines = [
+        f"# HELP {name} Memory use of the process serving the request in bytes.",
+        f"# TYPE {name} gauge",
+    ]
+    pid = os.getpid()
+    for kind, size in process_memory().items():
+        lines.append(f'{name}{{pid="{pid}",kind="{kind}"}} {size}')
+
+    return "\n".join(lines) + "\n"
+
+
+class SamplingProfiler:
+    """
+    Profiler sampling stacks of a single thread from a background thread.
+
+    Args:
+        thread_id (int): Identifier of the sampled thread.
+        interval (float, optional): Seconds between samples. Defaults to 0.001.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.001):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        """
+        Starts sampling.
+        """
+        self._thread.start()
+
+    def stop(self) -> Counter:
+        """
+        Stops sampling.
+
+        Returns:
+            Counter[str]: Numbers of samples of every collapsed stack.
+        """
+        self._stopped.set()
+        self._thread.join()
+        return self._samples
+
+    def collapsed(self) -> str:
+        """
+        Returns samples in the collapsed stacks format, one stack per line.
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self._samples.most_common()
+        )
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                location = f"{code.co_filename}:{code.co_firstlineno}"
+                stack.append(f"{code.co_name} ({location})")
+                frame = frame.f_back
+            if stack:
+                self._samples[";".join(reversed(stack))] += 1
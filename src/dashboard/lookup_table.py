@@ -0,0 +1,319 @@
+"""
+Precomputed nearest-floss lookup tables covering the whole sRGB gamut.
+
+Every '#rrggbb' color is an index into a (2^24, k) table of uint16 palette row
+indexes, sorted from the most similar. Tables are stored as .npy files named after the
+palette CSV, the metric and a digest of the CSV contents, so editing the CSV
+invalidates them and tables of several palettes can share a directory.
+
+Tables are built with:
+    python -m dashboard.lookup_table data/ariadna.csv data/lookup
+"""
+import argparse
+import hashlib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from converters import hex_to_dec_primaries_batch
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, to_color_space
+
+
+GAMUT_SIZE = 2 ** 24
+DEFAULT_K = 9
+
+
+def content_digest(data: bytes) -> str:
+    """
+    Computes a short digest of palette CSV contents.
+
+    Args:
+        data (bytes): Contents of the palette CSV.
+
+    Returns:
+        str: First 16 characters of the SHA-256 hex digest.
+    """
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def palette_digest(palette_path: Union[Path, str]) -> str:
+    """
+    Computes a short digest of the palette CSV contents.
+
+    Args:
+        palette_path (Union[Path, str]): Path to the palette CSV.
+
+    Returns:
+        str: First 16 characters of the SHA-256 hex digest.
+    """
+    return content_digest(Path(palette_path).read_bytes())
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def table_prefix(palette_path: Union[Path, str], metric: str) -> str:
+    """
+    Creates the file name prefix shared by all versions of a palette's table.
+
+    Args:
+        palette_path (Union[Path, str]): Path to the palette CSV.
+        metric (str): Metric name.
+
+    Returns:
+        str: Slugs of the palette file name and the metric, without '-' inside.
+    """
+    return f"{_slug(Path(palette_path).stem)}-{_slug(metric)}"
+
+
+def table_path(
+    directory: Union[Path, str],
+    palette_path: Union[Path, str],
+    metric: str,
+    digest: str,
+) -> Path:
+    """
+    Creates the path of the lookup table for the given palette, metric and digest.
+
+    Args:
+        directory (Union[Path, str]): Directory storing lookup tables.
+        palette_path (Union[Path, str]): Path to the palette CSV.
+        metric (str): Metric name.
+        digest (str): Palette digest.
+
+    Returns:
+        Path: Path of the .npy table.
+    """
+    return Path(directory) / f"{table_prefix(palette_path, metric)}-{digest}.npy"
+
+
+def gamut_primaries(start: int, stop: int) -> np.ndarray:
+    """
+    Decodes a range of 24-bit color integers into primaries.
+
+    Args:
+        start (int): First color (inclusive).
+        stop (int): Last color (exclusive).
+
+    Returns:
+        np.ndarray[int]: Nx3 numpy array of primaries (0-255).
+    """
+    colors = np.arange(start, stop, dtype=np.int64)
+    return np.stack(((colors >> 16) & 0xFF, (colors >> 8) & 0xFF, colors & 0xFF), -1)
+
+
+def _fill_chunk(
+    path: Path, metric: str, palette: np.ndarray, start: int, stop: int
+) -> int:
+    """
+    Scores a chunk of the gamut against the palette and writes its top-k rows.
+
+    Args:
+        path (Path): Path of the table being built.
+        metric (str): Metric name.
+        palette (np.ndarray): Palette coordinates in the metric's color space.
+        start (int): First color of the chunk (inclusive).
+        stop (int): Last color of the chunk (exclusive).
+
+    Returns:
+        int: Number of colors written.
+    """
+    metric_f, space = METRIC_KERNELS[metric]
+    table = np.load(path, mmap_mode="r+")
+
+    colors = to_color_space(gamut_primaries(start, stop), space)
+    scores = metric_f(colors[:, np.newaxis], palette)
+    top_rows = np.argsort(scores, axis=1, kind="stable")[:, : table.shape[1]]
+
+    table[start:stop] = top_rows
+    table.flush()
+
+    return stop - start
+
+
+def build_lookup_table(
+    palette_path: Union[Path, str],
+    directory: Union[Path, str],
+    metric: str,
+    k: int = DEFAULT_K,
+    chunk_size: int = 4096,
+    workers: Optional[int] = None,
+) -> Path:
+    """
+    Builds the full-gamut lookup table of a palette for the given metric.
+
+    The gamut is split into chunks scored in parallel processes which write directly
+    into a memory-mapped temporary file. The file is renamed into place when complete,
+    and tables built for previous versions of the same palette CSV and metric are
+    removed. Tables of other palettes and temporary files of other builds are kept.
+
+    Args:
+        palette_path (Union[Path, str]): Path to the palette CSV.
+        directory (Union[Path, str]): Directory storing lookup tables.
+        metric (str): Metric name.
+        k (int, optional): Number of the most similar colors stored per color.
+            Defaults to 9.
+        chunk_size (int, optional): Number of colors scored at once by a worker.
+            Defaults to 4096.
+        workers (Optional[int], optional): Number of worker processes. Defaults to
+            None (all cores).
+
+    Returns:
+        Path: Path of the built table.
+    """
+    _, space = METRIC_KERNELS[metric]
+    colors = pd.read_csv(palette_path)["rgb"].to_list()
+    if not 0 < k <= len(colors) <= np.iinfo(np.uint16).max:
+        raise ValueError(f"Cannot store {k} colors of a {len(colors)} colors palette.")
+
+    palette = np.asarray(palette_coordinates(colors)[space])
+    path = table_path(directory, palette_path, metric, palette_digest(palette_path))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.stem}.tmp.npy")
+
+    table = np.lib.format.open_memmap(
+        tmp_path, mode="w+", dtype=np.uint16, shape=(GAMUT_SIZE, k)
+    )
+    del table
+
+    starts = range(0, GAMUT_SIZE, chunk_size)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(
+                _fill_chunk,
+                tmp_path,
+                metric,
+                palette,
+                start,
+                min(start + chunk_size, GAMUT_SIZE),
+            )
+            for start in starts
+        ]
+        for future in futures:
+            future.result()
+
+    os.replace(tmp_path, path)
+
+    # Digests are 16 hex digits, which never matches '.tmp' files of running builds
+    digest_pattern = "[0-9a-f]" * 16
+    prefix = table_prefix(palette_path, metric)
+    for stale in path.parent.glob(f"{prefix}-{digest_pattern}.npy"):
+        if stale != path:
+            stale.unlink()
+
+    return path
+
+
+class LookupTable:
+    """
+    Memory-mapped full-gamut lookup table.
+
+    The file is opened read-only, so pages are shared between all processes using it.
+
+    Args:
+        path (Union[Path, str]): Path of the .npy table.
+    """
+
+    def __init__(self, path: Union[Path, str]):
+        self._table = np.load(path, mmap_mode="r")
+
+    @property
+    def k(self) -> int:
+        """
+        Returns the number of similar colors stored per color.
+        """
+        return self._table.shape[1]
+
+    def lookup(self, color: str, n: int) -> np.ndarray:
+        """
+        Returns palette row indexes of the colors most similar to the given one.
+
+        The color is decoded like on the scoring path, so malformed codes raise
+        `InvalidColorError` instead of indexing an arbitrary row.
+
+        Args:
+            color (str): Hex RGB code of the base color.
+            n (int): Expected number of similar colors, at most k.
+
+        Returns:
+            np.ndarray[int]: Palette row indexes sorted from the most similar.
+        """
+        red, green, blue = hex_to_dec_primaries_batch([color])[0].tolist()
+        return self._table[(red << 16) | (green << 8) | blue, :n].astype(np.intp)
+
+
+def load_lookup_tables(
+    directory: Union[Path, str],
+    palette_path: Union[Path, str],
+    metrics: Iterable[str] = METRIC_KERNELS,
+    digest: Optional[str] = None,
+) -> dict[str, LookupTable]:
+    """
+    Loads lookup tables built for the current contents of the palette CSV.
+
+    Metrics without an up-to-date table are skipped.
+
+    Args:
+        directory (Union[Path, str]): Directory storing lookup tables.
+        palette_path (Union[Path, str]): Path to the palette CSV.
+        metrics (Iterable[str], optional): Metric names. Defaults to all metrics.
+        digest (Optional[str], optional): Digest of the palette contents, computed
+            from the file if not given. Defaults to None.
+
+    Returns:
+        dict[str, LookupTable]: Lookup tables keyed by the metric name.
+    """
+    if digest is None:
+        digest = palette_digest(palette_path)
+
+    tables = {}
+    for metric in metrics:
+        path = table_path(directory, palette_path, metric, digest)
+        if path.exists():
+            tables[metric] = LookupTable(path)
+
+    return tables
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Builds lookup tables from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("palette", help="path to the palette CSV")
+    parser.add_argument("directory", help="directory storing lookup tables")
+    parser.add_argument(
+        "--metric",
+        action="append",
+        choices=list(METRIC_KERNELS),
+        help="metric to build a table for, can be repeated (default: all)",
+    )
+    parser.add_argument("-k", type=int, default=DEFAULT_K)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parser.add_argument("--workers", type=int, default=None)
+    parsed = parser.parse_args(args)
+
+    for metric in parsed.metric or METRIC_KERNELS:
+        path = build_lookup_table(
+            parsed.palette,
+            parsed.directory,
+            metric,
+            k=parsed.k,
+            chunk_size=parsed.chunk_size,
+            workers=parsed.workers,
+        )
+        print(f"{metric}: {path}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Row by row difference between two versions of a palette sheet.
+
+Rows are matched by the mouline identifier: a row is kept if a row with the same
+identifier and color code existed before, otherwise it is fresh and everything derived
+from it has to be recomputed. Old rows without a kept counterpart are stale.
+"""
+import numpy as np
+import pandas as pd
+
+from metrics.scoring import palette_coordinates
+
+
+class PaletteDiff:
+    """
+    Class mapping rows of a new version of a palette to rows of the old one.
+
+    Args:
+        old_rows (np.ndarray): Old row of every new row with the same identifier and
+            color, -1 for added or changed rows.
+        old_size (int): Number of rows of the old palette.
+    """
+
+    def __init__(self, old_rows: np.ndarray, old_size: int):
+        self._old_rows = old_rows
+        self._old_to_new = np.full(old_size, -1, dtype=np.intp)
+        self._old_to_new[old_rows[old_rows >= 0]] = np.flatnonzero(old_rows >= 0)
+
+    @classmethod
+    def between(cls, old: pd.DataFrame, new: pd.DataFrame) -> "PaletteDiff":
+        """
+        Compares two versions of a sheet indexed by the identifier.
+
+        Sheets with duplicated identifiers cannot be matched, so all their rows are
+        fresh.
+
+        Args:
+            old (pd.DataFrame): Old version of the sheet.
+            new (pd.DataFrame): New version of the sheet.
+
+        Returns:
+            PaletteDiff: Difference of the sheets.
+        """
+        if not (old.index.is_unique and new.index.is_unique):
+            return cls(np.full(len(new), -1, dtype=np.intp), len(old))
+
+        positions = old.index.get_indexer(new.index)
+        old_colors, new_colors = old["rgb"].to_numpy(), new["rgb"].to_numpy()
+        same = positions >= 0
+        same[same] = old_colors[positions[same]] == new_colors[same]
+
+        return cls(np.where(same, positions, -1).astype(np.intp), len(old))
+
+    @property
+    def old_rows(self) -> np.ndarray:
+        """
+        Returns the old row of every new row, -1 for fresh rows.
+        """
+        return self._old_rows
+
+    @property
+    def old_to_new(self) -> np.ndarray:
+        """
+        Returns the new row of every old row, -1 for stale rows.
+        """
+        return self._old_to_new
+
+    @property
+    def kept(self) -> np.ndarray:
+        """
+        Returns new rows present in the old version.
+        """
+        return np.flatnonzero(self._old_rows >= 0)
+
+    @property
+    def fresh(self) -> np.ndarray:
+        """
+        Returns new rows which were added or changed.
+        """
+        return np.flatnonzero(self._old_rows < 0)
+
+    @property
+    def stale(self) -> np.ndarray:
+        """
+        Returns old rows which were removed or changed.
+        """
+        return np.flatnonzero(self._old_to_new < 0)
+
+    @property
+    def changed(self) -> bool:
+        """
+        Returns whether any row was added, changed or removed.
+        """
+        return bool(len(self.fresh) or len(self.stale))
+
+    @property
+    def keeps_order(self) -> bool:
+        """
+        Returns whether kept rows are in the same relative order as before.
+
+        Ties between equally similar colors are broken by the row, so derived
+        rankings can only be reused if the order is kept.
+        """
+        return bool(np.all(np.diff(self._old_rows[self.kept]) > 0))
+
+    def update_coordinates(
+        self, old: dict[str, np.ndarray], primaries: np.ndarray
+    ) -> dict[str, np.ndarray]:
+        """
+        Builds coordinates of the new palette, converting only fresh rows.
+
+        Args:
+            old (dict[str, np.ndarray]): Coordinates of the old palette, as built by
+                `palette_coordinates`.
+            primaries (np.ndarray): Nx3 array of primaries of the new palette.
+
+        Returns:
+            dict[str, np.ndarray]: Read-only coordinates of the new palette.
+        """
+        kept, fresh = self.kept, self.fresh
+        converted = palette_coordinates(primaries[fresh])
+
+        coordinates = {}
+        for space, old_coords in old.items():
+            coords = np.empty((len(self._old_rows), 3), dtype=old_coords.dtype)
+            coords[kept] = old_coords[self._old_rows[kept]]
+            coords[fresh] = converted[space]
+            coords.setflags(write=False)
+            coordinates[space] = coords
+
+        return coordinates
+
+    def summary(self, old: pd.DataFrame, new: pd.DataFrame) -> dict[str, list[str]]:
+        """
+        Lists identifiers of added, changed and removed rows.
+
+        Args:
+            old (pd.DataFrame): Old version of the sheet.
+            new (pd.DataFrame): New version of the sheet.
+
+        Returns:
+            dict[str, list[str]]: Identifiers keyed by 'added', 'changed' and
+                'removed'.
+        """
+        old_codes = set(old.index.astype(str))
+        new_codes = set(new.index.astype(str))
+        fresh = new.index[self.fresh].astype(str).tolist()
+
+        return {
+            "added": [code for code in fresh if code not in old_codes],
+            "changed": [code for code in fresh if code in old_codes],
+            "removed": [
+                code
+                for code in old.index[self.stale].astype(str).tolist()
+                if code not in new_codes
+            ],
+        }
@@ -0,0 +1,434 @@
+"""
+Registry of mouline palettes of any brands (DMC, Ariadna, Anchor, Madeira, custom).
+
+Every registered palette is read and indexed once: its colors are converted to all
+color spaces, codes are mapped back to rows and large palettes get a spatial index
+(CIEDE2000 queries on them are pruned with lower bounds instead).
+Conversion tables between a pair of palettes are built on the first query between
+them, in either direction, and shared by all later queries, so converting a code of
+one brand to another costs a single table lookup.
+
+Palette CSVs need 'number' and 'rgb' columns, like the sheets in the data directory.
+"""
+import contextlib
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, ContextManager, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from converters import InvalidColorError, hex_to_dec_primaries_batch
+from metrics.scoring import (
+    METRIC_KERNELS,
+    PRUNED_SEARCH_METRICS,
+    PRUNED_SEARCH_MIN_SIZE,
+    palette_coordinates,
+    pruned_top_n_indices,
+    to_color_space,
+    top_n_indices,
+)
+
+from .conversion_table import ConversionTable
+from .lookup_table import DEFAULT_K, palette_digest
+from .spatial_index import SPATIAL_INDEX_MIN_SIZE, SpatialIndex
+
+
+StageTimer = Callable[[str, str, int], ContextManager[None]]
+
+
+def find_similar_rows(
+    base: np.ndarray,
+    metric: str,
+    n: int,
+    coordinates: dict[str, np.ndarray],
+    chroma: np.ndarray,
+    index: Optional[SpatialIndex],
+    timed: Optional[StageTimer] = None,
+) -> np.ndarray:
+    """
+    Finds rows of the n palette colors most similar to the base color.
+
+    CIEDE2000 queries on large palettes are pruned with lower bounds, other queries
+    use the spatial index if the palette has one, and the remaining ones score the
+    whole palette. Every path breaks ties by the lower row.
+
+    Args:
+        base (np.ndarray): Coordinates of the base color in the metric's space.
+        metric (str): Metric name.
+        n (int): Expected number of similar colors.
+        coordinates (dict[str, np.ndarray]): Palette coordinates keyed by the color
+            space, as built by `palette_coordinates`.
+        chroma (np.ndarray): Chroma of the palette colors.
+        index (Optional[SpatialIndex]): Spatial index of the palette.
+        timed (Optional[StageTimer], optional): Creates a context manager recording
+            the duration of a stage, like `StageTimings.timed`. Defaults to None.
+
+    Returns:
+        np.ndarray[int]: Row indexes sorted from the most similar.
+    """
+    if timed is None:
+
+        def timed(stage: str, metric: str, n: int) -> ContextManager[None]:
+            return contextlib.nullcontext()
+
+    size = len(chroma)
+    if metric in PRUNED_SEARCH_METRICS and size >= PRUNED_SEARCH_MIN_SIZE:
+        with timed("pruned_search", metric, n):
+            return pruned_top_n_indices(base, coordinates["lab"], metric, n, chroma)[0]
+    if index is not None and n < size:
+        with timed("index_search", metric, n):
+            return index.find_similar(base, metric, n)
+
+    # Scores stay local to the call, shared state is only read
+    metric_f, space = METRIC_KERNELS[metric]
+    with timed("scoring", metric, n):
+        scores = metric_f(base, coordinates[space])
+    with timed("top_n", metric, n):
+        return top_n_indices(scores, n)
+
+
+class Palette:
+    """
+    Class storing colors of a single brand with their coordinates and lookup indexes.
+
+    Args:
+        name (str): Brand name.
+        codes (Sequence[str]): Mouline identifiers.
+        colors (Sequence[str]): Hexadecimal color codes, in the order of identifiers.
+        digest (str, optional): Digest of the palette source. Defaults to "".
+    """
+
+    def __init__(
+        self,
+        name: str,
+        codes: Sequence[str],
+        colors: Sequence[str],
+        digest: str = "",
+    ):
+        primaries = hex_to_dec_primaries_batch(colors)
+
+        self._name = name
+        self._codes = np.array(codes, dtype=str)
+        self._colors = np.array(colors, dtype=str)
+        self._digest = digest
+        self._rows = {code: row for row, code in enumerate(self._codes.tolist())}
+        if len(self._rows) != len(self._codes):
+            raise ValueError(f"Palette {name} has duplicated codes.")
+
+        self._coords = palette_coordinates(primaries)
+        lab = self._coords["lab"]
+        self._chroma = np.sqrt(lab[:, 1] ** 2 + lab[:, 2] ** 2)
+        self._index = (
+            SpatialIndex(self._coords)
+            if len(self._codes) >= SPATIAL_INDEX_MIN_SIZE
+            else None
+        )
+
+    @classmethod
+    def read(cls, name: str, path: Union[Path, str]) -> "Palette":
+        """
+        Reads a palette from a CSV.
+
+        Args:
+            name (str): Brand name.
+            path (Union[Path, str]): Path to the palette CSV.
+
+        Returns:
+            Palette: Read palette.
+        """
+        df = pd.read_csv(path, dtype={"number": str})
+        try:
+            return cls(name, df["number"], df["rgb"], palette_digest(path))
+        except InvalidColorError as error:
+            raise InvalidColorError(error.rows, source=str(path)) from None
+
+    def __len__(self) -> int:
+        """
+        Returns the number of colors.
+        """
+        return len(self._codes)
+
+    @property
+    def name(self) -> str:
+        """
+        Returns the brand name.
+        """
+        return self._name
+
+    @property
+    def codes(self) -> np.ndarray:
+        """
+        Returns mouline identifiers.
+        """
+        return self._codes
+
+    @property
+    def colors(self) -> np.ndarray:
+        """
+        Returns hexadecimal color codes.
+        """
+        return self._colors
+
+    @property
+    def digest(self) -> str:
+        """
+        Returns the digest of the palette source.
+        """
+        return self._digest
+
+    @property
+    def coordinates(self) -> dict[str, np.ndarray]:
+        """
+        Returns read-only coordinates of colors keyed by the color space.
+        """
+        return self._coords
+
+    def rows(self, codes: Sequence[str]) -> np.ndarray:
+        """
+        Finds rows of mouline identifiers.
+
+        Args:
+            codes (Sequence[str]): Mouline identifiers.
+
+        Returns:
+            np.ndarray[int]: Row indexes, in the order of identifiers.
+        """
+        rows = [self._rows.get(code, -1) for code in codes]
+        if -1 in rows:
+            raise KeyError([code for code in codes if code not in self._rows])
+        return np.array(rows, dtype=np.intp)
+
+    def find_similar(self, base: np.ndarray, metric: str, n: int) -> np.ndarray:
+        """
+        Finds rows of the n colors most similar to the base color.
+
+        Args:
+            base (np.ndarray): Coordinates of the base color in the metric's space.
+            metric (str): Metric name.
+            n (int): Expected number of similar colors.
+
+        Returns:
+            np.ndarray[int]: Row indexes sorted from the most similar.
+        """
+        return find_similar_rows(
+            base, metric, n, self._coords, self._chroma, self._index
+        )
+
+
+@dataclass(frozen=True)
+class _Conversion:
+    """
+    Conversion table between two palettes together with the palettes it was built from.
+
+    Queries take source rows, the table and target codes from one snapshot, so they
+    never mix versions of a palette replaced meanwhile.
+    """
+
+    source: Palette
+    target: Palette
+    table: ConversionTable
+
+
+class PaletteRegistry:
+    """
+    Class converting colors between any pair of registered palettes.
+
+    Registered palettes are never modified by queries, so a single registry can be
+    shared between threads.
+
+    Args:
+        k (int, optional): Number of the most similar colors stored per color by
+            conversion tables, larger queries scan the target palette. Defaults to 9.
+    """
+
+    def __init__(self, k: int = DEFAULT_K):
+        self._k = k
+        self._palettes: dict[str, Palette] = {}
+        self._tables: dict[tuple[str, str], _Conversion] = {}
+        self._table_locks: dict[tuple[str, str], threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """
+        Returns the number of registered palettes.
+        """
+        return len(self._palettes)
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Checks whether a palette with the given name is registered.
+        """
+        return name in self._palettes
+
+    def __getitem__(self, name: str) -> Palette:
+        """
+        Returns the registered palette with the given name.
+        """
+        return self._palettes[name]
+
+    @property
+    def names(self) -> list[str]:
+        """
+        Returns names of registered palettes.
+        """
+        return list(self._palettes)
+
+    def register(self, palette: Palette) -> None:
+        """
+        Adds a palette, replacing a registered palette with the same name.
+
+        Args:
+            palette (Palette): Added palette.
+        """
+        with self._lock:
+            self._palettes[palette.name] = palette
+            self._tables = {
+                pair: conversion
+                for pair, conversion in self._tables.items()
+                if palette.name not in pair
+            }
+
+    def read(self, name: str, path: Union[Path, str]) -> Palette:
+        """
+        Reads a palette from a CSV and adds it to the registry.
+
+        Args:
+            name (str): Brand name.
+            path (Union[Path, str]): Path to the palette CSV.
+
+        Returns:
+            Palette: Registered palette.
+        """
+        palette = Palette.read(name, path)
+        self.register(palette)
+        return palette
+
+    def conversion_table(self, source: str, target: str) -> ConversionTable:
+        """
+        Returns the conversion table between two palettes, built on the first call.
+
+        Tables are built holding a lock of the pair only, so concurrent first calls
+        for one pair build its table once and other pairs are not blocked meanwhile.
+
+        Args:
+            source (str): Name of the converted palette.
+            target (str): Name of the palette of substitutes.
+
+        Returns:
+            ConversionTable: Table of target rows for every source row.
+        """
+        return self._conversion(source, target).table
+
+    def _conversion(self, source: str, target: str) -> _Conversion:
+        pair = (source, target)
+        with self._lock:
+            conversion = self._tables.get(pair)
+            if conversion is not None:
+                return conversion
+            pair_lock = self._table_locks.setdefault(pair, threading.Lock())
+
+        with pair_lock:
+            with self._lock:
+                conversion = self._tables.get(pair)
+                source_palette = self._palettes[source]
+                target_palette = self._palettes[target]
+            if conversion is None:
+                table = ConversionTable.from_coordinates(
+                    source_palette.coordinates,
+                    target_palette.coordinates,
+                    (source_palette.digest, target_palette.digest),
+                    self._k,
+                )
+                conversion = _Conversion(source_palette, target_palette, table)
+                with self._lock:
+                    # Not kept if a palette was replaced while the table was built
+                    if (
+                        self._palettes.get(source) is source_palette
+                        and self._palettes.get(target) is target_palette
+                    ):
+                        self._tables[pair] = conversion
+        return conversion
+
+    def find_similar(
+        self, color: str, target: str, metric: str, n: int = 5
+    ) -> tuple[list[str], list[str]]:
+        """
+        Finds colors of a palette similar to the given one.
+
+        Args:
+            color (str): Hex RGB code of the base color.
+            target (str): Name of the searched palette.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[str], list[str]]: Lists of identifiers and hexadecimal codes of
+                similar colors.
+        """
+        palette = self._palettes[target]
+        base = to_color_space([color], METRIC_KERNELS[metric][1])[0]
+        rows = palette.find_similar(base, metric, n)
+        return palette.codes[rows].tolist(), palette.colors[rows].tolist()
+
+    def convert(
+        self, code: str, source: str, target: str, metric: str, n: int = 5
+    ) -> tuple[list[str], list[str]]:
+        """
+        Finds colors of the target palette similar to a color of the source palette.
+
+        Args:
+            code (str): Mouline identifier in the source palette.
+            source (str): Name of the converted palette.
+            target (str): Name of the palette of substitutes.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[str], list[str]]: Lists of identifiers and hexadecimal codes of
+                similar colors.
+        """
+        codes, colors = self.convert_batch([code], source, target, metric, n)
+        return codes[0], colors[0]
+
+    def convert_batch(
+        self, codes: Sequence[str], source: str, target: str, metric: str, n: int = 5
+    ) -> tuple[list[list[str]], list[list[str]]]:
+        """
+        Finds colors of the target palette similar to colors of the source palette.
+
+        Args:
+            codes (Sequence[str]): Mouline identifiers in the source palette.
+            source (str): Name of the converted palette.
+            target (str): Name of the palette of substitutes.
+            metric (str): Metric to use.
+            n (int, optional): Expected number of similar colors. Defaults to 5.
+
+        Returns:
+            tuple[list[list[str]], list[list[str]]]: Lists of identifiers and
+                hexadecimal codes of similar colors, one per converted color.
+        """
+        with self._lock:
+            source_palette = self._palettes[source]
+            target_palette = self._palettes[target]
+
+        if n <= self._k or len(target_palette) <= self._k:
+            # Palettes of the table are used, which may differ from the ones read above
+            conversion = self._conversion(source, target)
+            source_palette, target_palette = conversion.source, conversion.target
+            source_rows = source_palette.rows(codes)
+            top_rows = conversion.table.lookup(source_rows, metric, n)
+        else:
+            source_rows = source_palette.rows(codes)
+            space = METRIC_KERNELS[metric][1]
+            bases = source_palette.coordinates[space][source_rows]
+            top_rows = np.array(
+                [target_palette.find_similar(base, metric, n) for base in bases],
+                dtype=np.intp,
+            ).reshape(len(bases), -1)
+
+        return (
+            target_palette.codes[top_rows].tolist(),
+            target_palette.colors[top_rows].tolist(),
+        )
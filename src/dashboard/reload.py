@@ -0,0 +1,115 @@
+"""
+Watcher reloading the backend when its palette CSVs are edited.
+
+Files are polled for their modification time and size, which needs no platform
+specific notification API and costs two `stat` calls per interval. A changed file only
+triggers `Backend.reload`, which compares contents by digest, so touching a file
+without editing it does no work.
+
+The thread is started explicitly, so a watcher created in a preloading server's
+master process can be started in each forked worker instead. Watching starts from the
+state of the files when the backend read them, so edits made before the watcher was
+created are reloaded too. Failed reloads are passed to a callback or logged.
+"""
+import logging
+import threading
+from typing import Any, Callable, Optional
+
+from .backend import Backend, file_signature
+
+
+_logger = logging.getLogger(__name__)
+
+
+class PaletteWatcher:
+    """
+    Class polling palette CSVs of a backend and reloading it after edits.
+
+    Args:
+        backend (Backend): Reloaded backend.
+        interval (float, optional): Seconds between polls. Defaults to 5.0.
+        on_reload (Optional[Callable[[dict[str, Any]], None]], optional): Called with
+            the summary of every reload. Defaults to None.
+        on_error (Optional[Callable[[Exception], None]], optional): Called with the
+            error of a failed reload, after which the backend keeps the old palettes
+            until the files change again. Defaults to None (errors are logged by the
+            polling thread and raised by `check`).
+    """
+
+    def __init__(
+        self,
+        backend: Backend,
+        interval: float = 5.0,
+        on_reload: Optional[Callable[[dict[str, Any]], None]] = None,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if interval <= 0:
+            raise ValueError("Polling interval has to be positive.")
+
+        self._backend = backend
+        self._interval = interval
+        self._on_reload = on_reload
+        self._on_error = on_error
+        self._signature = backend.palette_signature
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> Optional[dict[str, Any]]:
+        """
+        Reloads the backend if any palette CSV changed since the last check.
+
+        Errors are passed to `on_error` if given, otherwise raised.
+
+        Returns:
+            Optional[dict[str, Any]]: Summary of the reload, or None if nothing was
+                reloaded.
+        """
+        dmc_path, ariadna_path = self._backend.palette_paths
+        signature = (file_signature(dmc_path), file_signature(ariadna_path))
+        if signature == self._signature:
+            return None
+
+        # Updated before reloading, so a broken file is reported once, not every poll
+        self._signature = signature
+        try:
+            summary = self._backend.reload()
+        except Exception as error:
+            if self._on_error is None:
+                raise
+            self._on_error(error)
+            return None
+
+        if summary is not None and self._on_reload is not None:
+            self._on_reload(summary)
+        return summary
+
+    def start(self) -> "PaletteWatcher":
+        """
+        Starts polling in a daemon thread.
+
+        Returns:
+            PaletteWatcher: The watcher itself.
+        """
+        if self._thread is None:
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="palette-watcher", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops polling and waits for the thread to finish.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            try:
+                self.check()
+            except Exception:
+                _logger.exception("Reloading palettes failed, keeping the old ones")
@@ -0,0 +1,105 @@
+"""
+Read-only arrays shared between processes through memory-mapped files.
+
+In gunicorn's preload mode the app is built once in the master process and forked
+into workers. Arrays kept on the Python heap share pages with other objects, so they
+are copied into every worker as soon as reference counts or the garbage collector
+write to those pages. Pages of memory-mapped files are never written, so they stay
+shared by all workers. Files are placed in /dev/shm when available, so they are kept
+in memory without touching the disk.
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+
+def default_directory() -> Optional[Path]:
+    """
+    Returns the parent directory of shared files, /dev/shm if it is writable.
+
+    Returns:
+        Optional[Path]: Directory, None for the default temporary directory.
+    """
+    shm = Path("/dev/shm")  # noqa: S108
+    return shm if shm.is_dir() and os.access(shm, os.W_OK) else None
+
+
+class SharedArrays:
+    """
+    Class storing arrays in memory-mapped files of a private temporary directory.
+
+    The directory is removed by `close`, only in the process which created it, so
+    forked workers exiting do not remove files used by other workers.
+
+    Args:
+        parent (Optional[Union[Path, str]], optional): Parent of the directory.
+            Defaults to None (`default_directory`).
+    """
+
+    def __init__(self, parent: Optional[Union[Path, str]] = None):
+        self._directory = Path(
+            tempfile.mkdtemp(prefix="flossverter-", dir=parent or default_directory())
+        )
+        self._owner_pid = os.getpid()
+        self._nbytes = 0
+
+    @property
+    def directory(self) -> Path:
+        """
+        Returns the directory of shared files.
+        """
+        return self._directory
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the total size of shared arrays in bytes.
+        """
+        return self._nbytes
+
+    def share(self, name: str, array: np.ndarray) -> np.ndarray:
+        """
+        Copies an array into a memory-mapped file.
+
+        Args:
+            name (str): Unique name of the array, used as the file name.
+            array (np.ndarray): Shared array.
+
+        Returns:
+            np.ndarray: Read-only memory-mapped copy of the array.
+        """
+        path = self._directory / f"{name}.npy"
+        np.save(path, np.ascontiguousarray(array), allow_pickle=False)
+        self._nbytes += array.nbytes
+        return np.load(path, mmap_mode="r")
+
+    def share_all(
+        self, prefix: str, arrays: dict[str, np.ndarray]
+    ) -> dict[str, np.ndarray]:
+        """
+        Copies arrays into memory-mapped files.
+
+        Args:
+            prefix (str): Prefix of names of the arrays.
+            arrays (dict[str, np.ndarray]): Shared arrays keyed by the name.
+
+        Returns:
+            dict[str, np.ndarray]: Read-only memory-mapped copies keyed by the name.
+        """
+        return {
+            name: self.share(f"{prefix}-{name}", array)
+            for name, array in arrays.items()
+        }
+
+    def close(self) -> None:
+        """
+        Removes the shared files if called by the process which created them.
+
+        Mapped arrays stay valid until they are released.
+        """
+        if os.getpid() == self._owner_pid:
+            shutil.rmtree(self._directory, ignore_errors=True)
@@ -0,0 +1,246 @@
+"""
+Spatial index answering exact top-n queries on large palettes.
+"""
+import heapq
+from typing import Callable
+
+import numpy as np
+
+from metrics.bounds import (
+    cie76_search_radius,
+    cie94_search_radius,
+    ciede2000_search_radius,
+    cmc_search_radius,
+    rgb_euclidean_gamma_correction_search_radius,
+    rgb_euclidean_search_radius,
+)
+from metrics.scoring import METRIC_KERNELS, top_n_indices
+
+
+# Palettes smaller than this are scored by brute force, which is faster for them
+SPATIAL_INDEX_MIN_SIZE = 2048
+
+# Relative slack added to search radii so that rounding never drops a candidate
+_RADIUS_SLACK = 1e-9
+
+# Number of euclidean neighbours scored per requested color to estimate the n-th score
+_NEIGHBOURS_PER_RESULT = 4
+
+
+class KDTree:
+    """
+    KD-tree over points with leaves stored as contiguous index buckets.
+
+    Leaves are scanned with vectorized NumPy operations, so the Python-level work is
+    proportional to the number of visited nodes only.
+
+    Args:
+        points (np.ndarray): NxD array of points.
+        leaf_size (int, optional): Maximum number of points in a leaf. Defaults to 32.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 32):
+        self._points = np.asarray(points, dtype=float)
+        self._leaf_size = leaf_size
+        self._order = np.arange(len(self._points))
+        # Node: [start, stop, left child, right child], children are -1 in leaves
+        self._nodes: list[list[int]] = []
+        self._mins: list[np.ndarray] = []
+        self._maxs: list[np.ndarray] = []
+        if len(self._points):
+            self._build(0, len(self._points))
+
+    def __len__(self) -> int:
+        """
+        Returns the number of indexed points.
+        """
+        return len(self._points)
+
+    def _build(self, start: int, stop: int) -> int:
+        node = len(self._nodes)
+        points = self._points[self._order[start:stop]]
+        self._nodes.append([start, stop, -1, -1])
+        self._mins.append(points.min(axis=0))
+        self._maxs.append(points.max(axis=0))
+
+        if stop - start > self._leaf_size:
+            dim = np.argmax(self._maxs[node] - self._mins[node])
+            middle = (stop - start) // 2
+            split = np.argpartition(points[:, dim], middle)
+            self._order[start:stop] = self._order[start:stop][split]
+
+            self._nodes[node][2] = self._build(start, start + middle)
+            self._nodes[node][3] = self._build(start + middle, stop)
+
+        return node
+
+    def _box_distance_sq(self, node: int, point: np.ndarray) -> float:
+        gap = np.maximum(self._mins[node] - point, 0) + np.maximum(
+            point - self._maxs[node], 0
+        )
+        return float(gap @ gap)
+
+    def _leaf_distances_sq(
+        self, node: int, point: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        start, stop, _, _ = self._nodes[node]
+        indices = self._order[start:stop]
+        diff = self._points[indices] - point
+        return indices, (diff * diff).sum(axis=1)
+
+    def query(self, point: np.ndarray, k: int) -> np.ndarray:
+        """
+        Finds the k points nearest to the given one.
+
+        Args:
+            point (np.ndarray): Query point.
+            k (int): Number of neighbours.
+
+        Returns:
+            np.ndarray[int]: Indices of the nearest points (in no particular order).
+        """
+        point = np.asarray(point, dtype=float)
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        # max-heap of the best points found so far as (-distance, index)
+        best: list[tuple[float, int]] = []
+        queue = [(0.0, 0)]
+        while queue:
+            box_dist, node = heapq.heappop(queue)
+            if len(best) == k and box_dist > -best[0][0]:
+                break
+
+            _, _, left, right = self._nodes[node]
+            if left >= 0:
+                for child in (left, right):
+                    heapq.heappush(queue, (self._box_distance_sq(child, point), child))
+                continue
+
+            indices, dists = self._leaf_distances_sq(node, point)
+            for index, dist in zip(indices.tolist(), dists.tolist()):
+                if len(best) < k:
+                    heapq.heappush(best, (-dist, index))
+                elif dist < -best[0][0]:
+                    heapq.heapreplace(best, (-dist, index))
+
+        return np.array([index for _, index in best], dtype=np.intp)
+
+    def query_radius(self, point: np.ndarray, radius: float) -> np.ndarray:
+        """
+        Finds all points within the given distance (inclusive) of the given one.
+
+        Args:
+            point (np.ndarray): Query point.
+            radius (float): Search radius.
+
+        Returns:
+            np.ndarray[int]: Sorted indices of the points within the radius.
+        """
+        point = np.asarray(point, dtype=float)
+        radius_sq = radius ** 2
+
+        found = []
+        stack = [0] if len(self) else []
+        while stack:
+            node = stack.pop()
+            if self._box_distance_sq(node, point) > radius_sq:
+                continue
+
+            _, _, left, right = self._nodes[node]
+            if left >= 0:
+                stack.extend((left, right))
+                continue
+
+            indices, dists = self._leaf_distances_sq(node, point)
+            found.append(indices[dists <= radius_sq])
+
+        if not found:
+            return np.empty(0, dtype=np.intp)
+        return np.sort(np.concatenate(found))
+
+
+class SpatialIndex:
+    """
+    Exact top-n search over a palette backed by KD-trees in RGB and Lab spaces.
+
+    The metric is evaluated on a few nearest neighbours in the metric's color space,
+    which gives an upper bound of the n-th best score. Every metric is bounded from
+    below by a function of the distance (see `metrics.bounds`), so all colors that
+    could beat that score lie within a computable radius. Candidates from that ball
+    are re-ranked with the exact metric, so results are identical to a full scan.
+
+    Args:
+        coordinates (dict[str, np.ndarray]): Palette coordinates keyed by the color
+            space, as built by `palette_coordinates`.
+        leaf_size (int, optional): Maximum number of points in a KD-tree leaf.
+            Defaults to 32.
+    """
+
+    def __init__(self, coordinates: dict[str, np.ndarray], leaf_size: int = 32):
+        self._coords = coordinates
+        self._trees = {
+            space: KDTree(coordinates[space], leaf_size) for space in ("rgb", "lab")
+        }
+
+        lab = coordinates["lab"]
+        chroma = np.sqrt(lab[:, 1] ** 2 + lab[:, 2] ** 2)
+        lightness_range = (float(lab[:, 0].min()), float(lab[:, 0].max()))
+        max_chroma = float(chroma.max())
+
+        self._search_radii: dict[str, Callable[[np.ndarray, float], float]] = {
+            "RGB euclidean": rgb_euclidean_search_radius,
+            "RGB with gamma correction": rgb_euclidean_gamma_correction_search_radius,
+            "CIE76": cie76_search_radius,
+            "CIE94": cie94_search_radius,
+            "CIEDE2000": lambda base, score: ciede2000_search_radius(
+                base, score, lightness_range, max_chroma
+            ),
+            "CMC 1:1": lambda base, score: cmc_search_radius(base, score, True),
+            "CMC 2:1": lambda base, score: cmc_search_radius(base, score, False),
+        }
+
+    def candidates(self, base: np.ndarray, metric: str, n: int) -> np.ndarray:
+        """
+        Finds palette rows which may be among the n most similar colors.
+
+        Args:
+            base (np.ndarray): Coordinates of the base color in the metric's space.
+            metric (str): Metric name.
+            n (int): Expected number of similar colors.
+
+        Returns:
+            np.ndarray[int]: Sorted palette row indexes, a superset of the top n.
+        """
+        metric_f, space = METRIC_KERNELS[metric]
+        tree = self._trees[space]
+        coords = self._coords[space]
+
+        nearest = tree.query(base, n * _NEIGHBOURS_PER_RESULT)
+        if n >= len(nearest):
+            return np.arange(len(coords))
+        nth_score = np.sort(metric_f(base, coords[nearest]))[n - 1]
+
+        radius = self._search_radii[metric](base, nth_score) * (1 + _RADIUS_SLACK)
+
+        return tree.query_radius(base, radius)
+
+    def find_similar(self, base: np.ndarray, metric: str, n: int) -> np.ndarray:
+        """
+        Finds palette rows of the n colors most similar to the base color.
+
+        Args:
+            base (np.ndarray): Coordinates of the base color in the metric's space.
+            metric (str): Metric name.
+            n (int): Expected number of similar colors.
+
+        Returns:
+            np.ndarray[int]: Palette row indexes sorted from the most similar.
+        """
+        metric_f, space = METRIC_KERNELS[metric]
+        candidates = self.candidates(base, metric, n)
+
+        scores = metric_f(base, self._coords[space][candidates])
+
+        return candidates[top_n_indices(scores, n)]
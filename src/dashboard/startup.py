@@ -0,0 +1,153 @@
+"""
+Report of the time spent on importing modules and constructing the backend.
+
+Every module is imported in a fresh interpreter with `-X importtime`, so the reported
+time includes all of its dependencies which were not loaded yet, as in a cold worker.
+
+The report is printed with:
+    python -m dashboard.startup data/dmc.csv data/ariadna.csv
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+from .backend import Backend
+
+
+MODULES = (
+    "numpy",
+    "converters",
+    "metrics",
+    "metrics.scoring",
+    "images",
+    "dashboard.batch",
+    "pandas",
+    "dashboard.backend",
+    "plotly.graph_objects",
+    "flask",
+    "dash",
+    "dash_bootstrap_components",
+)
+
+
+def import_time(module: str) -> float:
+    """
+    Measures the cumulative import time of a module in a fresh interpreter.
+
+    Args:
+        module (str): Module name.
+
+    Returns:
+        float: Import time in seconds.
+    """
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+    process = subprocess.run(  # noqa: S603
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+
+    # Lines are 'import time: self [us] | cumulative | imported package'
+    for line in reversed(process.stderr.splitlines()):
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+
+    raise ValueError(f"No import time reported for {module}.")
+
+
+def backend_startup_times(
+    dmc_path: Union[Path, str],
+    ariadna_path: Union[Path, str],
+    lookup_dir: Optional[Union[Path, str]] = None,
+    conversion_path: Optional[Union[Path, str]] = None,
+) -> dict[str, float]:
+    """
+    Measures durations of the backend construction steps.
+
+    Args:
+        dmc_path (Union[Path, str]): Path to DMC convertion sheet in CSV.
+        ariadna_path (Union[Path, str]): Path to Ariadna convertion sheet in CSV.
+        lookup_dir (Optional[Union[Path, str]], optional): Directory with lookup tables
+            built by `dashboard.lookup_table`. Defaults to None.
+        conversion_path (Optional[Union[Path, str]], optional): Path of the persisted
+            DMC to Ariadna conversion table. Defaults to None.
+
+    Returns:
+        dict[str, float]: Durations in seconds keyed by the step, with the total.
+    """
+    start_time = time.perf_counter()
+    backend = Backend(
+        dmc_path, ariadna_path, lookup_dir=lookup_dir, conversion_path=conversion_path
+    )
+    total = time.perf_counter() - start_time
+
+    return {**backend.startup_times, "total": total}
+
+
+def format_report(sections: Iterable[tuple[str, dict[str, float]]]) -> str:
+    """
+    Formats durations as a plain text table.
+
+    Args:
+        sections (Iterable[tuple[str, dict[str, float]]]): Section titles and their
+            durations in seconds keyed by the name.
+
+    Returns:
+        str: Report.
+    """
+    lines = []
+    for title, times in sections:
+        lines.append(title)
+        lines.extend(
+            f"  {name:40} {seconds * 1000:9.1f} ms" for name, seconds in times.items()
+        )
+    return "\n".join(lines)
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Prints the startup report from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("dmc", help="path to the DMC CSV")
+    parser.add_argument("ariadna", help="path to the Ariadna CSV")
+    parser.add_argument("--lookup-dir", default=None)
+    parser.add_argument("--conversion-path", default=None)
+    parser.add_argument(
+        "--module",
+        action="append",
+        help="module to measure, can be repeated (default: main dependencies)",
+    )
+    parsed = parser.parse_args(args)
+
+    imports = {module: import_time(module) for module in parsed.module or MODULES}
+    backend = backend_startup_times(
+        parsed.dmc,
+        parsed.ariadna,
+        lookup_dir=parsed.lookup_dir,
+        conversion_path=parsed.conversion_path,
+    )
+
+    print(  # noqa: T201
+        format_report(
+            [
+                ("Import (cold, including dependencies):", imports),
+                ("Backend construction:", backend),
+            ]
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+from dashboard import Backend
+
+
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+
+@pytest.fixture(scope="session")
+def backend() -> Backend:
+    return Backend(dmc_path=DATA_DIR / "dmc.csv", ariadna_path=DATA_DIR / "ariadna.csv")
+
+
+@pytest.fixture
+def orange() -> str:
+    return "#c25b08"
+
+
+@pytest.fixture(scope="session")
+def uncached_backend() -> Backend:
+    return Backend(
+        dmc_path=DATA_DIR / "dmc.csv",
+        ariadna_path=DATA_DIR / "ariadna.csv",
+        cache_size=0,
+    )
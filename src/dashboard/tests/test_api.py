@@ -0,0 +1,82 @@
+import flask
+import pytest
+from flask.testing import FlaskClient
+
+from dashboard import Backend, create_api
+
+
+@pytest.fixture
+def client(backend: Backend) -> FlaskClient:
+    server = flask.Flask(__name__)
+    server.register_blueprint(create_api(backend, max_colors=20, max_n=9))
+    return server.test_client()
+
+
+def test_similar_colors(client: FlaskClient, backend: Backend):
+    colors = ["#c25b08", "2025C7"]
+
+    response = client.post(
+        "/api/similar", json={"colors": colors, "metric": "CMC 1:1", "n": 3}
+    )
+
+    assert response.status_code == 200
+    expected_codes, expected_colors = backend.find_similar_batch(
+        ["#c25b08", "#2025c7"], "CMC 1:1", 3
+    )
+    assert response.json == {
+        "metric": "CMC 1:1",
+        "n": 3,
+        "numbers": expected_codes,
+        "colors": expected_colors,
+    }
+
+
+def test_similar_dmc(client: FlaskClient, backend: Backend):
+    response = client.post("/api/similar", json={"dmc": ["310", "BLANC"]})
+
+    assert response.status_code == 200
+    assert response.json["metric"] == "CIEDE2000"
+    codes, _ = backend.find_similar_dmc("310", "CIEDE2000")
+    assert response.json["numbers"][0] == codes
+
+
+def test_server_timing_header(client: FlaskClient):
+    response = client.post("/api/similar", json={"colors": ["#c25b08"]})
+
+    timings = dict(
+        entry.split(";dur=") for entry in response.headers["Server-Timing"].split(", ")
+    )
+    assert set(timings) == {"parse", "score", "total"}
+    assert float(timings["total"]) >= float(timings["score"])
+
+
+@pytest.mark.parametrize(
+    "query, status",
+    [
+        ([1, 2], 400),
+        ({"colors": ["#c25b08"], "dmc": ["310"]}, 400),
+        ({"colors": "#c25b08"}, 400),
+        ({"colors": ["#c25b0"]}, 400),
+        ({"colors": ["#c25b08"], "metric": "CIE2077"}, 400),
+        ({"colors": ["#c25b08"], "n": 10}, 400),
+        ({"colors": ["#c25b08"], "n": True}, 400),
+        ({"dmc": ["310", "not a code"]}, 400),
+        ({"colors": ["#c25b08"] * 21}, 413),
+    ],
+)
+def test_invalid_queries(client: FlaskClient, query: object, status: int):
+    response = client.post("/api/similar", json=query)
+
+    assert response.status_code == status
+    assert "error" in response.json
+
+
+def test_content_length_limit(backend: Backend):
+    server = flask.Flask(__name__)
+    server.register_blueprint(create_api(backend, max_content_length=64))
+
+    response = server.test_client().post(
+        "/api/similar", json={"colors": ["#c25b08"] * 10}
+    )
+
+    assert response.status_code == 413
@@ -0,0 +1,137 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from converters import InvalidColorError
+from dashboard import Backend
+from metrics.scoring import METRIC_KERNELS
+
+from .conftest import DATA_DIR
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+@pytest.mark.parametrize("n", [1, 5, 9])
+def test_find_similar_matches_scalar_metrics(
+    backend: Backend, orange: str, metric: str, n: int
+):
+    ariadna_df = backend.ariadna_df
+    metric_f = backend.METRICS[metric]
+    scores = np.array([metric_f(orange, c) for c in ariadna_df["rgb"]])
+    expected = ariadna_df.index[np.argsort(scores, kind="stable")[:n]].to_list()
+
+    codes, colors = backend.find_similar(orange, metric, n)
+
+    assert codes == expected
+    assert colors == ariadna_df.loc[expected, "rgb"].to_list()
+
+
+def test_palette_coordinates_are_read_only(backend: Backend):
+    lab = backend.ariadna_coordinates["lab"]
+
+    assert lab.shape == (len(backend.ariadna_df), 3)
+    with pytest.raises(ValueError):
+        lab[0, 0] = 0
+
+
+def test_find_similar_does_not_mutate_backend(backend: Backend, orange: str):
+    columns = backend.ariadna_df.columns.to_list()
+
+    backend.find_similar(orange, "CIEDE2000", 5)
+
+    assert backend.ariadna_df.columns.to_list() == columns
+
+
+def test_find_similar_under_parallel_load(uncached_backend: Backend):
+    rng = np.random.default_rng(seed=0)
+    queries = [
+        (f"#{color:06x}", metric, int(n))
+        for color, metric, n in zip(
+            rng.integers(0, 2 ** 24, size=400),
+            rng.choice(list(METRIC_KERNELS), size=400),
+            rng.integers(1, 10, size=400),
+        )
+    ]
+    expected = [uncached_backend.find_similar(*query) for query in queries]
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(
+            executor.map(lambda q: uncached_backend.find_similar(*q), queries)
+        )
+
+    assert results == expected
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+def test_find_similar_batch_matches_find_similar(
+    uncached_backend: Backend, metric: str
+):
+    base_colors = ["#c25b08", "#000000", "#2025c7", "#fefefe"]
+
+    codes, colors = uncached_backend.find_similar_batch(base_colors, metric, 7)
+
+    for i, base_color in enumerate(base_colors):
+        expected = uncached_backend.find_similar(base_color, metric, 7)
+        assert (codes[i], colors[i]) == expected
+
+
+@pytest.mark.parametrize("n", [3, 12])
+def test_find_similar_dmc_batch_matches_find_similar_dmc(backend: Backend, n: int):
+    dmcs = backend.dmc_df.index[::40].to_list()
+
+    codes, colors = backend.find_similar_dmc_batch(dmcs, "CIE94", n)
+
+    for i, dmc in enumerate(dmcs):
+        assert (codes[i], colors[i]) == backend.find_similar_dmc(dmc, "CIE94", n)
+
+
+def test_find_similar_dmc_batch_unknown_code(backend: Backend):
+    with pytest.raises(KeyError):
+        backend.find_similar_dmc_batch(["310", "not a code"], "CIE76")
+
+
+def test_find_similar_batch_reports_malformed_colors(backend: Backend):
+    with pytest.raises(InvalidColorError) as error:
+        backend.find_similar_batch(["#c25b08", "#c25b0", "c25b08", "red"], "CIE76")
+
+    assert error.value.rows == [1, 3]
+
+
+@pytest.mark.parametrize("warm", [False, True])
+def test_find_similar_accepts_colors_regardless_of_cache(orange: str, warm: bool):
+    backend = Backend(DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv")
+    expected = Backend(
+        DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv", cache_size=0
+    ).find_similar(orange, "CIE76")
+    if warm:
+        backend.find_similar(orange, "CIE76")
+
+    assert backend.find_similar(f" {orange.upper()} ", "CIE76") == expected
+    with pytest.raises(InvalidColorError):
+        backend.find_similar(f"{orange}#", "CIE76")
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        lambda backend: backend.find_similar("#c25b08", "CIE76", -1),
+        lambda backend: backend.find_similar_dmc("310", "CIE76", -1),
+        lambda backend: backend.find_similar_batch(["#c25b08"], "CIE76", -1),
+        lambda backend: backend.find_similar_dmc_batch(["310"], "CIE76", -1),
+    ],
+)
+def test_negative_n_is_rejected(backend: Backend, query: Callable[[Backend], object]):
+    with pytest.raises(ValueError, match="cannot be negative"):
+        query(backend)
+    assert backend.find_similar("#c25b08", "CIE76", 0) == ([], [])
+
+
+def test_malformed_sheet_is_rejected(tmp_path: Path):
+    sheet = (DATA_DIR / "ariadna.csv").read_text().splitlines()
+    sheet[3] = sheet[3].rsplit(",", 1)[0] + ",#fff"
+    (tmp_path / "ariadna.csv").write_text("\n".join(sheet))
+
+    with pytest.raises(InvalidColorError, match="ariadna.csv at rows: 2."):
+        Backend(DATA_DIR / "dmc.csv", tmp_path / "ariadna.csv")
@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from converters import hex_to_dec_primaries
+from dashboard import Backend
+from dashboard.batch import BatchConverter, main
+
+from .conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def converter() -> BatchConverter:
+    return BatchConverter(DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv")
+
+
+@pytest.fixture
+def entries() -> list[str]:
+    return ["#c25b08", "310", "ecru", "not a color", "", "2025C7", "B5200"] * 3
+
+
+def test_parse(converter: BatchConverter, backend: Backend):
+    assert converter.parse("310") == backend.dmc_to_hex("310")
+    assert converter.parse("blanc") == backend.dmc_to_hex("BLANC")
+    assert converter.parse("#C25B08") == "#c25b08"
+    assert converter.parse("c25b08") == "#c25b08"
+    assert converter.parse("#310") is None
+    assert converter.parse("zzz") is None
+
+
+def test_parse_mixed_case_numbers(tmp_path: Path):
+    dmc_path = tmp_path / "dmc.csv"
+    dmc_path.write_text("number,rgb\nWhite,#fcfbf8\nEcru,#f0eada\nb5200,#ffffff\n")
+    converter = BatchConverter(dmc_path, DATA_DIR / "ariadna.csv")
+
+    assert converter.parse("white") == "#fcfbf8"
+    assert converter.parse("ECRU") == "#f0eada"
+    assert converter.parse("Ecru") == "#f0eada"
+    assert converter.parse("B5200") == "#ffffff"
+
+
+def test_parse_batch(converter: BatchConverter, entries: list[str]):
+    colors, primaries = converter.parse_batch(entries)
+
+    assert colors == [converter.parse(entry) for entry in entries]
+    assert primaries.tolist() == [
+        hex_to_dec_primaries(color) for color in colors if color is not None
+    ]
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_convert_csv_matches_backend(
+    converter: BatchConverter,
+    uncached_backend: Backend,
+    entries: list[str],
+    workers: int,
+):
+    output = io.StringIO()
+
+    count = converter.convert(
+        entries, output, "CIEDE2000", n=4, chunk_size=4, workers=workers
+    )
+
+    rows = list(csv.reader(io.StringIO(output.getvalue())))
+    assert rows[0] == ["input", "rgb", "1", "2", "3", "4", "error"]
+    assert count == len(rows) - 1 == 18
+    for entry, row in zip([e for e in entries if e], rows[1:]):
+        assert row[0] == entry
+        color = converter.parse(entry)
+        if color is None:
+            assert row[1:] == ["", "", "", "", "", "unknown color"]
+        else:
+            codes, _ = uncached_backend.find_similar(color, "CIEDE2000", 4)
+            assert row[1:] == [color, *map(str, codes), ""]
+
+
+def test_convert_jsonl(
+    converter: BatchConverter, uncached_backend: Backend, entries: list[str]
+):
+    output = io.StringIO()
+
+    converter.convert(entries, output, "CMC 2:1", n=3, output_format="jsonl", workers=0)
+
+    records = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert records[3] == {"input": "not a color", "error": "unknown color"}
+    codes, colors = uncached_backend.find_similar("#c25b08", "CMC 2:1", 3)
+    assert records[0] == {
+        "input": "#c25b08",
+        "rgb": "#c25b08",
+        "numbers": list(map(str, codes)),
+        "colors": colors,
+    }
+
+
+def test_convert_unknown_format(converter: BatchConverter):
+    with pytest.raises(ValueError):
+        converter.convert([], io.StringIO(), "CIE76", output_format="xml")
+
+
+def test_main(tmp_path: Path, entries: list[str]):
+    input_path = tmp_path / "colors.txt"
+    input_path.write_text("\n".join(entries))
+    output_path = tmp_path / "out.jsonl"
+
+    main(
+        [
+            str(DATA_DIR / "dmc.csv"),
+            str(DATA_DIR / "ariadna.csv"),
+            str(input_path),
+            "-o",
+            str(output_path),
+            "--workers",
+            "1",
+        ]
+    )
+
+    assert len(output_path.read_text().splitlines()) == 18
@@ -0,0 +1,67 @@
+import pytest
+
+from dashboard import Backend
+from dashboard.cache import ResultCache, normalize_color
+
+
+@pytest.mark.parametrize("color", ["#C25B08", "c25b08", " #c25b08"])
+def test_normalize_color(color: str):
+    assert normalize_color(color) == "#c25b08"
+
+
+def test_larger_n_answers_smaller_n():
+    cache = ResultCache(max_size=4)
+    cache.put("#c25b08", "CIE76", 5, ([1, 2, 3, 4, 5], ["a", "b", "c", "d", "e"]))
+
+    assert cache.get("C25B08", "CIE76", 3) == ([1, 2, 3], ["a", "b", "c"])
+    assert cache.get("#c25b08", "CIE76", 6) is None
+    assert cache.get("#c25b08", "CIE94", 3) is None
+    assert cache.stats["hits"] == 1
+    assert cache.stats["misses"] == 2
+
+
+def test_smaller_n_does_not_replace_larger_n():
+    cache = ResultCache(max_size=4)
+    cache.put("#c25b08", "CIE76", 5, ([1, 2, 3, 4, 5], ["a", "b", "c", "d", "e"]))
+    cache.put("#c25b08", "CIE76", 2, ([1, 2], ["a", "b"]))
+
+    assert cache.get("#c25b08", "CIE76", 5) == ([1, 2, 3, 4, 5], list("abcde"))
+
+
+def test_least_recently_used_is_evicted():
+    cache = ResultCache(max_size=2)
+    cache.put("#000001", "CIE76", 1, ([1], ["a"]))
+    cache.put("#000002", "CIE76", 1, ([2], ["b"]))
+    cache.get("#000001", "CIE76", 1)
+    cache.put("#000003", "CIE76", 1, ([3], ["c"]))
+
+    assert cache.get("#000002", "CIE76", 1) is None
+    assert cache.get("#000001", "CIE76", 1) == ([1], ["a"])
+    assert cache.stats["evictions"] == 1
+    assert len(cache) == 2
+
+
+def test_zero_size_disables_cache():
+    cache = ResultCache(max_size=0)
+    cache.put("#000001", "CIE76", 1, ([1], ["a"]))
+
+    assert cache.get("#000001", "CIE76", 1) is None
+
+
+def test_returned_results_are_copies():
+    cache = ResultCache()
+    cache.put("#000001", "CIE76", 1, ([1], ["a"]))
+    cache.get("#000001", "CIE76", 1)[0].append(2)
+
+    assert cache.get("#000001", "CIE76", 1) == ([1], ["a"])
+
+
+def test_backend_answers_repeated_queries_from_cache(backend: Backend, orange: str):
+    expected = backend.find_similar(orange, "CIEDE2000", 7)
+    hits = backend.cache_stats["hits"]
+
+    assert backend.find_similar(orange.upper(), "CIEDE2000", 3) == (
+        expected[0][:3],
+        expected[1][:3],
+    )
+    assert backend.cache_stats["hits"] == hits + 1
@@ -0,0 +1,115 @@
+from pathlib import Path
+
+import pytest
+
+from dashboard import Backend
+from dashboard.conversion_table import ConversionTable, main
+from dashboard.lookup_table import palette_digest
+from metrics.scoring import METRIC_KERNELS
+
+from .conftest import DATA_DIR
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+def test_find_similar_dmc_matches_find_similar(
+    uncached_backend: Backend, metric: str
+):
+    for dmc in uncached_backend.dmc_df.index[::25]:
+        expected = uncached_backend.find_similar(
+            uncached_backend.dmc_to_hex(dmc), metric, 9
+        )
+
+        assert uncached_backend.find_similar_dmc(dmc, metric, 9) == expected
+
+
+def test_find_similar_dmc_above_k(uncached_backend: Backend):
+    dmc = uncached_backend.dmc_df.index[0]
+    base_color = uncached_backend.dmc_to_hex(dmc)
+    expected = uncached_backend.find_similar(base_color, "CIE76", 12)
+
+    assert uncached_backend.find_similar_dmc(dmc, "CIE76", 12) == expected
+
+
+def test_table_is_persisted_and_rebuilt(tmp_path: Path):
+    path = tmp_path / "table.npz"
+    dmc_path = tmp_path / "dmc.csv"
+    dmc_path.write_text((DATA_DIR / "dmc.csv").read_text())
+    ariadna_path = DATA_DIR / "ariadna.csv"
+
+    table = ConversionTable.load_or_build(path, dmc_path, ariadna_path)
+    mtime = path.stat().st_mtime_ns
+
+    loaded = ConversionTable.load_or_build(path, dmc_path, ariadna_path)
+    assert path.stat().st_mtime_ns == mtime
+    assert loaded.digests == table.digests
+    assert loaded.lookup(3, "CIEDE2000", 5).tolist() == (
+        table.lookup(3, "CIEDE2000", 5).tolist()
+    )
+
+    dmc_path.write_text(dmc_path.read_text().replace("#d2d1cf", "#000000"))
+    rebuilt = ConversionTable.load_or_build(path, dmc_path, ariadna_path)
+    assert rebuilt.digests != table.digests
+    assert rebuilt.lookup(0, "CIE76", 1)[0] != table.lookup(0, "CIE76", 1)[0]
+
+
+def test_export_chart(tmp_path: Path, uncached_backend: Backend):
+    output = tmp_path / "chart.csv"
+
+    main([str(DATA_DIR / "dmc.csv"), str(DATA_DIR / "ariadna.csv"), str(output)])
+
+    lines = output.read_text().splitlines()
+    dmc = uncached_backend.dmc_df.index[0]
+    codes, _ = uncached_backend.find_similar_dmc(dmc, "RGB euclidean", 9)
+
+    assert lines[0] == "dmc,rgb,metric," + ",".join(map(str, range(1, 10)))
+    assert len(lines) == 1 + len(METRIC_KERNELS) * len(uncached_backend.dmc_df)
+    assert lines[1].split(",")[3:] == [str(code) for code in codes]
+
+
+def test_backend_builds_table_from_read_sheets(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    path = tmp_path / "table.npz"
+    builds = []
+    monkeypatch.setattr(
+        ConversionTable, "build", lambda *args, **kwargs: builds.append(args)
+    )
+
+    backend = Backend(
+        DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv", conversion_path=path
+    )
+    mtime = path.stat().st_mtime_ns
+    reloaded = Backend(
+        DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv", conversion_path=path
+    )
+
+    assert not builds
+    assert path.stat().st_mtime_ns == mtime
+    assert ConversionTable.load(path).digests == (
+        palette_digest(DATA_DIR / "dmc.csv"),
+        palette_digest(DATA_DIR / "ariadna.csv"),
+    )
+    assert reloaded.find_similar_dmc("310", "CIE94") == backend.find_similar_dmc(
+        "310", "CIE94"
+    )
+
+
+def test_table_of_small_palette_is_current(tmp_path: Path):
+    path = tmp_path / "table.npz"
+    ariadna_path = tmp_path / "ariadna.csv"
+    ariadna_path.write_text(
+        "number,rgb\n1,#000000\n2,#ff0000\n3,#00ff00\n4,#0000ff\n5,#ffffff\n"
+    )
+
+    Backend(DATA_DIR / "dmc.csv", ariadna_path, conversion_path=path)
+    mtime = path.stat().st_mtime_ns
+    backend = Backend(DATA_DIR / "dmc.csv", ariadna_path, conversion_path=path)
+
+    assert path.stat().st_mtime_ns == mtime
+    assert ConversionTable.load(path).k == 5
+    assert len(backend.find_similar_dmc("310", "CIE76", 9)[0]) == 5
+
+    digests = ConversionTable.load(path).digests
+    ConversionTable.build(DATA_DIR / "dmc.csv", ariadna_path, k=3).save(path)
+    assert ConversionTable.load_if_current(path, digests) is None
+    assert ConversionTable.load_if_current(path, digests, k=3) is not None
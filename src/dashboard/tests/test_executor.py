@@ -0,0 +1,161 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import flask
+import pytest
+
+from dashboard import (
+    Backend,
+    QueryExecutor,
+    QueueFullError,
+    StageTimings,
+    create_metrics_api,
+)
+
+
+class _BlockingBackend:
+    def __init__(self):
+        self.timings = StageTimings()
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def find_similar(self, base_color: str, metric: str, n: int):
+        self.calls.append((base_color, metric, n))
+        self.started.set()
+        self.release.wait(5)
+        return [base_color], [base_color]
+
+
+def test_results_match_backend(backend: Backend, orange: str):
+    executor = QueryExecutor(backend, workers=2)
+
+    assert executor.find_similar(orange.upper(), "CIE94", 4) == backend.find_similar(
+        orange, "CIE94", 4
+    )
+    assert executor.find_similar_dmc("310", "CIE76") == backend.find_similar_dmc(
+        "310", "CIE76"
+    )
+    assert executor.stats["executed"] == 2
+    executor.shutdown()
+
+
+def test_identical_queries_are_coalesced():
+    backend = _BlockingBackend()
+    executor = QueryExecutor(backend, workers=2)
+
+    first = executor.submit(
+        "key", "CIE76", 5, backend.find_similar, "#000000", "CIE76", 5
+    )
+    backend.started.wait(5)
+    with ThreadPoolExecutor(max_workers=4) as clients:
+        results = [
+            clients.submit(executor.find_similar, "#000000", "CIE76", 5)
+            for _ in range(4)
+        ]
+        while executor.stats["coalesced"] < 3:
+            threading.Event().wait(0.001)
+        backend.release.set()
+        results = [result.result(5) for result in results]
+
+    assert first.result(5) == (["#000000"], ["#000000"])
+    assert results == [(["#000000"], ["#000000"])] * 4
+    assert len(backend.calls) == 2
+    assert executor.stats["executed"] == 2
+    assert executor.stats["coalesced"] == 3
+    assert executor.stats["coalescing_ratio"] == pytest.approx(0.6)
+    executor.shutdown()
+
+
+def test_full_queue_rejects_queries():
+    backend = _BlockingBackend()
+    executor = QueryExecutor(backend, workers=1, max_queue=1)
+
+    def submit(color: str):
+        return executor.submit(
+            color, "CIE76", 5, backend.find_similar, color, "CIE76", 5
+        )
+
+    submit("#000000")
+    backend.started.wait(5)
+    submit("#ffffff")
+
+    with pytest.raises(QueueFullError):
+        submit("#ff0000")
+    assert submit("#ffffff")
+    assert executor.stats["rejected"] == 1
+    assert executor.stats["queued"] == 1
+
+    backend.release.set()
+    executor.shutdown()
+    assert executor.stats["queued"] == 0
+    assert sum(backend.timings.snapshot()[("queue_wait", "CIE76", 5)][0]) == 2
+
+
+def test_to_prometheus():
+    backend = _BlockingBackend()
+    backend.release.set()
+    executor = QueryExecutor(backend, workers=1, max_queue=0)
+
+    with pytest.raises(QueueFullError):
+        executor.find_similar("#000000", "CIE76")
+    lines = executor.to_prometheus().splitlines()
+
+    assert "# TYPE flossverter_queries_total counter" in lines
+    assert 'flossverter_queries_total{outcome="executed"} 0' in lines
+    assert 'flossverter_queries_total{outcome="rejected"} 1' in lines
+    assert "flossverter_coalescing_ratio 0.0" in lines
+    assert "flossverter_queue_depth 0" in lines
+
+
+def test_metrics_endpoint(backend: Backend):
+    executor = QueryExecutor(backend, workers=1)
+    executor.find_similar_dmc("310", "CIE94")
+    server = flask.Flask(__name__)
+    server.register_blueprint(
+        create_metrics_api(backend.timings, executor=executor)
+    )
+
+    text = server.test_client().get("/metrics").get_data(as_text=True)
+
+    assert 'flossverter_queries_total{outcome="executed"} 1' in text
+    assert 'flossverter_stage_seconds_count{stage="queue_wait"' in text
+    executor.shutdown()
+
+
+def test_invalid_arguments(backend: Backend):
+    with pytest.raises(ValueError):
+        QueryExecutor(backend, workers=0)
+
+
+def test_profiled_requests_sample_scoring(uncached_backend: Backend):
+    executor = QueryExecutor(uncached_backend, workers=1)
+    server = flask.Flask(__name__)
+    server.register_blueprint(
+        create_metrics_api(
+            uncached_backend.timings, allow_profiling=True, executor=executor
+        )
+    )
+
+    @server.get("/similar")
+    def similar() -> str:
+        start_time = time.perf_counter()
+        color = 0
+        while time.perf_counter() - start_time < 0.1:
+            executor.find_similar(f"#{color:06x}", "CIEDE2000", 5)
+            color += 1
+        return "done"
+
+    client = server.test_client()
+    response = client.get("/similar", headers={"X-Profile": "1"})
+    profile = client.get(f"/metrics/profiles/{response.headers['X-Profile-Id']}")
+
+    assert "_find_similar (" in profile.text
+    assert "find_similar_rows (" in profile.text
+    assert "_run (" not in profile.text
+    assert executor.stats["queued"] == 0
+
+    client.get("/similar")
+    assert uncached_backend.timings.snapshot()[("queue_wait", "CIEDE2000", 5)]
+    executor.shutdown()
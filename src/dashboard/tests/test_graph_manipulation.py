@@ -0,0 +1,19 @@
+from dashboard import clear_graph, clear_swatch, draw_graph, draw_swatch
+
+
+def test_draw_swatch_matches_draw_graph():
+    args = ("#c25b08", "920", ["#c0580a", "#b85a12"], ["1521", "1523"])
+
+    assert draw_swatch(*args) == draw_graph(*args).to_plotly_json()
+
+
+def test_draw_swatch_is_cached_by_result_set():
+    first = draw_swatch("#c25b08", None, ["#c0580a"], ["1521"])
+
+    assert draw_swatch("#c25b08", None, ["#c0580a"], ["1521"]) is first
+    assert draw_swatch("#c25b08", "920", ["#c0580a"], ["1521"]) is not first
+
+
+def test_clear_swatch():
+    assert clear_swatch() is clear_swatch()
+    assert clear_swatch() == clear_graph().to_plotly_json()
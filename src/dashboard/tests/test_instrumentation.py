@@ -0,0 +1,134 @@
+import os
+import threading
+import time
+
+import flask
+import pytest
+from flask.testing import FlaskClient
+
+from dashboard import Backend, StageTimings, create_metrics_api
+from dashboard.instrumentation import SamplingProfiler, process_memory
+
+from .conftest import DATA_DIR
+
+
+def test_stage_timings_histogram():
+    timings = StageTimings(buckets=(0.001, 0.01))
+
+    timings.observe("scoring", "CIE76", 5, 0.0005)
+    timings.observe("scoring", "CIE76", 5, 0.005)
+    timings.observe("scoring", "CIE76", 5, 0.05)
+    with timings.timed("top_n", "CIE76", 5):
+        pass
+
+    snapshot = timings.snapshot()
+    assert snapshot[("scoring", "CIE76", 5)] == ([1, 1, 1], pytest.approx(0.0555))
+    assert sum(snapshot[("top_n", "CIE76", 5)][0]) == 1
+
+    timings.clear()
+    assert timings.snapshot() == {}
+
+
+def test_to_prometheus():
+    timings = StageTimings(buckets=(0.001, 0.01))
+    timings.observe("scoring", 'CMC "1:1"', 3, 0.005)
+    timings.observe("scoring", 'CMC "1:1"', 3, 0.02)
+
+    lines = timings.to_prometheus().splitlines()
+
+    labels = 'stage="scoring",metric="CMC \\"1:1\\"",n="3"'
+    assert "# TYPE flossverter_stage_seconds histogram" in lines
+    assert f'flossverter_stage_seconds_bucket{{{labels},le="0.001"}} 0' in lines
+    assert f'flossverter_stage_seconds_bucket{{{labels},le="0.01"}} 1' in lines
+    assert f'flossverter_stage_seconds_bucket{{{labels},le="+Inf"}} 2' in lines
+    assert f"flossverter_stage_seconds_count{{{labels}}} 2" in lines
+    assert f"flossverter_stage_seconds_sum{{{labels}}} 0.025" in lines
+
+
+def test_backend_records_stages(orange: str):
+    timings = StageTimings()
+    backend = Backend(
+        dmc_path=DATA_DIR / "dmc.csv",
+        ariadna_path=DATA_DIR / "ariadna.csv",
+        timings=timings,
+    )
+
+    backend.find_similar(orange, "CIE94", 4)
+    backend.find_similar(orange, "CIE94", 4)
+    backend.find_similar_dmc("310", "CIE94", 4)
+
+    counts = {labels: sum(c) for labels, (c, _) in timings.snapshot().items()}
+    assert counts == {
+        ("find_similar", "CIE94", 4): 2,
+        ("conversion", "CIE94", 4): 1,
+        ("scoring", "CIE94", 4): 1,
+        ("top_n", "CIE94", 4): 1,
+        ("table_lookup", "CIE94", 4): 1,
+    }
+
+
+def _busy_wait(seconds: float) -> None:
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_sampling_profiler():
+    profiler = SamplingProfiler(threading.get_ident(), interval=0.001)
+
+    profiler.start()
+    _busy_wait(0.1)
+    samples = profiler.stop()
+
+    assert samples
+    assert any("_busy_wait (" in stack for stack in samples)
+    assert profiler.collapsed().count("\n") == len(samples)
+
+
+def _client(allow_profiling: bool) -> FlaskClient:
+    timings = StageTimings()
+    timings.observe("draw", "CIE76", 5, 0.001)
+    server = flask.Flask(__name__)
+    server.register_blueprint(create_metrics_api(timings, allow_profiling))
+
+    @server.get("/busy")
+    def busy() -> str:
+        _busy_wait(0.05)
+        return "done"
+
+    return server.test_client()
+
+
+def test_metrics_endpoint():
+    response = _client(False).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'stage="draw",metric="CIE76",n="5"' in response.text
+    assert f'flossverter_process_memory_bytes{{pid="{os.getpid()}",kind="rss"}}' in (
+        response.text
+    )
+
+
+def test_process_memory():
+    memory = process_memory()
+
+    assert memory["rss"] > 0
+    if "shared" in memory:
+        assert memory["shared"] + memory["private"] == memory["rss"]
+
+
+@pytest.mark.parametrize("allow_profiling", [False, True])
+def test_profiled_request(allow_profiling: bool):
+    client = _client(allow_profiling)
+
+    assert "X-Profile-Id" not in client.get("/busy").headers
+    response = client.get("/busy", headers={"X-Profile": "1"})
+
+    if not allow_profiling:
+        assert "X-Profile-Id" not in response.headers
+        return
+    profile = client.get(f"/metrics/profiles/{response.headers['X-Profile-Id']}")
+    assert profile.status_code == 200
+    assert "busy (" in profile.text
+    assert client.get("/metrics/profiles/missing").status_code == 404
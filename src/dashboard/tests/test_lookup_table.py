@@ -0,0 +1,133 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from converters import InvalidColorError
+from dashboard import Backend
+from dashboard.lookup_table import (
+    LookupTable,
+    build_lookup_table,
+    gamut_primaries,
+    load_lookup_tables,
+    palette_digest,
+    table_path,
+)
+
+from .conftest import DATA_DIR
+
+
+@pytest.fixture
+def palette_csv(tmp_path: Path) -> Path:
+    path = tmp_path / "palette.csv"
+    path.write_text(
+        "number,rgb\n1,#000000\n2,#ff0000\n3,#00ff00\n4,#0000ff\n5,#ffffff\n6,#808080\n"
+    )
+    return path
+
+
+def test_gamut_primaries():
+    assert gamut_primaries(0xC25B08, 0xC25B0A).tolist() == [
+        [0xC2, 0x5B, 0x08],
+        [0xC2, 0x5B, 0x09],
+    ]
+
+
+def test_build_lookup_table_matches_brute_force(palette_csv: Path, tmp_path: Path):
+    lookup_dir = tmp_path / "lookup"
+    stale = table_path(lookup_dir, palette_csv, "RGB euclidean", "0" * 16)
+    stale.parent.mkdir()
+    stale.touch()
+
+    path = build_lookup_table(
+        palette_csv, lookup_dir, "RGB euclidean", k=3, chunk_size=2 ** 20, workers=2
+    )
+    table = LookupTable(path)
+
+    palette = gamut_primaries(0, 2 ** 24)[
+        [0x000000, 0xFF0000, 0x00FF00, 0x0000FF, 0xFFFFFF, 0x808080]
+    ]
+    rng = np.random.default_rng(seed=0)
+    for color in rng.integers(0, 2 ** 24, size=50):
+        rgb = gamut_primaries(color, color + 1)
+        scores = ((palette - rgb) ** 2).sum(axis=1)
+        expected = np.argsort(scores, kind="stable")[:3]
+
+        assert table.lookup(f"#{color:06x}", 3).tolist() == expected.tolist()
+
+    assert table.k == 3
+    assert not stale.exists()
+    assert path.name.endswith(f"{palette_digest(palette_csv)}.npy")
+
+
+def test_build_keeps_tables_of_other_palettes(palette_csv: Path, tmp_path: Path):
+    lookup_dir = tmp_path / "lookup"
+    other_csv = tmp_path / "other.csv"
+    other_csv.write_text("number,rgb\n1,#000000\n2,#ffffff\n")
+    other = build_lookup_table(
+        other_csv, lookup_dir, "RGB euclidean", k=1, chunk_size=2 ** 23, workers=1
+    )
+    stale = table_path(lookup_dir, palette_csv, "RGB euclidean", "0" * 16)
+    stale.touch()
+    running = stale.with_name(f"{stale.stem}.tmp.npy")
+    running.touch()
+
+    path = build_lookup_table(
+        palette_csv, lookup_dir, "RGB euclidean", k=1, chunk_size=2 ** 23, workers=1
+    )
+
+    assert sorted(lookup_dir.iterdir()) == sorted([other, path, running])
+    assert list(load_lookup_tables(lookup_dir, other_csv)) == ["RGB euclidean"]
+    assert LookupTable(other).lookup("#101010", 1).tolist() == [0]
+
+
+def test_tables_are_invalidated_by_palette_changes(palette_csv: Path, tmp_path: Path):
+    table = np.lib.format.open_memmap(
+        table_path(tmp_path, palette_csv, "CIE76", palette_digest(palette_csv)),
+        mode="w+",
+        dtype=np.uint16,
+        shape=(2 ** 24, 1),
+    )
+    del table
+
+    assert list(load_lookup_tables(tmp_path, palette_csv)) == ["CIE76"]
+
+    palette_csv.write_text(palette_csv.read_text() + "7,#123456\n")
+
+    assert load_lookup_tables(tmp_path, palette_csv) == {}
+
+
+def test_backend_uses_lookup_tables(tmp_path: Path, orange: str):
+    ariadna_path = DATA_DIR / "ariadna.csv"
+    table = np.lib.format.open_memmap(
+        table_path(tmp_path, ariadna_path, "CIE76", palette_digest(ariadna_path)),
+        mode="w+",
+        dtype=np.uint16,
+        shape=(2 ** 24, 2),
+    )
+    table[int(orange.lstrip("#"), 16)] = [7, 3]
+    del table
+
+    backend = Backend(DATA_DIR / "dmc.csv", ariadna_path, lookup_dir=tmp_path)
+    codes, _ = backend.find_similar(orange, "CIE76", 2)
+
+    assert codes == backend.ariadna_df.index[[7, 3]].to_list()
+    assert backend.find_similar(orange, "CIE76", 3)[0][:2] != codes
+
+
+@pytest.mark.parametrize("color", ["#fff", "0x00ff00", "-1", "ff_ff_ff", "#c25b08#"])
+def test_malformed_colors_on_table_path(tmp_path: Path, color: str):
+    ariadna_path = DATA_DIR / "ariadna.csv"
+    path = table_path(tmp_path, ariadna_path, "CIE76", palette_digest(ariadna_path))
+    table = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint16, shape=(2 ** 24, 2)
+    )
+    del table
+
+    backend = Backend(DATA_DIR / "dmc.csv", ariadna_path, lookup_dir=tmp_path)
+
+    with pytest.raises(InvalidColorError):
+        LookupTable(path).lookup(color, 2)
+    with pytest.raises(InvalidColorError):
+        backend.find_similar(color, "CIE76", 2)
+    assert backend.cache_stats["size"] == 0
@@ -0,0 +1,149 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from converters import InvalidColorError
+from dashboard import Backend, Palette, PaletteRegistry
+from dashboard.conversion_table import ConversionTable
+from metrics.scoring import METRIC_KERNELS
+
+from .conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def registry() -> PaletteRegistry:
+    registry = PaletteRegistry()
+    registry.read("DMC", DATA_DIR / "dmc.csv")
+    registry.read("Ariadna", DATA_DIR / "ariadna.csv")
+    return registry
+
+
+def test_read(registry: PaletteRegistry, backend: Backend):
+    palette = registry["Ariadna"]
+
+    assert registry.names == ["DMC", "Ariadna"]
+    assert "Anchor" not in registry
+    assert len(palette) == len(backend.ariadna_df)
+    assert palette.codes.tolist() == backend.ariadna_df.index.astype(str).tolist()
+    np.testing.assert_array_equal(
+        palette.coordinates["lab"], backend.ariadna_coordinates["lab"]
+    )
+
+
+def test_rows(registry: PaletteRegistry):
+    palette = registry["DMC"]
+
+    rows = palette.rows(["310", "B5200"])
+
+    assert palette.codes[rows].tolist() == ["310", "B5200"]
+    with pytest.raises(KeyError):
+        palette.rows(["310", "not a code"])
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+@pytest.mark.parametrize("n", [1, 5, 12])
+def test_convert_matches_backend(
+    registry: PaletteRegistry, backend: Backend, metric: str, n: int
+):
+    for dmc in ["310", "B5200", "3865", "699"]:
+        codes, colors = registry.convert(dmc, "DMC", "Ariadna", metric, n)
+        expected_codes, expected_colors = backend.find_similar_dmc(dmc, metric, n)
+
+        assert codes == [str(code) for code in expected_codes]
+        assert colors == expected_colors
+
+
+@pytest.mark.parametrize("n", [3, 12])
+def test_convert_in_reverse_direction(registry: PaletteRegistry, n: int):
+    ariadna = registry["Ariadna"]
+    codes = ariadna.codes[:20].tolist()
+
+    converted, colors = registry.convert_batch(codes, "Ariadna", "DMC", "CIE94", n)
+
+    for code, expected_codes, expected_colors in zip(codes, converted, colors):
+        color = ariadna.colors[ariadna.rows([code])[0]]
+        assert registry.find_similar(color, "DMC", "CIE94", n) == (
+            expected_codes,
+            expected_colors,
+        )
+
+
+def test_conversion_tables_are_built_once(registry: PaletteRegistry):
+    table = registry.conversion_table("DMC", "Ariadna")
+
+    assert registry.conversion_table("DMC", "Ariadna") is table
+    assert registry.conversion_table("Ariadna", "DMC") is not table
+
+
+def test_slow_table_build_does_not_block_other_pairs(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    registry = PaletteRegistry(k=2)
+    for name, colors in [("A", ["#000000", "#ffffff"]), ("B", ["#ff0000", "#00ff00"])]:
+        registry.register(Palette(name, ["a", "b"], colors))
+    build = ConversionTable.from_coordinates
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build(*args: object) -> ConversionTable:
+        if not started.is_set():
+            started.set()
+            release.wait(5)
+        return build(*args)
+
+    monkeypatch.setattr(ConversionTable, "from_coordinates", slow_build)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        slow = pool.submit(registry.conversion_table, "A", "B")
+        started.wait(5)
+        waiting = pool.submit(registry.conversion_table, "A", "B")
+
+        assert registry.conversion_table("B", "A") is not None
+        assert not slow.done()
+        release.set()
+
+        assert waiting.result(5) is slow.result(5)
+
+
+def test_register_replaces_palette_and_its_tables(tmp_path: Path):
+    registry = PaletteRegistry(k=3)
+    registry.read("DMC", DATA_DIR / "dmc.csv")
+    registry.register(Palette("Custom", ["a", "b"], ["#000000", "#ffffff"]))
+    table = registry.conversion_table("DMC", "Custom")
+
+    registry.register(Palette("Custom", ["c", "d"], ["#ff0000", "#00ff00"]))
+
+    assert registry.conversion_table("DMC", "Custom") is not table
+    assert registry.convert("321", "DMC", "Custom", "CIE76", 5)[0] == ["c", "d"]
+
+
+def test_convert_uses_palettes_of_its_table(monkeypatch: pytest.MonkeyPatch):
+    registry = PaletteRegistry(k=2)
+    source = Palette("S", ["s"], ["#101010"])
+    registry.register(source)
+    registry.register(Palette("T", ["a", "b"], ["#000000", "#ffffff"]))
+    replacement = Palette("T", ["c", "d", "e"], ["#ffffff", "#ff0000", "#111111"])
+    rows = source.rows
+
+    def rows_replacing_target(codes: list[str]) -> np.ndarray:
+        # The target palette is replaced by another thread in the middle of a query
+        registry.register(replacement)
+        return rows(codes)
+
+    monkeypatch.setattr(source, "rows", rows_replacing_target)
+
+    assert registry.convert("s", "S", "T", "CIE76", 2) == (
+        ["a", "b"],
+        ["#000000", "#ffffff"],
+    )
+    assert registry.convert("s", "S", "T", "CIE76", 2)[0] == ["e", "c"]
+
+
+def test_invalid_palettes(tmp_path: Path):
+    with pytest.raises(ValueError, match="duplicated"):
+        Palette("Custom", ["a", "a"], ["#000000", "#ffffff"])
+
+    (tmp_path / "custom.csv").write_text("number,rgb\na,#000000\nb,#ffff\n")
+    with pytest.raises(InvalidColorError, match="custom.csv at rows: 1."):
+        Palette.read("Custom", tmp_path / "custom.csv")
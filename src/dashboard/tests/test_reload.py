@@ -0,0 +1,276 @@
+import logging
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from converters import InvalidColorError
+from dashboard import Backend, PaletteWatcher
+from dashboard.conversion_table import ConversionTable
+from dashboard.palette_diff import PaletteDiff
+from metrics.scoring import METRIC_KERNELS
+
+from .conftest import DATA_DIR
+
+
+@pytest.fixture
+def palette_paths(tmp_path: Path) -> tuple[Path, Path]:
+    dmc_path, ariadna_path = tmp_path / "dmc.csv", tmp_path / "ariadna.csv"
+    shutil.copy(DATA_DIR / "dmc.csv", dmc_path)
+    shutil.copy(DATA_DIR / "ariadna.csv", ariadna_path)
+    return dmc_path, ariadna_path
+
+
+def edit_sheet(path: Path, edit: Callable[[pd.DataFrame], pd.DataFrame]) -> None:
+    df = pd.read_csv(path, dtype=str)
+    edit(df).to_csv(path, index=False)
+
+
+def assert_same_results(backend: Backend, expected: Backend):
+    base_colors = expected.ariadna_df["rgb"].iloc[::15].to_list() + ["#c25b08"]
+    for metric in METRIC_KERNELS:
+        for base_color in base_colors:
+            assert backend.find_similar(base_color, metric, 7) == (
+                expected.find_similar(base_color, metric, 7)
+            )
+        for dmc in expected.dmc_df.index[::20]:
+            assert backend.find_similar_dmc(dmc, metric) == (
+                expected.find_similar_dmc(dmc, metric)
+            )
+
+
+def test_palette_diff():
+    old = pd.DataFrame(
+        {"rgb": ["#000000", "#111111", "#222222", "#333333"]},
+        index=["a", "b", "c", "d"],
+    )
+    new = pd.DataFrame(
+        {"rgb": ["#000000", "#121212", "#333333", "#444444"]},
+        index=["a", "b", "d", "e"],
+    )
+
+    diff = PaletteDiff.between(old, new)
+
+    assert diff.old_rows.tolist() == [0, -1, 3, -1]
+    assert diff.old_to_new.tolist() == [0, -1, -1, 2]
+    assert diff.fresh.tolist() == [1, 3]
+    assert diff.stale.tolist() == [1, 2]
+    assert diff.changed and diff.keeps_order
+    assert diff.summary(old, new) == {
+        "added": ["e"],
+        "changed": ["b"],
+        "removed": ["c"],
+    }
+    assert not PaletteDiff.between(old, new.iloc[::-1]).keeps_order
+    assert not PaletteDiff.between(old, old).changed
+
+
+def test_update_coordinates():
+    old = pd.DataFrame({"rgb": ["#000000", "#c25b08"]}, index=["a", "b"])
+    new = pd.DataFrame({"rgb": ["#c25b08", "#ffffff"]}, index=["b", "c"])
+    primaries = np.array([[194, 91, 8], [255, 255, 255]])
+    old_coords = {
+        "rgb": np.array([[0.0, 0.0, 0.0], [194.0, 91.0, 8.0]]),
+        "lab": np.array([[0.0, 0.0, 0.0], [1.0, 2.0, 3.0]]),
+    }
+
+    coords = PaletteDiff.between(old, new).update_coordinates(old_coords, primaries)
+
+    assert coords["lab"][0].tolist() == [1.0, 2.0, 3.0]
+    assert coords["rgb"][1].tolist() == [255.0, 255.0, 255.0]
+    assert coords["lab"][1, 0] == pytest.approx(100.0, abs=1e-3)
+    assert not coords["lab"].flags.writeable
+
+
+def test_reload_matches_new_backend(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+    for metric in METRIC_KERNELS:
+        for base_color in backend.dmc_df["rgb"].iloc[::10]:
+            backend.find_similar(base_color, metric, 5)
+    cached = backend.cache_stats["size"]
+
+    edit_sheet(dmc_path, lambda df: df.replace({"rgb": {"#d2d1cf": "#c25b08"}}))
+    edit_sheet(
+        ariadna_path,
+        lambda df: pd.concat(
+            [
+                df.drop(index=[5, 40]).replace({"rgb": {"#ffff62": "#c35c0a"}}),
+                pd.DataFrame([{"number": "9999", "rgb": "#7a1f40"}]),
+            ]
+        ),
+    )
+    removed = pd.read_csv(DATA_DIR / "ariadna.csv", dtype=str)["number"][[5, 40]]
+
+    summary = backend.reload()
+
+    assert summary["dmc"] == {"added": [], "changed": ["1"], "removed": []}
+    assert summary["ariadna"] == {
+        "added": ["9999"],
+        "changed": ["1503"],
+        "removed": removed.to_list(),
+    }
+    assert 0 < summary["conversion_rows"] < len(backend.dmc_df)
+    assert 0 < summary["cache_dropped"] < cached
+    assert backend.cache_stats["size"] == cached - summary["cache_dropped"]
+
+    expected = Backend(dmc_path, ariadna_path, cache_size=0)
+    assert_same_results(backend, expected)
+
+    table = backend._palettes.conversion_table
+    rebuilt = ConversionTable.build(dmc_path, ariadna_path)
+    rows = np.arange(len(expected.dmc_df))
+    assert table.digests == rebuilt.digests
+    for metric in METRIC_KERNELS:
+        np.testing.assert_array_equal(
+            table.lookup(rows, metric, table.k), rebuilt.lookup(rows, metric, table.k)
+        )
+
+
+def test_reload_of_reordered_palette(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+    backend.find_similar("#c25b08", "CIE76")
+
+    edit_sheet(ariadna_path, lambda df: df.iloc[::-1])
+    summary = backend.reload()
+
+    assert summary["ariadna"] == {"added": [], "changed": [], "removed": []}
+    assert summary["conversion_rows"] == len(backend.dmc_df)
+    assert summary["cache_dropped"] == 1
+    assert_same_results(backend, Backend(dmc_path, ariadna_path, cache_size=0))
+
+
+def test_reload_without_changes(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+
+    assert backend.reload() is None
+    ariadna_path.write_bytes(ariadna_path.read_bytes())
+    assert backend.reload() is None
+
+
+def test_failed_reload_keeps_palettes(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+    expected = backend.find_similar("#c25b08", "CIEDE2000")
+
+    ariadna_path.write_text(ariadna_path.read_text().replace("#ffff62", "#ffff6"))
+    with pytest.raises(InvalidColorError):
+        backend.reload()
+
+    assert backend.find_similar("#c25b08", "CIEDE2000") == expected
+    assert backend.ariadna_df.loc["1503", "rgb"] == "#ffff62"
+
+
+def test_reload_saves_conversion_table(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    conversion_path = dmc_path.parent / "lookup" / "table.npz"
+    backend = Backend(dmc_path, ariadna_path, conversion_path=conversion_path)
+
+    edit_sheet(dmc_path, lambda df: df.replace({"rgb": {"#d2d1cf": "#000000"}}))
+    backend.reload()
+
+    saved = ConversionTable.load(conversion_path)
+    assert saved.digests == backend._palettes.conversion_table.digests
+    assert sorted(conversion_path.parent.iterdir()) == [
+        conversion_path,
+        conversion_path.with_name("table.npz.lock"),
+    ]
+
+
+def test_processes_reloading_an_edit_save_table_once(
+    palette_paths: tuple[Path, Path], monkeypatch: pytest.MonkeyPatch
+):
+    dmc_path, ariadna_path = palette_paths
+    conversion_path = dmc_path.parent / "table.npz"
+    # Backends of server workers, each opening the lock file on its own
+    workers = [
+        Backend(dmc_path, ariadna_path, conversion_path=conversion_path)
+        for _ in range(4)
+    ]
+    saved = []
+    save = ConversionTable.save
+
+    def counted_save(table: ConversionTable, path: Path) -> None:
+        saved.append(table.digests)
+        save(table, path)
+
+    monkeypatch.setattr(ConversionTable, "save", counted_save)
+    edit_sheet(dmc_path, lambda df: df.replace({"rgb": {"#d2d1cf": "#000000"}}))
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        summaries = list(pool.map(Backend.reload, workers))
+
+    assert all(summary["conversion_rows"] for summary in summaries)
+    assert saved == [workers[0]._palettes.conversion_table.digests]
+    assert ConversionTable.load(conversion_path).digests == saved[0]
+
+
+def test_watcher(palette_paths: tuple[Path, Path]):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+    summaries, errors = [], []
+    watcher = PaletteWatcher(
+        backend, interval=0.01, on_reload=summaries.append, on_error=errors.append
+    )
+
+    assert watcher.check() is None
+
+    ariadna_path.write_text(ariadna_path.read_text().replace("#ffff62", "#ffff6"))
+    assert watcher.check() is None
+    assert isinstance(errors[0], InvalidColorError)
+    assert watcher.check() is None
+    assert len(errors) == 1 and not summaries
+
+    reloaded = threading.Event()
+    watcher = PaletteWatcher(
+        backend, interval=0.01, on_reload=lambda summary: reloaded.set()
+    ).start()
+    ariadna_path.write_text(ariadna_path.read_text().replace("#ffff6", "#c35c0a"))
+    assert reloaded.wait(5)
+    watcher.stop()
+
+    assert backend.ariadna_df.loc["1503", "rgb"] == "#c35c0a"
+
+
+def test_watcher_reloads_edits_made_before_it_was_created(
+    palette_paths: tuple[Path, Path],
+):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+
+    # E.g. edited between a server's preload and the start of its workers
+    edit_sheet(ariadna_path, lambda df: df.replace({"rgb": {"#ffff62": "#c35c0a"}}))
+    watcher = PaletteWatcher(backend)
+
+    assert watcher.check()["ariadna"]["changed"] == ["1503"]
+    assert watcher.check() is None
+
+
+def test_watcher_logs_errors_without_callback(
+    palette_paths: tuple[Path, Path], caplog: pytest.LogCaptureFixture
+):
+    dmc_path, ariadna_path = palette_paths
+    backend = Backend(dmc_path, ariadna_path)
+    ariadna_path.write_text(ariadna_path.read_text().replace("#ffff62", "#ffff6"))
+
+    with caplog.at_level(logging.ERROR, logger="dashboard.reload"):
+        watcher = PaletteWatcher(backend, interval=0.01).start()
+        for _ in range(500):
+            if caplog.records:
+                break
+            threading.Event().wait(0.01)
+        watcher.stop()
+
+    assert caplog.records[0].exc_info[0] is InvalidColorError
+    assert backend.ariadna_df.loc["1503", "rgb"] == "#ffff62"
+
+
+def test_watcher_invalid_interval(backend: Backend):
+    with pytest.raises(ValueError):
+        PaletteWatcher(backend, interval=0)
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dashboard import Backend
+from dashboard.shared import SharedArrays
+
+from .conftest import DATA_DIR
+
+
+def test_shared_arrays(tmp_path: Path):
+    arrays = SharedArrays(tmp_path)
+    array = np.arange(12, dtype=np.uint16).reshape(4, 3)
+
+    shared = arrays.share_all("palette", {"rgb": array, "lab": array[:, ::2]})
+
+    assert isinstance(shared["rgb"], np.memmap)
+    assert not shared["rgb"].flags.writeable
+    np.testing.assert_array_equal(shared["rgb"], array)
+    np.testing.assert_array_equal(shared["lab"], array[:, ::2])
+    assert arrays.nbytes == 40
+    assert sorted(p.name for p in arrays.directory.iterdir()) == [
+        "palette-lab.npy",
+        "palette-rgb.npy",
+    ]
+
+    arrays.close()
+
+    assert not arrays.directory.exists()
+    np.testing.assert_array_equal(shared["rgb"], array)
+
+
+def test_shared_arrays_are_removed_by_owner_only(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    arrays = SharedArrays(tmp_path)
+    arrays.share("table", np.zeros(3))
+
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    arrays.close()
+
+    assert arrays.directory.exists()
+
+
+def test_backend_share(tmp_path: Path, backend: Backend, orange: str):
+    shared_backend = Backend(
+        dmc_path=DATA_DIR / "dmc.csv",
+        ariadna_path=DATA_DIR / "ariadna.csv",
+        cache_size=0,
+    )
+
+    arrays = shared_backend.share(SharedArrays(tmp_path))
+
+    for space, coordinates in shared_backend.ariadna_coordinates.items():
+        assert isinstance(coordinates, np.memmap)
+        np.testing.assert_array_equal(coordinates, backend.ariadna_coordinates[space])
+    assert shared_backend.find_similar(orange, "CIE94", 5) == backend.find_similar(
+        orange, "CIE94", 5
+    )
+    assert shared_backend.find_similar_dmc_batch(
+        ["310", "B5200"], "CIEDE2000", 9
+    ) == backend.find_similar_dmc_batch(["310", "B5200"], "CIEDE2000", 9)
+    with pytest.raises(ValueError):
+        shared_backend.dmc_coordinates["lab"][0, 0] = 0
+
+    arrays.close()
@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from dashboard import Backend
+from dashboard.spatial_index import SPATIAL_INDEX_MIN_SIZE, KDTree, SpatialIndex
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, top_n_indices
+
+from .conftest import DATA_DIR
+
+
+@pytest.fixture(scope="module")
+def large_palette() -> list[str]:
+    rng = np.random.default_rng(seed=0)
+    return [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=3000)]
+
+
+@pytest.fixture(scope="module")
+def large_palette_coordinates(large_palette: list[str]) -> dict[str, np.ndarray]:
+    return palette_coordinates(large_palette)
+
+
+def test_kd_tree_matches_brute_force():
+    rng = np.random.default_rng(seed=0)
+    points = rng.uniform(0, 100, size=(1000, 3))
+    tree = KDTree(points, leaf_size=8)
+
+    for point in rng.uniform(0, 100, size=(20, 3)):
+        dists = ((points - point) ** 2).sum(axis=1)
+
+        nearest = tree.query(point, 7)
+        assert np.sort(dists[nearest]) == pytest.approx(np.sort(dists)[:7])
+
+        in_radius = tree.query_radius(point, 15)
+        assert in_radius.tolist() == np.flatnonzero(dists <= 15 ** 2).tolist()
+
+
+def test_kd_tree_with_duplicates():
+    tree = KDTree(np.zeros((100, 3)), leaf_size=4)
+
+    assert len(tree.query(np.zeros(3), 10)) == 10
+    assert len(tree.query_radius(np.zeros(3), 0)) == 100
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+@pytest.mark.parametrize("n", [1, 5, 9])
+def test_spatial_index_matches_brute_force(
+    large_palette_coordinates: dict[str, np.ndarray], metric: str, n: int
+):
+    index = SpatialIndex(large_palette_coordinates)
+    metric_f, space = METRIC_KERNELS[metric]
+    coords = large_palette_coordinates[space]
+
+    rng = np.random.default_rng(seed=1)
+    bases = palette_coordinates([f"#{c:06x}" for c in rng.integers(0, 2 ** 24, 20)])
+    evaluated = 0
+    for base in bases[space]:
+        expected = top_n_indices(metric_f(base, coords), n)
+
+        assert index.find_similar(base, metric, n).tolist() == expected.tolist()
+        evaluated += len(index.candidates(base, metric, n))
+
+    assert evaluated < len(bases[space]) * len(coords) / 2
+
+
+@pytest.mark.parametrize(
+    "metric, stage", [("CIEDE2000", "pruned_search"), ("CMC 2:1", "index_search")]
+)
+def test_backend_search_of_large_palettes(
+    large_palette: list[str], tmp_path: Path, orange: str, metric: str, stage: str
+):
+    assert len(large_palette) >= SPATIAL_INDEX_MIN_SIZE
+
+    palette_path = tmp_path / "large.csv"
+    palette_path.write_text(
+        "number,rgb\n" + "".join(f"{i},{c}\n" for i, c in enumerate(large_palette))
+    )
+    backend = Backend(DATA_DIR / "dmc.csv", palette_path, cache_size=0)
+    assert backend._palettes.ariadna_index is not None
+
+    metric_f, space = METRIC_KERNELS[metric]
+    base = palette_coordinates([orange])[space][0]
+    scores = metric_f(base, backend.ariadna_coordinates[space])
+
+    codes, _ = backend.find_similar(orange, metric, 5)
+
+    assert codes == top_n_indices(scores, 5).tolist()
+    assert (stage, metric, 5) in backend.timings.snapshot()
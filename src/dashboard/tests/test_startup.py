@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from dashboard.startup import (
+    backend_startup_times,
+    format_report,
+    import_time,
+    main,
+)
+
+from .conftest import DATA_DIR
+
+
+@pytest.mark.parametrize(
+    "modules", ["converters, metrics, metrics.scoring, images", "dashboard.batch"]
+)
+def test_light_modules_skip_heavy_dependencies(modules: str):
+    code = (
+        f"import sys, {modules}; "
+        "print(sorted({'pandas', 'plotly', 'dash', 'flask'} & set(sys.modules)))"
+    )
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(p for p in sys.path if p)}
+
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, env=env
+    ).stdout
+
+    assert output.strip() == "[]"
+
+
+def test_import_time():
+    assert 0 < import_time("converters") < 10
+
+
+def test_backend_startup_times():
+    times = backend_startup_times(DATA_DIR / "dmc.csv", DATA_DIR / "ariadna.csv")
+
+    assert set(times) == {
+        "read_csv",
+        "coordinates",
+        "spatial_index",
+        "lookup_tables",
+        "conversion_table",
+        "total",
+    }
+    assert sum(times.values()) - times["total"] <= times["total"]
+
+
+def test_format_report():
+    report = format_report([("Import:", {"numpy": 0.05, "pandas": 0.2})])
+
+    assert report.splitlines() == [
+        "Import:",
+        f"  {'numpy':40}      50.0 ms",
+        f"  {'pandas':40}     200.0 ms",
+    ]
+
+
+def test_main(capsys: pytest.CaptureFixture):
+    main(
+        [
+            str(DATA_DIR / "dmc.csv"),
+            str(DATA_DIR / "ariadna.csv"),
+            "--module",
+            "metrics",
+        ]
+    )
+
+    output = capsys.readouterr().out
+    assert "  metrics " in output
+    assert "conversion_table" in output
@@ -0,0 +1,5 @@
+"""
+Conversion of images into floss charts.
+"""
+from .pipeline import ConversionStats, convert_image, iter_tiles, read_image
+from .quantize import QuantizationResult, count_colors, quantize
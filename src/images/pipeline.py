@@ -0,0 +1,232 @@
+"""
+Streaming conversion of images into maps of the nearest palette colors.
+
+Images are processed in bands of rows. Every band is reduced to its unique colors and
+only colors not seen in previous bands are scored, so the work depends on the number
+of distinct colors rather than on the number of pixels. Nearest palette rows of scored
+colors are remembered in a 2^24 entries table (32 MB).
+
+Only NumPy .npy images are read band by band, from a memory map. Pillow decodes other
+formats (JPEG, PNG, ...) whole, so their pixels are held in memory during conversion.
+
+An image can be converted from the command line with:
+    python -m images.pipeline photo.jpg data/ariadna.csv chart.npy --metric CIEDE2000
+"""
+import argparse
+import csv
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, to_color_space
+
+
+GAMUT_SIZE = 2 ** 24
+
+# Marks colors which were not scored yet in the table of nearest palette rows
+_UNSET = np.iinfo(np.uint16).max
+
+ImageSource = Union[np.ndarray, Path, str]
+
+
+@dataclass
+class ConversionStats:
+    """Data class keeping throughput statistics of an image conversion."""
+
+    pixels: int
+    unique_colors: int
+    seconds: float
+
+    @property
+    def megapixels_per_second(self) -> float:
+        """
+        Returns the conversion throughput.
+        """
+        return self.pixels / 1e6 / self.seconds if self.seconds else float("inf")
+
+
+def read_image(path: Union[Path, str]) -> np.ndarray:
+    """
+    Opens an image as a read-only array of 8-bit RGB pixels.
+
+    NumPy .npy files are memory-mapped, so only the processed rows are loaded. Other
+    formats are decoded whole with Pillow, imported on first use, and take 3 bytes per
+    pixel of memory.
+
+    Args:
+        path (Union[Path, str]): Path to the image.
+
+    Returns:
+        np.ndarray[np.uint8]: HxWx3 array of pixels.
+    """
+    if Path(path).suffix == ".npy":
+        return np.load(path, mmap_mode="r")
+
+    try:
+        from PIL import Image
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "Reading images requires Pillow: pip install pillow"
+        ) from None
+
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def iter_tiles(image: np.ndarray, tile_rows: int) -> Iterator[tuple[int, np.ndarray]]:
+    """
+    Iterates over bands of image rows.
+
+    Args:
+        image (np.ndarray): HxWx3 array of pixels.
+        tile_rows (int): Number of rows in a band.
+
+    Yields:
+        tuple[int, np.ndarray]: Index of the first row and the band of pixels.
+    """
+    for top in range(0, image.shape[0], tile_rows):
+        yield top, np.asarray(image[top : top + tile_rows])
+
+
+def _score_colors(
+    keys: np.ndarray, palette: np.ndarray, metric: str, chunk_size: int
+) -> np.ndarray:
+    """
+    Finds nearest palette rows of packed 24-bit colors.
+
+    Args:
+        keys (np.ndarray): Colors packed as 0xRRGGBB integers.
+        palette (np.ndarray): Palette coordinates in the metric's color space.
+        metric (str): Metric name.
+        chunk_size (int): Number of colors scored at once.
+
+    Returns:
+        np.ndarray[np.uint16]: Nearest palette rows.
+    """
+    metric_f, space = METRIC_KERNELS[metric]
+
+    nearest = np.empty(len(keys), dtype=np.uint16)
+    for start in range(0, len(keys), chunk_size):
+        chunk = keys[start : start + chunk_size]
+        rgb = np.stack(((chunk >> 16) & 0xFF, (chunk >> 8) & 0xFF, chunk & 0xFF), -1)
+        scores = metric_f(to_color_space(rgb, space)[:, np.newaxis], palette)
+        nearest[start : start + chunk_size] = np.argmin(scores, axis=1)
+
+    return nearest
+
+
+def convert_image(
+    image: ImageSource,
+    palette: Sequence[str],
+    metric: str,
+    output: Union[Path, str],
+    tile_rows: int = 256,
+    chunk_size: int = 4096,
+) -> ConversionStats:
+    """
+    Maps every pixel of an image to the row of the nearest palette color.
+
+    The index map is written band by band into a memory-mapped .npy file of uint16,
+    which is removed if the conversion fails. For arrays and memory-mapped .npy images
+    memory use is bounded by the band size and the table of scored colors, other image
+    formats are first decoded whole by `read_image`.
+
+    Args:
+        image (ImageSource): HxWx3 array of 8-bit pixels or a path to an image.
+        palette (Sequence[str]): Hexadecimal codes of the palette colors.
+        metric (str): Metric name.
+        output (Union[Path, str]): Path of the .npy index map.
+        tile_rows (int, optional): Number of image rows processed at once. Defaults
+            to 256.
+        chunk_size (int, optional): Number of unique colors scored at once. Defaults
+            to 4096.
+
+    Returns:
+        ConversionStats: Throughput statistics.
+    """
+    start_time = time.perf_counter()
+
+    if not isinstance(image, np.ndarray):
+        image = read_image(image)
+    if len(palette) >= _UNSET:
+        raise ValueError(f"Palettes are limited to {_UNSET - 1} colors.")
+
+    _, space = METRIC_KERNELS[metric]
+    palette_coords = palette_coordinates(palette)[space]
+
+    height, width, _ = image.shape
+    index_map = np.lib.format.open_memmap(
+        output, mode="w+", dtype=np.uint16, shape=(height, width)
+    )
+    nearest = np.full(GAMUT_SIZE, _UNSET, dtype=np.uint16)
+    unique_colors = 0
+    completed = False
+
+    try:
+        for top, tile in iter_tiles(image, tile_rows):
+            tile = tile.astype(np.uint32)
+            keys = (tile[..., 0] << 16) | (tile[..., 1] << 8) | tile[..., 2]
+
+            tile_colors = np.unique(keys)
+            new_colors = tile_colors[nearest[tile_colors] == _UNSET]
+            nearest[new_colors] = _score_colors(
+                new_colors, palette_coords, metric, chunk_size
+            )
+            unique_colors += len(new_colors)
+
+            index_map[top : top + len(tile)] = nearest[keys]
+
+        index_map.flush()
+        completed = True
+    finally:
+        del index_map
+        # A partial map would pass for a converted image
+        if not completed:
+            Path(output).unlink(missing_ok=True)
+
+    return ConversionStats(
+        pixels=height * width,
+        unique_colors=unique_colors,
+        seconds=time.perf_counter() - start_time,
+    )
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Converts an image from the command line and prints the throughput.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("image", help="path to the image")
+    parser.add_argument("palette", help="path to the palette CSV")
+    parser.add_argument("output", help="path of the .npy index map")
+    parser.add_argument("--metric", choices=list(METRIC_KERNELS), default="CIEDE2000")
+    parser.add_argument("--tile-rows", type=int, default=256)
+    parser.add_argument("--chunk-size", type=int, default=4096)
+    parsed = parser.parse_args(args)
+
+    with open(parsed.palette, newline="") as file:
+        palette = [row["rgb"] for row in csv.DictReader(file)]
+
+    stats = convert_image(
+        parsed.image,
+        palette,
+        parsed.metric,
+        parsed.output,
+        tile_rows=parsed.tile_rows,
+        chunk_size=parsed.chunk_size,
+    )
+    print(  # noqa: T201
+        f"{stats.pixels / 1e6:.1f} MP, {stats.unique_colors} unique colors, "
+        f"{stats.seconds:.2f} s, {stats.megapixels_per_second:.2f} MP/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Selection of a limited set of floss colors which reproduces an image best.
+
+Cross-stitch patterns usually use a few dozen threads rather than a whole palette. The
+quantizer runs k-means iterations in the Lab space with centers constrained to palette
+members: pixels are assigned to the nearest selected floss, centers move to weighted
+means of their clusters and are snapped back to the nearest unused floss. Iterations
+run over unique colors weighted by their pixel counts, so their cost does not depend
+on the image size.
+"""
+import time
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+
+from metrics import cie76_batch
+from metrics.scoring import palette_coordinates, to_color_space
+
+from .pipeline import ImageSource, iter_tiles, read_image
+
+
+@dataclass
+class QuantizationResult:
+    """
+    Data class keeping flosses selected for an image.
+
+    Attributes:
+        rows (np.ndarray[int]): Palette rows of the selected flosses, sorted by the
+            number of pixels they cover.
+        pixels (np.ndarray[int]): Number of pixels covered by each selected floss.
+        error (float): Mean squared Lab distance between pixels and their flosses.
+        iterations (int): Number of completed iterations.
+        converged (bool): Whether the selection stopped changing within the budget.
+    """
+
+    rows: np.ndarray
+    pixels: np.ndarray
+    error: float
+    iterations: int
+    converged: bool
+
+
+def count_colors(
+    image: np.ndarray, tile_rows: int = 256
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Counts pixels of every unique color of an image, band by band.
+
+    Args:
+        image (np.ndarray): HxWx3 array of 8-bit pixels.
+        tile_rows (int, optional): Number of image rows processed at once. Defaults
+            to 256.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Unique colors packed as 0xRRGGBB integers and
+            their pixel counts.
+    """
+    keys, counts = [], []
+    for _, tile in iter_tiles(image, tile_rows):
+        tile = tile.astype(np.uint32)
+        packed = (tile[..., 0] << 16) | (tile[..., 1] << 8) | tile[..., 2]
+        tile_keys, tile_counts = np.unique(packed, return_counts=True)
+        keys.append(tile_keys)
+        counts.append(tile_counts)
+
+    keys, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    counts = np.bincount(inverse, weights=np.concatenate(counts), minlength=len(keys))
+
+    return keys, counts.astype(np.int64)
+
+
+def _assign(
+    colors: np.ndarray, centers: np.ndarray, chunk_size: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Assigns colors to the nearest centers.
+
+    Args:
+        colors (np.ndarray): Nx3 array of Lab coordinates.
+        centers (np.ndarray): Kx3 array of Lab coordinates.
+        chunk_size (int): Number of colors scored at once.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Indexes of the nearest centers and squared
+            distances to them.
+    """
+    labels = np.empty(len(colors), dtype=np.intp)
+    distances = np.empty(len(colors))
+    for start in range(0, len(colors), chunk_size):
+        scores = cie76_batch(colors[start : start + chunk_size, np.newaxis], centers)
+        labels[start : start + chunk_size] = np.argmin(scores, axis=1)
+        distances[start : start + chunk_size] = np.min(scores, axis=1)
+
+    return labels, distances
+
+
+def _snap(
+    means: np.ndarray, order: np.ndarray, palette: np.ndarray, fallback: np.ndarray
+) -> np.ndarray:
+    """
+    Replaces cluster means with the nearest palette members, each used at most once.
+
+    Args:
+        means (np.ndarray): Kx3 array of Lab cluster means (NaN for empty clusters).
+        order (np.ndarray): Cluster indexes in the order of choosing their members.
+        palette (np.ndarray): Px3 array of Lab palette coordinates.
+        fallback (np.ndarray): Current palette rows, kept for empty clusters.
+
+    Returns:
+        np.ndarray[int]: Palette rows of the new centers.
+    """
+    rows = fallback.copy()
+    used = np.zeros(len(palette), dtype=bool)
+    used[fallback[np.isnan(means[:, 0])]] = True
+
+    for cluster in order:
+        if np.isnan(means[cluster, 0]):
+            continue
+        scores = cie76_batch(means[cluster], palette)
+        scores[used] = np.inf
+        rows[cluster] = np.argmin(scores)
+        used[rows[cluster]] = True
+
+    return rows
+
+
+def quantize(
+    image: ImageSource,
+    palette: Sequence[str],
+    k: int,
+    max_iterations: int = 20,
+    time_budget: Optional[float] = None,
+    chunk_size: int = 4096,
+) -> QuantizationResult:
+    """
+    Selects k palette colors which reproduce an image with the lowest Lab error.
+
+    Initial centers are the k flosses most popular when every pixel is mapped onto the
+    whole palette. The selection with the lowest error seen is returned, which makes
+    the result independent of the budget running out mid-way.
+
+    Args:
+        image (ImageSource): HxWx3 array of 8-bit pixels or a path to an image.
+        palette (Sequence[str]): Hexadecimal codes of the palette colors.
+        k (int): Number of colors to select.
+        max_iterations (int, optional): Maximum number of iterations. Defaults to 20.
+        time_budget (Optional[float], optional): Maximum number of seconds spent on
+            iterations, reading the image and the initial assignment are not
+            counted. Defaults to None (no limit).
+        chunk_size (int, optional): Number of unique colors scored at once. Defaults
+            to 4096.
+
+    Returns:
+        QuantizationResult: Selected flosses.
+    """
+    if not 0 < k <= len(palette):
+        raise ValueError(
+            f"Cannot select {k} colors of a {len(palette)} colors palette."
+        )
+
+    if not isinstance(image, np.ndarray):
+        image = read_image(image)
+    if not image.size:
+        raise ValueError("Cannot quantize an image without pixels.")
+    keys, counts = count_colors(image)
+    rgb = np.stack(((keys >> 16) & 0xFF, (keys >> 8) & 0xFF, keys & 0xFF), -1)
+    colors = to_color_space(rgb, "lab")
+    palette_lab = palette_coordinates(palette)["lab"]
+
+    labels, _ = _assign(colors, palette_lab, chunk_size)
+    popularity = np.bincount(labels, weights=counts, minlength=len(palette))
+    rows = np.argsort(-popularity, kind="stable")[:k]
+
+    best_rows, best_error = rows, np.inf
+    iterations, converged = 0, False
+    # Reading and counting the image are not part of the budget
+    start_time = time.perf_counter()
+    while iterations < max_iterations:
+        if time_budget is not None and time.perf_counter() - start_time > time_budget:
+            break
+
+        labels, distances = _assign(colors, palette_lab[rows], chunk_size)
+        error = float(counts @ distances) / counts.sum()
+        if error < best_error:
+            best_rows, best_error = rows, error
+
+        weights = np.bincount(labels, weights=counts, minlength=k)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.stack(
+                [
+                    np.bincount(labels, weights=counts * colors[:, i], minlength=k)
+                    for i in range(3)
+                ],
+                axis=-1,
+            ) / np.where(weights > 0, weights, np.nan)[:, np.newaxis]
+        new_rows = _snap(means, np.argsort(-weights, kind="stable"), palette_lab, rows)
+
+        iterations += 1
+        if np.array_equal(new_rows, rows):
+            converged = True
+            break
+        rows = new_rows
+
+    labels, distances = _assign(colors, palette_lab[best_rows], chunk_size)
+    if not np.isfinite(best_error):
+        best_error = float(counts @ distances) / counts.sum()
+    pixels = np.bincount(labels, weights=counts, minlength=k).astype(np.int64)
+    order = np.argsort(-pixels, kind="stable")
+
+    return QuantizationResult(
+        rows=best_rows[order],
+        pixels=pixels[order],
+        error=best_error,
+        iterations=iterations,
+        converged=converged,
+    )
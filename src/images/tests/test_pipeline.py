@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from images import ConversionStats, convert_image, iter_tiles, read_image
+from images import pipeline
+from images.pipeline import main
+from metrics.scoring import METRIC_KERNELS, palette_coordinates, top_n_indices
+
+
+@pytest.fixture
+def palette() -> list[str]:
+    return ["#000000", "#ffffff", "#c25b08", "#2025c7", "#6e1f0f", "#808080"]
+
+
+@pytest.fixture
+def image() -> np.ndarray:
+    rng = np.random.default_rng(seed=0)
+    colors = rng.integers(0, 256, size=(50, 3), dtype=np.uint8)
+    return colors[rng.integers(0, len(colors), size=(61, 47))]
+
+
+def test_iter_tiles(image: np.ndarray):
+    tiles = list(iter_tiles(image, 16))
+
+    assert [top for top, _ in tiles] == [0, 16, 32, 48]
+    np.testing.assert_array_equal(np.concatenate([t for _, t in tiles]), image)
+
+
+@pytest.mark.parametrize("metric", ["CIEDE2000", "RGB euclidean", "CMC 2:1"])
+def test_convert_image_matches_brute_force(
+    image: np.ndarray, palette: list[str], metric: str, tmp_path: Path
+):
+    output = tmp_path / "map.npy"
+
+    stats = convert_image(image, palette, metric, output, tile_rows=10, chunk_size=7)
+
+    metric_f, space = METRIC_KERNELS[metric]
+    palette_coords = palette_coordinates(palette)[space]
+    pixel_coords = palette_coordinates(
+        [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in image.reshape(-1, 3)]
+    )[space]
+    expected = [top_n_indices(metric_f(c, palette_coords), 1)[0] for c in pixel_coords]
+
+    assert np.load(output).reshape(-1).tolist() == expected
+    assert stats.pixels == image.shape[0] * image.shape[1]
+    assert stats.unique_colors == len(np.unique(image.reshape(-1, 3), axis=0))
+
+
+def test_read_image_memory_maps_npy(image: np.ndarray, tmp_path: Path):
+    path = tmp_path / "image.npy"
+    np.save(path, image)
+
+    result = read_image(path)
+
+    assert isinstance(result, np.memmap)
+    np.testing.assert_array_equal(result, image)
+
+
+def test_read_image_with_pillow(image: np.ndarray, tmp_path: Path):
+    Image = pytest.importorskip("PIL.Image")
+    path = tmp_path / "image.png"
+    Image.fromarray(image).save(path)
+
+    np.testing.assert_array_equal(read_image(path), image)
+
+
+def test_failed_conversion_removes_output(
+    image: np.ndarray,
+    palette: list[str],
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    output = tmp_path / "map.npy"
+
+    def fail(*args: object) -> np.ndarray:
+        raise MemoryError
+
+    monkeypatch.setattr(pipeline, "_score_colors", fail)
+    with pytest.raises(MemoryError):
+        convert_image(image, palette, "CIE76", output)
+
+    assert not output.exists()
+
+
+def test_megapixels_per_second():
+    assert ConversionStats(3_000_000, 10, 2).megapixels_per_second == 1.5
+
+
+def test_main(
+    image: np.ndarray, palette: list[str], tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    np.save(tmp_path / "image.npy", image)
+    palette_path = tmp_path / "palette.csv"
+    palette_path.write_text("number,rgb\n" + "".join(f"{c[1:]},{c}\n" for c in palette))
+
+    main([str(tmp_path / "image.npy"), str(palette_path), str(tmp_path / "map.npy")])
+
+    assert np.load(tmp_path / "map.npy").shape == image.shape[:2]
+    assert "MP/s" in capsys.readouterr().out
@@ -0,0 +1,116 @@
+import importlib
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from images import count_colors, quantize
+from metrics import cie76_batch
+from metrics.scoring import palette_coordinates
+
+
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+
+@pytest.fixture(scope="module")
+def ariadna() -> list[str]:
+    return pd.read_csv(DATA_DIR / "ariadna.csv")["rgb"].to_list()
+
+
+@pytest.fixture(scope="module")
+def floss_rows(ariadna: list[str]) -> np.ndarray:
+    return np.random.default_rng(seed=1).choice(len(ariadna), size=6, replace=False)
+
+
+@pytest.fixture
+def image(ariadna: list[str], floss_rows: np.ndarray) -> np.ndarray:
+    rng = np.random.default_rng(seed=2)
+    primaries = np.array(
+        [[int(ariadna[row][i : i + 2], 16) for i in (1, 3, 5)] for row in floss_rows]
+    )
+    pixels = primaries[rng.integers(0, len(primaries), size=(80, 60))]
+    return np.clip(pixels + rng.integers(-2, 3, size=pixels.shape), 0, 255).astype(
+        np.uint8
+    )
+
+
+def test_count_colors(image: np.ndarray):
+    keys, counts = count_colors(image, tile_rows=7)
+
+    colors, expected = np.unique(image.reshape(-1, 3), axis=0, return_counts=True)
+    assert keys.tolist() == [(r << 16) | (g << 8) | b for r, g, b in colors.tolist()]
+    assert counts.tolist() == expected.tolist()
+
+
+def test_quantize_finds_the_flosses_of_the_image(
+    image: np.ndarray, ariadna: list[str], floss_rows: np.ndarray
+):
+    result = quantize(image, ariadna, 6)
+
+    assert sorted(result.rows.tolist()) == sorted(floss_rows.tolist())
+    assert result.pixels.sum() == image.shape[0] * image.shape[1]
+    assert result.converged
+
+
+def test_quantize_result(image: np.ndarray, ariadna: list[str]):
+    result = quantize(image, ariadna, 4)
+
+    lab = palette_coordinates(
+        [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in image.reshape(-1, 3)]
+    )["lab"]
+    selected = palette_coordinates(ariadna)["lab"][result.rows]
+    distances = cie76_batch(lab[:, np.newaxis], selected)
+    pixels = np.bincount(np.argmin(distances, axis=1), minlength=4)
+
+    assert len(set(result.rows.tolist())) == 4
+    assert result.pixels.tolist() == pixels.tolist()
+    assert list(result.pixels) == sorted(result.pixels, reverse=True)
+    assert result.error == pytest.approx(distances.min(axis=1).mean())
+
+
+def test_quantize_improves_on_the_most_popular_flosses(ariadna: list[str]):
+    rng = np.random.default_rng(seed=3)
+    image = rng.integers(0, 256, size=(40, 40, 3), dtype=np.uint8)
+
+    initial = quantize(image, ariadna, 8, max_iterations=1)
+    result = quantize(image, ariadna, 8)
+
+    assert result.error <= initial.error
+    assert result.iterations >= initial.iterations == 1
+
+
+def test_quantize_time_budget(image: np.ndarray, ariadna: list[str]):
+    result = quantize(image, ariadna, 10, time_budget=0)
+
+    assert result.iterations == 0
+    assert not result.converged
+    assert len(result.rows) == 10
+
+
+def test_quantize_time_budget_excludes_reading(
+    image: np.ndarray, ariadna: list[str], monkeypatch: pytest.MonkeyPatch
+):
+    def slow_count_colors(image: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        time.sleep(0.2)
+        return count_colors(image)
+
+    # The package exports the function under the module's name
+    module = importlib.import_module("images.quantize")
+    monkeypatch.setattr(module, "count_colors", slow_count_colors)
+    result = quantize(image, ariadna, 6, time_budget=0.1)
+
+    assert result.iterations > 0
+
+
+@pytest.mark.parametrize("k", [0, 1000])
+def test_quantize_invalid_k(image: np.ndarray, ariadna: list[str], k: int):
+    with pytest.raises(ValueError):
+        quantize(image, ariadna, k)
+
+
+@pytest.mark.parametrize("shape", [(0, 0, 3), (0, 4, 3), (4, 0, 3)])
+def test_quantize_empty_image(ariadna: list[str], shape: tuple[int, int, int]):
+    with pytest.raises(ValueError, match="without pixels"):
+        quantize(np.zeros(shape, dtype=np.uint8), ariadna, 2)
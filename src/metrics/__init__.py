@@ -1,7 +1,14 @@
 """
 Metrics used to calculate distance between colors.
 """
-from .helpers import squared_euclidean
-from .cie import cie76, cie94, ciede2000
-from .cmc import _cmc, cmc_1_1, cmc_2_1
-from .euclidean import rgb_euclidean, rgb_euclidean_gamma_correction, xyz_euclidean
+from .helpers import squared_euclidean, squared_euclidean_batch
+from .cie import cie76, cie76_batch, cie94, cie94_batch, ciede2000, ciede2000_batch
+from .cmc import _cmc, _cmc_batch, cmc_1_1, cmc_1_1_batch, cmc_2_1, cmc_2_1_batch
+from .euclidean import (
+    rgb_euclidean,
+    rgb_euclidean_batch,
+    rgb_euclidean_gamma_correction,
+    rgb_euclidean_gamma_correction_batch,
+    xyz_euclidean,
+    xyz_euclidean_batch,
+)
@@ -0,0 +1,227 @@
+"""
+Search radii derived from lower bounds of metrics in terms of euclidean distances.
+
+Each function returns a radius r such that every color farther than r from the base
+color (in the color space used by the metric) scores more than the given score. A
+spatial index can therefore discard everything outside of that radius without
+evaluating the metric.
+"""
+import numpy as np
+
+from metrics.helpers import Coordinates
+
+
+def cie76_search_radius(base: Coordinates, score: float) -> float:
+    """
+    Returns the search radius of CIE76 (the metric is the squared distance).
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        score (float): Score to beat.
+
+    Returns:
+        float: Search radius.
+    """
+    return np.sqrt(score)
+
+
+def cie94_search_radius(base: Coordinates, score: float) -> float:
+    """
+    Returns the search radius of CIE94.
+
+    dC^2 + dH^2 = da^2 + db^2 and both weights depend on the base chroma only, so
+    score >= d^2 / (1 + K1C1)^2.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        score (float): Score to beat.
+
+    Returns:
+        float: Search radius.
+    """
+    _, a1, b1 = base
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+
+    return np.sqrt(score) * (1 + 0.045 * C1)
+
+
+def cmc_search_radius(
+    base: Coordinates, score: float, unit_lc_ratio: bool = True
+) -> float:
+    """
+    Returns the search radius of CMC l:c.
+
+    All weighting functions depend on the base color only and dC^2 + dH^2 equals
+    da^2 + db^2, so score >= d^2 / max(l S_L, S_C, S_H)^2.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        score (float): Score to beat.
+        unit_lc_ratio (bool, optional): If true l:c=1:1 (imperceptibility), otherwise
+            l:c=2:1 (acceptability). Defaults to True.
+
+    Returns:
+        float: Search radius.
+    """
+    L1, a1, b1 = base
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+    H1 = np.degrees(np.arctan2(b1, a1)) % 360
+
+    l = 1 if unit_lc_ratio else 2
+
+    S_L = 0.511 if L1 < 16 else (0.040975 * L1) / (1 + 0.01765 * L1)
+    S_C = (0.0638 * C1) / (1 + 0.0131 * C1) + 0.638
+    F = np.sqrt(C1 ** 4 / (C1 ** 4 + 1900))
+    if 164 <= H1 <= 345:
+        T = 0.56 + abs(0.2 * np.cos(np.radians(H1 + 168)))
+    else:
+        T = 0.36 + abs(0.4 * np.cos(np.radians(H1 + 35)))
+    S_H = S_C * (F * T + 1 - F)
+
+    return np.sqrt(score) * max(l * S_L, S_C, S_H)
+
+
+def ciede2000_search_radius(
+    base: Coordinates,
+    score: float,
+    lightness_range: tuple[float, float],
+    max_chroma: float,
+) -> float:
+    """
+    Returns the search radius of CIEDE2000 for compared colors of a known range.
+
+    For a compared color at the distance d:
+    - S_L grows with |L_b - 50|, so it is the largest at an end of the lightness range,
+    - C2 <= min(C1 + d, max_chroma), C' <= 1.5 C and T <= 1.93, so both S_C and S_H are
+      at most S(d) = 1 + 0.045 * 0.75 * (C1 + min(C1 + d, max_chroma)),
+    - dC'^2 + dH'^2 = da'^2 + db^2 >= da^2 + db^2 (a' stretches a),
+    - |R_T| <= 2 sin(60°), so the rotation term removes at most a share of
+      fC^2 + fH^2, leaving rho = 1 - sin(60°).
+
+    Therefore score >= min(dL^2 / S_L_max^2, rho (da^2 + db^2) / S(d)^2), and both
+    terms grow with d, so the radius is the larger of the solutions for each term.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        score (float): Score to beat.
+        lightness_range (tuple[float, float]): Lowest and highest L of the compared
+            colors.
+        max_chroma (float): Highest chroma of the compared colors.
+
+    Returns:
+        float: Search radius (infinity if nothing can be discarded).
+    """
+    L1, a1, b1 = base
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+
+    L_b_dev = max(abs((L1 + L2) / 2 - 50) for L2 in lightness_range)
+    S_L_max = 1 + (0.015 * L_b_dev ** 2) / np.sqrt(20 + L_b_dev ** 2)
+    radius_L = np.sqrt(score) * S_L_max
+
+    # rho d^2 / S(d)^2 = score, first while C1 + d is below max_chroma, then above it
+    root = np.sqrt(score / (1 - np.sin(np.radians(60))))
+    k = 0.045 * 0.75
+    denominator = 1 - k * root
+    radius_C = root * (1 + 2 * k * C1) / denominator if denominator > 0 else np.inf
+    if radius_C > max_chroma - C1:
+        radius_C = root * (1 + k * (C1 + max_chroma))
+
+    return max(radius_L, radius_C)
+
+
+def rgb_euclidean_search_radius(base: Coordinates, score: float) -> float:
+    """
+    Returns the search radius of the RGB euclidean metric.
+
+    Args:
+        base (Coordinates): RGB primaries of the base color.
+        score (float): Score to beat.
+
+    Returns:
+        float: Search radius.
+    """
+    return np.sqrt(score)
+
+
+def rgb_euclidean_gamma_correction_search_radius(
+    base: Coordinates, score: float
+) -> float:
+    """
+    Returns the search radius of the "redmean" weighted RGB metric.
+
+    All weights are at least 2, so score >= 2 d^2.
+
+    Args:
+        base (Coordinates): RGB primaries of the base color.
+        score (float): Score to beat.
+
+    Returns:
+        float: Search radius.
+    """
+    return np.sqrt(score / 2)
+
+
+def ciede2000_lower_bounds(
+    base: Coordinates, others: np.ndarray, others_chroma: np.ndarray
+) -> np.ndarray:
+    """
+    Returns lower bounds of CIEDE2000 scores of many colors at once.
+
+    With the notation of `ciede2000_search_radius`, the score is at least
+    fL^2 + rho (fC^2 + fH^2). T <= 1.93 gives S_H <= S_C, and C' <= 1.5 C gives
+    S_C <= 1 + 0.045 * 0.75 * (C1 + C2), so
+    score >= fL^2 + rho (da^2 + db^2) / (1 + 0.03375 (C1 + C2))^2.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Nx3 array of Lab coordinates of the compared colors.
+        others_chroma (np.ndarray): Chroma of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Lower bounds of the scores.
+    """
+    L1, a1, b1 = base
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+    L2, a2, b2 = others[:, 0], others[:, 1], others[:, 2]
+
+    L_b_dev_sq = ((L1 + L2) / 2 - 50) ** 2
+    S_L = 1 + (0.015 * L_b_dev_sq) / np.sqrt(20 + L_b_dev_sq)
+    fL_sq = ((L2 - L1) / S_L) ** 2
+
+    S_max = 1 + 0.045 * 0.75 * (C1 + others_chroma)
+    rho = 1 - np.sin(np.radians(60))
+
+    return fL_sq + rho * ((a2 - a1) ** 2 + (b2 - b1) ** 2) / S_max ** 2
+
+
+def cmc_lower_bounds(
+    base: Coordinates,
+    others: np.ndarray,
+    others_chroma: np.ndarray,
+    unit_lc_ratio: bool = True,
+) -> np.ndarray:
+    """
+    Returns lower bounds of CMC l:c scores of many colors at once.
+
+    The score is fL^2 + fC^2 + fH^2 and the lightness and chroma terms only need the
+    precomputed chroma, so the hue term is dropped.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Nx3 array of Lab coordinates of the compared colors.
+        others_chroma (np.ndarray): Chroma of the compared colors.
+        unit_lc_ratio (bool, optional): If true l:c=1:1 (imperceptibility), otherwise
+            l:c=2:1 (acceptability). Defaults to True.
+
+    Returns:
+        np.ndarray[float]: Lower bounds of the scores.
+    """
+    L1, a1, b1 = base
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+
+    l = 1 if unit_lc_ratio else 2
+
+    S_L = 0.511 if L1 < 16 else (0.040975 * L1) / (1 + 0.01765 * L1)
+    S_C = (0.0638 * C1) / (1 + 0.0131 * C1) + 0.638
+
+    return ((L1 - others[:, 0]) / (l * S_L)) ** 2 + ((C1 - others_chroma) / S_C) ** 2
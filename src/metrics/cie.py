@@ -4,7 +4,8 @@ Metrics utilizing CIE standards.
 import numpy as np
 
 from converters import hex_to_xyz, xyz_to_lab
-from metrics import squared_euclidean
+from metrics import squared_euclidean, squared_euclidean_batch
+from metrics.helpers import Coordinates, split_coordinates
 
 
 def cie76(base: str, other: str) -> float:
@@ -145,3 +146,132 @@ def ciede2000(base: str, other: str) -> float:
     score = fL ** 2 + fC ** 2 + fH ** 2 + (R_T * fC * fH)
 
     return score
+
+
+def cie76_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Calculates squared delta E according to CIE76 standard for many colors at once.
+
+    Accepted inputs are Lab coordinates: the base color of shape (3,) and compared
+    colors of shape (N, 3). Inputs are broadcast along the leading axes, so e.g.
+    (M, 1, 3) and (N, 3) give an (M, N) matrix of scores.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    return squared_euclidean_batch(base, others)
+
+
+def cie94_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Calculates squared delta E according to CIE94 standard for many colors at once.
+
+    Accepted inputs are Lab coordinates: the base color of shape (3,) and compared
+    colors of shape (N, 3). Inputs are broadcast along the leading axes.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    L1, a1, b1 = split_coordinates(base)
+    L2, a2, b2 = split_coordinates(others)
+
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+    C2 = np.sqrt(a2 ** 2 + b2 ** 2)
+
+    dC = C1 - C2
+
+    dH = np.sqrt(np.abs((a1 - a2) ** 2 + (b1 - b2) ** 2 - dC ** 2))
+
+    K1 = 0.045
+    K2 = 0.015
+
+    score = (L1 - L2) ** 2 + (dC / (1 + K1 * C1)) ** 2 + (dH / (1 + K2 * C1)) ** 2
+
+    return score
+
+
+def ciede2000_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Calculates squared delta E according to CIEDE2000 standard for many colors at once.
+
+    Accepted inputs are Lab coordinates: the base color of shape (3,) and compared
+    colors of shape (N, 3). Inputs are broadcast along the leading axes. Hue wrapping
+    is handled with masks instead of branches.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    L1, a1, b1 = split_coordinates(base)
+    L2, a2, b2 = split_coordinates(others)
+
+    # fL
+    dL_p = L2 - L1
+    L_b = (L1 + L2) / 2
+
+    S_L = 1 + (0.015 * (L_b - 50) ** 2) / np.sqrt(20 + (L_b - 50) ** 2)
+    fL = dL_p / S_L
+
+    # fC
+    C1 = np.sqrt(a1 ** 2 + b1 ** 2)
+    C2 = np.sqrt(a2 ** 2 + b2 ** 2)
+
+    dC_p = C2 - C1
+    C_b = (C1 + C2) / 2
+
+    a_p_const_part = 1 - np.sqrt(C_b ** 7 / (C_b ** 7 + 25 ** 7))
+    a1_p = a1 + a1 / 2 * a_p_const_part
+    a2_p = a2 + a2 / 2 * a_p_const_part
+
+    C1_p = np.sqrt(a1_p ** 2 + b1 ** 2)
+    C2_p = np.sqrt(a2_p ** 2 + b2 ** 2)
+    C_bp = (C1_p + C2_p) / 2
+
+    S_C = 1 + 0.045 * C_bp
+    fC = dC_p / S_C
+
+    # fH
+    h1_p = np.degrees(np.arctan2(b1, a1_p)) % 360
+    h2_p = np.degrees(np.arctan2(b2, a2_p)) % 360
+
+    wrapped = np.abs(h1_p - h2_p) > 180
+
+    dh_p = h2_p - h1_p
+    dh_p = np.where(wrapped & (h2_p > h1_p), dh_p - 360, dh_p)
+    dh_p = np.where(wrapped & (h2_p <= h1_p), dh_p + 360, dh_p)
+
+    h_p_sum = h1_p + h2_p
+    h_p_shift = np.where(h_p_sum < 360, 360, -360)
+    H_bp = (h_p_sum + np.where(wrapped, h_p_shift, 0)) / 2
+
+    dH_p = 2 * np.sqrt(C1_p * C2_p) * np.sin(np.radians(dh_p / 2))
+
+    T = (
+        1
+        - 0.17 * np.cos(np.radians(H_bp - 30))
+        + 0.24 * np.cos(np.radians(2 * H_bp))
+        + 0.32 * np.cos(np.radians(3 * H_bp + 6))
+        - 0.2 * np.cos(np.radians(4 * H_bp - 63))
+    )
+
+    S_H = 1 + 0.015 * C_bp * T
+    fH = dH_p / S_H
+
+    # score
+    theta = np.radians(60 * np.exp(-(((H_bp - 275) / 25) ** 2)))
+    R_T = -2 * np.sqrt(C_bp ** 7 / (C_bp ** 7 + 25 ** 7)) * np.sin(theta)
+
+    score = fL ** 2 + fC ** 2 + fH ** 2 + (R_T * fC * fH)
+
+    return score
@@ -3,7 +3,8 @@ Metrics using CMC standard.
 """
 import numpy as np
 
-from converters import hex_to_xyz, lab_to_lch, xyz_to_lab
+from converters import hex_to_xyz, lab_to_lch, lab_to_lch_batch, xyz_to_lab
+from metrics.helpers import Coordinates, split_coordinates
 
 
 def _cmc(base: str, other: str, unit_lc_ratio: bool = True) -> float:
@@ -85,3 +86,88 @@ def cmc_2_1(base: str, other: str) -> float:
         float: Calculated score (squared delta E).
     """
     return _cmc(base, other, unit_lc_ratio=False)
+
+
+def _cmc_batch(
+    base: Coordinates, others: np.ndarray, unit_lc_ratio: bool = True
+) -> np.ndarray:
+    """
+    Calculates squared delta E according to CMC l:c standard for many colors at once.
+
+    Accepted inputs are Lab coordinates: the base color of shape (3,) and compared
+    colors of shape (N, 3). Inputs are broadcast along the leading axes. The lightness
+    and hue branches are handled with masks.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+        unit_lc_ratio (bool, optional): If true l:c=1:1 (imperceptibility), otherwise
+            l:c=2:1 (acceptability). Defaults to True.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    L1, a1, b1 = split_coordinates(base)
+    L2, a2, b2 = split_coordinates(others)
+
+    # to LCH
+    _, C1, H1 = split_coordinates(lab_to_lch_batch(base))
+    _, C2, _ = split_coordinates(lab_to_lch_batch(others))
+
+    l = 1 if unit_lc_ratio else 2
+    c = 1
+
+    # Lf
+    S_L = np.where(L1 < 16, 0.511, (0.040975 * L1) / (1 + 0.01765 * L1))
+    fL = (L1 - L2) / (l * S_L)
+
+    # Cf
+    S_C = (0.0638 * C1) / (1 + 0.0131 * C1) + 0.638
+    fC = (C1 - C2) / (c * S_C)
+
+    # Hf
+    F = np.sqrt(C1 ** 4 / (C1 ** 4 + 1900))
+
+    T = np.where(
+        (164 <= H1) & (H1 <= 345),
+        0.56 + np.abs(0.2 * np.cos(np.radians(H1 + 168))),
+        0.36 + np.abs(0.4 * np.cos(np.radians(H1 + 35))),
+    )
+
+    S_H = S_C * (F * T + 1 - F)
+
+    dH = np.sqrt(np.abs((a1 - a2) ** 2 + (b1 - b2) ** 2 - (C1 - C2) ** 2))
+    fH = dH / S_H
+
+    # score
+    score = fL ** 2 + fC ** 2 + fH ** 2
+
+    return score
+
+
+def cmc_1_1_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Wrapper for batch cmc function with l:c = 1:1.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    return _cmc_batch(base, others, unit_lc_ratio=True)
+
+
+def cmc_2_1_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Wrapper for batch cmc function with l:c = 2:1.
+
+    Args:
+        base (Coordinates): Lab coordinates of the base color.
+        others (np.ndarray): Lab coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (squared delta E).
+    """
+    return _cmc_batch(base, others, unit_lc_ratio=False)
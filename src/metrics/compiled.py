@@ -0,0 +1,378 @@
+"""
+Scalar Lab metric kernels compiled with Numba when it is installed.
+
+Per-pixel workloads such as error diffusion convert one color at a time and every
+decision depends on the previous one, so they cannot be vectorized and pay the
+overhead of NumPy calls on every pixel. Kernels of this module use scalar `math`
+arithmetic only and are compiled to machine code on the first call when Numba is
+installed (pip install numba). Without it the same kernels run as plain Python, which
+is still faster than NumPy for a single color, and `nearest` falls back to the batch
+kernels of `metrics.scoring`.
+
+`JIT_AVAILABLE` tells which implementation was selected at import.
+"""
+import math
+from typing import Callable, Sequence
+
+import numpy as np
+
+from converters.hexadec import SRGB_MATRIX, hex_to_dec_primaries
+from converters.xyz import EPSILON, KAPPA, XYZ_N
+from metrics.scoring import METRIC_KERNELS
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+JIT_AVAILABLE = numba is not None
+
+Lab = tuple[float, float, float]
+
+# Plain tuples are frozen into compiled kernels as constants
+_SRGB_MATRIX = tuple(tuple(row) for row in SRGB_MATRIX.tolist())
+_XYZ_N = tuple(XYZ_N.tolist())
+
+
+def _compile(func: Callable) -> Callable:
+    """
+    Compiles a kernel in the nopython mode, returns it unchanged without Numba.
+
+    Args:
+        func (Callable): Kernel using scalar arithmetic only.
+
+    Returns:
+        Callable: Compiled or original kernel.
+    """
+    if numba is None:
+        return func
+    return numba.njit(cache=True, nogil=True)(func)  # pragma: no cover
+
+
+@_compile
+def _linearize(primary: int) -> float:
+    """
+    Removes the sRGB gamma companding from an 8-bit primary.
+    """
+    c = primary / 255
+    if c > 0.04045:
+        return ((c + 0.055) / 1.055) ** 2.4
+    return c / 12.92
+
+
+@_compile
+def _lab_f(relative: float) -> float:
+    """
+    Applies the Lab companding function to a coordinate relative to the white point.
+    """
+    if relative > EPSILON:
+        return relative ** (1 / 3)
+    return (KAPPA * relative + 16) / 116
+
+
+@_compile
+def rgb_to_lab(r: int, g: int, b: int) -> Lab:
+    """
+    Converts 8-bit sRGB primaries to Lab using the standard illuminant D65.
+
+    Args:
+        r (int): Red primary (0-255).
+        g (int): Green primary (0-255).
+        b (int): Blue primary (0-255).
+
+    Returns:
+        Lab: Lab coordinates.
+    """
+    r_lin, g_lin, b_lin = _linearize(r), _linearize(g), _linearize(b)
+    m, white = _SRGB_MATRIX, _XYZ_N
+    f_x = _lab_f((m[0][0] * r_lin + m[0][1] * g_lin + m[0][2] * b_lin) / white[0])
+    f_y = _lab_f((m[1][0] * r_lin + m[1][1] * g_lin + m[1][2] * b_lin) / white[1])
+    f_z = _lab_f((m[2][0] * r_lin + m[2][1] * g_lin + m[2][2] * b_lin) / white[2])
+
+    return 116 * f_y - 16, 500 * (f_x - f_y), 200 * (f_y - f_z)
+
+
+def hex_to_lab(color: str) -> Lab:
+    """
+    Converts a hexadecimal color code to Lab coordinates.
+
+    The code is decoded by the scalar `hex_to_dec_primaries`, so malformed codes raise
+    `InvalidColorError` without building arrays for a single color.
+
+    Args:
+        color (str): Color code string (hex), can include '#' prefix.
+
+    Returns:
+        Lab: Lab coordinates.
+    """
+    r, g, b = hex_to_dec_primaries(color)
+    return rgb_to_lab(r, g, b)
+
+
+@_compile
+def cie76_lab(base: Lab, other: Lab) -> float:
+    """
+    Calculates squared delta E according to CIE76 standard, see `cie76`.
+
+    Args:
+        base (Lab): Lab coordinates of the base color.
+        other (Lab): Lab coordinates of the compared color.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    return (
+        (base[0] - other[0]) ** 2
+        + (base[1] - other[1]) ** 2
+        + (base[2] - other[2]) ** 2
+    )
+
+
+@_compile
+def cie94_lab(base: Lab, other: Lab) -> float:
+    """
+    Calculates squared delta E according to CIE94 standard, see `cie94`.
+
+    Args:
+        base (Lab): Lab coordinates of the base color.
+        other (Lab): Lab coordinates of the compared color.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    L1, a1, b1 = base
+    L2, a2, b2 = other
+
+    C1 = math.sqrt(a1 ** 2 + b1 ** 2)
+    C2 = math.sqrt(a2 ** 2 + b2 ** 2)
+
+    dC = C1 - C2
+
+    dH = math.sqrt(abs((a1 - a2) ** 2 + (b1 - b2) ** 2 - dC ** 2))
+
+    K1 = 0.045
+    K2 = 0.015
+
+    return (L1 - L2) ** 2 + (dC / (1 + K1 * C1)) ** 2 + (dH / (1 + K2 * C1)) ** 2
+
+
+@_compile
+def ciede2000_lab(base: Lab, other: Lab) -> float:
+    """
+    Calculates squared delta E according to CIEDE2000 standard, see `ciede2000`.
+
+    Args:
+        base (Lab): Lab coordinates of the base color.
+        other (Lab): Lab coordinates of the compared color.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    L1, a1, b1 = base
+    L2, a2, b2 = other
+
+    # fL
+    dL_p = L2 - L1
+    L_b = (L1 + L2) / 2
+
+    S_L = 1 + (0.015 * (L_b - 50) ** 2) / math.sqrt(20 + (L_b - 50) ** 2)
+    fL = dL_p / S_L
+
+    # fC
+    C1 = math.sqrt(a1 ** 2 + b1 ** 2)
+    C2 = math.sqrt(a2 ** 2 + b2 ** 2)
+
+    dC_p = C2 - C1
+    C_b = (C1 + C2) / 2
+
+    a_p_const_part = 1 - math.sqrt(C_b ** 7 / (C_b ** 7 + 25 ** 7))
+    a1_p = a1 + a1 / 2 * a_p_const_part
+    a2_p = a2 + a2 / 2 * a_p_const_part
+
+    C1_p = math.sqrt(a1_p ** 2 + b1 ** 2)
+    C2_p = math.sqrt(a2_p ** 2 + b2 ** 2)
+    C_bp = (C1_p + C2_p) / 2
+
+    S_C = 1 + 0.045 * C_bp
+    fC = dC_p / S_C
+
+    # fH
+    h1_p = math.degrees(math.atan2(b1, a1_p)) % 360
+    h2_p = math.degrees(math.atan2(b2, a2_p)) % 360
+
+    dh_p = h2_p - h1_p
+    h_p_sum = h1_p + h2_p
+    if abs(h1_p - h2_p) > 180:
+        dh_p += -360 if h2_p > h1_p else 360
+        h_p_sum += 360 if h_p_sum < 360 else -360
+    H_bp = h_p_sum / 2
+
+    dH_p = 2 * math.sqrt(C1_p * C2_p) * math.sin(math.radians(dh_p / 2))
+
+    T = (
+        1
+        - 0.17 * math.cos(math.radians(H_bp - 30))
+        + 0.24 * math.cos(math.radians(2 * H_bp))
+        + 0.32 * math.cos(math.radians(3 * H_bp + 6))
+        - 0.2 * math.cos(math.radians(4 * H_bp - 63))
+    )
+
+    S_H = 1 + 0.015 * C_bp * T
+    fH = dH_p / S_H
+
+    # score
+    theta = math.radians(60 * math.exp(-(((H_bp - 275) / 25) ** 2)))
+    R_T = -2 * math.sqrt(C_bp ** 7 / (C_bp ** 7 + 25 ** 7)) * math.sin(theta)
+
+    return fL ** 2 + fC ** 2 + fH ** 2 + (R_T * fC * fH)
+
+
+@_compile
+def _cmc_lab(base: Lab, other: Lab, l: float) -> float:
+    """
+    Calculates squared delta E according to CMC l:c standard with c = 1, see `_cmc`.
+    """
+    L1, a1, b1 = base
+    L2, a2, b2 = other
+
+    C1 = math.sqrt(a1 ** 2 + b1 ** 2)
+    C2 = math.sqrt(a2 ** 2 + b2 ** 2)
+    H1 = math.degrees(math.atan2(b1, a1)) % 360
+
+    # Lf
+    S_L = 0.511 if L1 < 16 else (0.040975 * L1) / (1 + 0.01765 * L1)
+    fL = (L1 - L2) / (l * S_L)
+
+    # Cf
+    S_C = (0.0638 * C1) / (1 + 0.0131 * C1) + 0.638
+    fC = (C1 - C2) / S_C
+
+    # Hf
+    F = math.sqrt(C1 ** 4 / (C1 ** 4 + 1900))
+
+    if 164 <= H1 <= 345:
+        T = 0.56 + abs(0.2 * math.cos(math.radians(H1 + 168)))
+    else:
+        T = 0.36 + abs(0.4 * math.cos(math.radians(H1 + 35)))
+
+    S_H = S_C * (F * T + 1 - F)
+
+    dH = math.sqrt(abs((a1 - a2) ** 2 + (b1 - b2) ** 2 - (C1 - C2) ** 2))
+    fH = dH / S_H
+
+    return fL ** 2 + fC ** 2 + fH ** 2
+
+
+@_compile
+def cmc_1_1_lab(base: Lab, other: Lab) -> float:
+    """
+    Calculates squared delta E according to CMC 1:1 standard, see `cmc_1_1`.
+
+    Args:
+        base (Lab): Lab coordinates of the base color.
+        other (Lab): Lab coordinates of the compared color.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    return _cmc_lab(base, other, 1.0)
+
+
+@_compile
+def cmc_2_1_lab(base: Lab, other: Lab) -> float:
+    """
+    Calculates squared delta E according to CMC 2:1 standard, see `cmc_2_1`.
+
+    Args:
+        base (Lab): Lab coordinates of the base color.
+        other (Lab): Lab coordinates of the compared color.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    return _cmc_lab(base, other, 2.0)
+
+
+# Scalar kernel of every metric computed in the Lab space
+SCALAR_KERNELS = {
+    "CIE76": cie76_lab,
+    "CIE94": cie94_lab,
+    "CIEDE2000": ciede2000_lab,
+    "CMC 1:1": cmc_1_1_lab,
+    "CMC 2:1": cmc_2_1_lab,
+}
+
+
+def _nearest_kernel(distance: Callable[[Lab, Lab], float]) -> Callable:
+    """
+    Creates a compiled loop finding the palette color nearest to the base color.
+
+    Args:
+        distance (Callable[[Lab, Lab], float]): Compiled scalar kernel.
+
+    Returns:
+        Callable: Kernel taking Lab coordinates of the base color and an Nx3 array of
+            palette coordinates, returning the index and score of the nearest color.
+    """
+
+    def nearest(base: Lab, palette: np.ndarray) -> tuple[int, float]:
+        best, best_score = -1, math.inf
+        for i in range(palette.shape[0]):
+            score = distance(base, (palette[i, 0], palette[i, 1], palette[i, 2]))
+            if score < best_score:
+                best, best_score = i, score
+        return best, best_score
+
+    return _compile(nearest)
+
+
+_NEAREST_KERNELS = (
+    {metric: _nearest_kernel(kernel) for metric, kernel in SCALAR_KERNELS.items()}
+    if JIT_AVAILABLE
+    else {}
+)
+
+
+def delta_e(base: str, other: str, metric: str) -> float:
+    """
+    Calculates the score of two hexadecimal color codes with a scalar kernel.
+
+    Args:
+        base (str): Hex code of the base color.
+        other (str): Hex code of the compared color.
+        metric (str): One of `SCALAR_KERNELS`.
+
+    Returns:
+        float: Calculated score (squared delta E).
+    """
+    return SCALAR_KERNELS[metric](hex_to_lab(base), hex_to_lab(other))
+
+
+def nearest(
+    base: Sequence[float], palette: np.ndarray, metric: str
+) -> tuple[int, float]:
+    """
+    Finds the palette color nearest to the base color.
+
+    Ties are resolved by the lower index, like `np.argmin`. Uses the compiled loop
+    when Numba is installed and the batch kernel of the metric otherwise.
+
+    Args:
+        base (Sequence[float]): Lab coordinates of the base color.
+        palette (np.ndarray): Nx3 array of Lab coordinates of the palette.
+        metric (str): One of `SCALAR_KERNELS`.
+
+    Returns:
+        tuple[int, float]: Index of the nearest color and its score.
+    """
+    if metric not in SCALAR_KERNELS:
+        raise ValueError(f"Unsupported metric: {metric}.")
+
+    if JIT_AVAILABLE:  # pragma: no cover
+        base = (float(base[0]), float(base[1]), float(base[2]))
+        return _NEAREST_KERNELS[metric](base, np.ascontiguousarray(palette, float))
+
+    scores = METRIC_KERNELS[metric][0](np.asarray(base, dtype=float), palette)
+    index = int(np.argmin(scores))
+    return index, float(scores[index])
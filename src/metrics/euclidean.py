@@ -1,8 +1,11 @@
 """
 Metrics based on euclidean distances.
 """
+import numpy as np
+
 from converters import hex_to_dec_primaries, hex_to_xyz
-from metrics import squared_euclidean
+from metrics import squared_euclidean, squared_euclidean_batch
+from metrics.helpers import Coordinates
 
 
 def rgb_euclidean(base: str, other: str) -> float:
@@ -83,3 +86,62 @@ def xyz_euclidean(base: str, other: str) -> float:
     score = squared_euclidean(xyz_base, xyz_other)
 
     return score
+
+
+def rgb_euclidean_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Calculates the sums of squares of primary colors differences for many colors.
+
+    Accepted inputs are primary colors values (0-255): the base color of shape (3,) and
+    compared colors of shape (N, 3). Inputs are broadcast along the leading axes.
+
+    Args:
+        base (Coordinates): RGB primaries of the base color.
+        others (np.ndarray): RGB primaries of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (variance of the color distances).
+    """
+    return squared_euclidean_batch(base, others)
+
+
+def rgb_euclidean_gamma_correction_batch(
+    base: Coordinates, others: np.ndarray
+) -> np.ndarray:
+    """
+    Calculates the "redmean" weighted sums of squares of primaries for many colors.
+
+    Accepted inputs are primary colors values (0-255): the base color of shape (3,) and
+    compared colors of shape (N, 3). Inputs are broadcast along the leading axes.
+
+    Args:
+        base (Coordinates): RGB primaries of the base color.
+        others (np.ndarray): RGB primaries of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (weighted variance of the color distances).
+    """
+    base = np.asarray(base, dtype=float)
+    others = np.asarray(others, dtype=float)
+
+    redmean = (base[..., 0] + others[..., 0]) / 2
+    weights = np.where(redmean[..., np.newaxis] < 128, (2, 4, 3), (3, 4, 2))
+
+    return squared_euclidean_batch(base, others, weights)
+
+
+def xyz_euclidean_batch(base: Coordinates, others: np.ndarray) -> np.ndarray:
+    """
+    Calculates the sums of squares of XYZ color coordinates for many colors.
+
+    Accepted inputs are XYZ coordinates: the base color of shape (3,) and compared
+    colors of shape (N, 3). Inputs are broadcast along the leading axes.
+
+    Args:
+        base (Coordinates): XYZ coordinates of the base color.
+        others (np.ndarray): XYZ coordinates of the compared colors.
+
+    Returns:
+        np.ndarray[float]: Calculated scores (variance of the distances).
+    """
+    return squared_euclidean_batch(base, others)
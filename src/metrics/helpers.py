@@ -3,6 +3,8 @@ Helper functions for computing distance between colors.
 """
 from typing import Optional, Sequence, Union
 
+import numpy as np
+
 
 Coordinates = Sequence[Union[int, float]]
 
@@ -31,3 +33,43 @@ def squared_euclidean(
     dist_sq = sum([w * (f - s) ** 2 for w, f, s in zip(weights, first, second)])
 
     return dist_sq
+
+
+def squared_euclidean_batch(
+    first: np.ndarray, second: np.ndarray, weights: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Calculates the sums of squared differences along the last axis of two arrays.
+
+    Arrays are broadcast against each other, so a single point of shape (3,) can be
+    compared with an (N, 3) matrix of points in one pass. Weights are broadcast the
+    same way.
+
+    Args:
+        first (np.ndarray): Array of coordinates.
+        second (np.ndarray): Array of coordinates.
+        weights (Optional[np.ndarray]): Optional array of weights. Defaults to None.
+
+    Returns:
+        np.ndarray[float]: Squared distances between the given points.
+    """
+    diff_sq = (np.asarray(first, dtype=float) - np.asarray(second, dtype=float)) ** 2
+    if weights is not None:
+        diff_sq = diff_sq * weights
+
+    return diff_sq.sum(axis=-1)
+
+
+def split_coordinates(coordinates: Coordinates) -> tuple[np.ndarray, ...]:
+    """
+    Splits an array of points into separate arrays of their coordinates.
+
+    Args:
+        coordinates (Coordinates): Array of points with coordinates in the last axis.
+
+    Returns:
+        tuple[np.ndarray, ...]: Arrays of consecutive coordinates.
+    """
+    coordinates = np.asarray(coordinates, dtype=float)
+
+    return tuple(coordinates[..., i] for i in range(coordinates.shape[-1]))
@@ -0,0 +1,403 @@
+"""
+Pairwise distance matrices between two palettes, or a palette and itself.
+
+Rows of the matrix are scored in blocks sized to keep temporary arrays of the metric
+kernels under a memory ceiling, optionally by a pool of worker processes. Blocks are
+streamed to a compressed .npz file (or a Parquet file, which requires pyarrow), so
+catalogs of tens of thousands of colors never need the whole matrix in memory.
+
+Matrices are computed from the command line with:
+    python -m metrics.matrix data/dmc.csv dmc_ariadna.npz --other data/ariadna.csv
+"""
+import argparse
+import csv
+import os
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union
+
+import numpy as np
+
+from converters.hexadec import Colors
+from metrics.scoring import METRIC_KERNELS, to_color_space
+
+
+DEFAULT_MEMORY_LIMIT = 256 * 2 ** 20
+OUTPUT_FORMATS = (".npz", ".parquet")
+
+DType = Union[np.dtype, type, str]
+
+# Float64 arrays of the block's shape alive at once in a metric kernel, measured for
+# CIEDE2000 which needs the most of them
+_WORKING_ARRAYS = 32
+
+# Coordinates of the matrix columns, set in every worker at startup
+_worker_columns: Optional[np.ndarray] = None
+
+
+def block_rows(
+    columns: int, memory_limit: int = DEFAULT_MEMORY_LIMIT, workers: int = 1
+) -> int:
+    """
+    Computes the number of rows scored at once under a memory ceiling.
+
+    Args:
+        columns (int): Number of matrix columns.
+        memory_limit (int, optional): Memory ceiling of temporary arrays of all
+            workers in bytes. Defaults to 256 MiB.
+        workers (int, optional): Number of blocks scored at the same time. Defaults
+            to 1.
+
+    Returns:
+        int: Number of rows per block, at least 1.
+    """
+    row_bytes = max(columns, 1) * np.dtype(np.float64).itemsize * _WORKING_ARRAYS
+    return max(1, memory_limit // (row_bytes * max(workers, 1)))
+
+
+def _score(
+    rows: np.ndarray, columns: np.ndarray, metric: str, dtype: np.dtype
+) -> np.ndarray:
+    metric_f, _ = METRIC_KERNELS[metric]
+    return metric_f(rows[:, np.newaxis], columns).astype(dtype, copy=False)
+
+
+def _init_worker(columns: np.ndarray) -> None:
+    """
+    Stores coordinates of the matrix columns used by the worker.
+
+    Args:
+        columns (np.ndarray): Column coordinates in the metric's color space.
+    """
+    global _worker_columns
+    _worker_columns = columns
+
+
+def _score_block(rows: np.ndarray, metric: str, dtype: np.dtype) -> np.ndarray:
+    """
+    Scores a block of rows against the columns of the worker.
+
+    Args:
+        rows (np.ndarray): Row coordinates in the metric's color space.
+        metric (str): Metric name.
+        dtype (np.dtype): Type of stored distances.
+
+    Returns:
+        np.ndarray: Block of the distance matrix.
+    """
+    return _score(rows, _worker_columns, metric, dtype)
+
+
+def iter_distance_blocks(
+    first: Colors,
+    second: Optional[Colors] = None,
+    metric: str = "CIEDE2000",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    dtype: DType = np.float64,
+    workers: Optional[int] = 0,
+) -> Iterator[np.ndarray]:
+    """
+    Yields consecutive row blocks of the distance matrix between two palettes.
+
+    At most two blocks per worker are in flight, so memory use is bounded by the
+    ceiling and the blocks waiting to be consumed.
+
+    Args:
+        first (Colors): Hexadecimal color codes (or primaries) of the matrix rows.
+        second (Optional[Colors], optional): Colors of the matrix columns. Defaults to
+            None (the first palette against itself).
+        metric (str, optional): Metric name. Defaults to "CIEDE2000".
+        memory_limit (int, optional): Memory ceiling of temporary arrays in bytes.
+            Defaults to 256 MiB.
+        dtype (DType, optional): Type of stored distances, scores are computed in
+            float64. Defaults to np.float64.
+        workers (Optional[int], optional): Number of worker processes, 0 scores in
+            the calling process. Defaults to 0 (None uses all cores).
+
+    Yields:
+        np.ndarray: Blocks with a row per color of the first palette and a column per
+            color of the second.
+    """
+    space = METRIC_KERNELS[metric][1]
+    rows = to_color_space(first, space)
+    columns = rows if second is None else to_color_space(second, space)
+    dtype = np.dtype(dtype)
+
+    if workers == 0:
+        size = block_rows(len(columns), memory_limit)
+        for start in range(0, len(rows), size):
+            yield _score(rows[start : start + size], columns, metric, dtype)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    size = block_rows(len(columns), memory_limit, workers)
+    pending: deque[Future] = deque()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(columns,)
+    ) as executor:
+        try:
+            for start in range(0, len(rows), size):
+                block = rows[start : start + size]
+                pending.append(executor.submit(_score_block, block, metric, dtype))
+                while len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+
+def distance_matrix(
+    first: Colors,
+    second: Optional[Colors] = None,
+    metric: str = "CIEDE2000",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    dtype: DType = np.float64,
+    workers: Optional[int] = 0,
+) -> np.ndarray:
+    """
+    Computes the distance matrix between two palettes in memory.
+
+    Args:
+        first (Colors): Hexadecimal color codes (or primaries) of the matrix rows.
+        second (Optional[Colors], optional): Colors of the matrix columns. Defaults to
+            None (the first palette against itself).
+        metric (str, optional): Metric name. Defaults to "CIEDE2000".
+        memory_limit (int, optional): Memory ceiling of temporary arrays in bytes.
+            Defaults to 256 MiB.
+        dtype (DType, optional): Type of stored distances. Defaults to np.float64.
+        workers (Optional[int], optional): Number of worker processes, 0 scores in
+            the calling process. Defaults to 0 (None uses all cores).
+
+    Returns:
+        np.ndarray: Matrix with a row per color of the first palette and a column per
+            color of the second.
+    """
+    matrix = np.empty(
+        (len(first), len(first if second is None else second)), dtype=dtype
+    )
+
+    start = 0
+    for block in iter_distance_blocks(
+        first, second, metric, memory_limit, dtype, workers
+    ):
+        matrix[start : start + len(block)] = block
+        start += len(block)
+
+    return matrix
+
+
+def save_distance_matrix(
+    path: Union[Path, str],
+    first: Colors,
+    second: Optional[Colors] = None,
+    metric: str = "CIEDE2000",
+    memory_limit: int = DEFAULT_MEMORY_LIMIT,
+    dtype: DType = np.float64,
+    workers: Optional[int] = 0,
+    labels: Optional[tuple[Sequence[str], Sequence[str]]] = None,
+) -> Path:
+    """
+    Streams the distance matrix between two palettes to a file.
+
+    The format is chosen by the suffix. An .npz archive holds the 'distances'
+    matrix, 'rows' and 'columns' labels and the 'metric' name. A Parquet file is a
+    long table with 'row' and 'column' labels and the 'score' of every pair, in row
+    major order, and the metric name in the schema metadata; it is written one row
+    group per block. Nothing is left at the path if writing fails.
+
+    Args:
+        path (Union[Path, str]): Path of the .npz or .parquet file.
+        first (Colors): Hexadecimal color codes (or primaries) of the matrix rows.
+        second (Optional[Colors], optional): Colors of the matrix columns. Defaults to
+            None (the first palette against itself).
+        metric (str, optional): Metric name. Defaults to "CIEDE2000".
+        memory_limit (int, optional): Memory ceiling of temporary arrays in bytes.
+            Defaults to 256 MiB.
+        dtype (DType, optional): Type of stored distances. Defaults to np.float64.
+        workers (Optional[int], optional): Number of worker processes, 0 scores in
+            the calling process. Defaults to 0 (None uses all cores).
+        labels (Optional[tuple[Sequence[str], Sequence[str]]], optional): Labels of
+            rows and columns, such as mouline codes. Defaults to None (row and column
+            numbers).
+
+    Returns:
+        Path: Path of the saved file.
+    """
+    path = Path(path)
+    if path.suffix not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format: {path.suffix}")
+
+    shape = (len(first), len(first if second is None else second))
+    if labels is None:
+        labels = (range(shape[0]), range(shape[1]))
+    row_labels, column_labels = (np.array(list(map(str, axis))) for axis in labels)
+    if (len(row_labels), len(column_labels)) != shape:
+        raise ValueError(f"Expected {shape} labels of rows and columns.")
+
+    write = _write_npz if path.suffix == ".npz" else _write_parquet
+    tmp_path = path.with_name(f"{path.stem}.tmp{path.suffix}")
+    try:
+        write(
+            tmp_path,
+            iter_distance_blocks(first, second, metric, memory_limit, dtype, workers),
+            np.dtype(dtype),
+            row_labels,
+            column_labels,
+            metric,
+        )
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    return path
+
+
+def _write_npz(
+    path: Path,
+    blocks: Iterable[np.ndarray],
+    dtype: np.dtype,
+    row_labels: np.ndarray,
+    column_labels: np.ndarray,
+    metric: str,
+) -> None:
+    """
+    Writes blocks of the matrix to a compressed .npz archive as they come.
+
+    Args:
+        path (Path): Path of the archive.
+        blocks (Iterable[np.ndarray]): Consecutive row blocks.
+        dtype (np.dtype): Type of distances.
+        row_labels (np.ndarray): Labels of rows.
+        column_labels (np.ndarray): Labels of columns.
+        metric (str): Metric name.
+    """
+    header = {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (len(row_labels), len(column_labels)),
+    }
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("distances.npy", "w", force_zip64=True) as file:
+            np.lib.format.write_array_header_2_0(file, header)
+            for block in blocks:
+                file.write(np.ascontiguousarray(block).tobytes())
+
+        for name, array in (
+            ("rows", row_labels),
+            ("columns", column_labels),
+            ("metric", np.array(metric)),
+        ):
+            with archive.open(f"{name}.npy", "w", force_zip64=True) as file:
+                np.lib.format.write_array(file, array, allow_pickle=False)
+
+
+def _write_parquet(
+    path: Path,
+    blocks: Iterable[np.ndarray],
+    dtype: np.dtype,
+    row_labels: np.ndarray,
+    column_labels: np.ndarray,
+    metric: str,
+) -> None:
+    """
+    Writes blocks of the matrix to a long Parquet table, one row group per block.
+
+    The schema has three fields whatever the number of columns. Labels are
+    dictionary encoded, so every block stores its row labels and the column labels
+    once, and the pairs as integer indexes.
+
+    Args:
+        path (Path): Path of the file.
+        blocks (Iterable[np.ndarray]): Consecutive row blocks.
+        dtype (np.dtype): Type of distances.
+        row_labels (np.ndarray): Labels of rows.
+        column_labels (np.ndarray): Labels of columns.
+        metric (str): Metric name.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:  # pragma: no cover
+        raise ImportError(
+            "Writing Parquet files requires pyarrow: pip install pyarrow"
+        ) from None
+
+    label_type = pa.dictionary(pa.int32(), pa.string())
+    schema = pa.schema(
+        [
+            pa.field("row", label_type),
+            pa.field("column", label_type),
+            pa.field("score", pa.from_numpy_dtype(dtype)),
+        ],
+        metadata={"metric": metric},
+    )
+    columns = pa.array(column_labels)
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        start = 0
+        for block in blocks:
+            rows, width = block.shape
+            arrays = [
+                pa.DictionaryArray.from_arrays(
+                    np.repeat(np.arange(rows, dtype=np.int32), width),
+                    pa.array(row_labels[start : start + rows]),
+                ),
+                pa.DictionaryArray.from_arrays(
+                    np.tile(np.arange(width, dtype=np.int32), rows), columns
+                ),
+                pa.array(np.ascontiguousarray(block).reshape(-1)),
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            start += rows
+
+
+def _read_palette(path: Union[Path, str]) -> tuple[list[str], list[str]]:
+    with open(path, newline="") as file:
+        rows = list(csv.DictReader(file))
+    return [row["number"] for row in rows], [row["rgb"] for row in rows]
+
+
+def main(args: Optional[list[str]] = None) -> None:
+    """
+    Saves a distance matrix from the command line.
+
+    Args:
+        args (Optional[list[str]], optional): Command line arguments. Defaults to None
+            (sys.argv).
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("palette", help="path to the CSV of matrix rows")
+    parser.add_argument("output", help="path of the .npz or .parquet matrix")
+    parser.add_argument(
+        "--other", help="path to the CSV of matrix columns (default: the palette)"
+    )
+    parser.add_argument("--metric", choices=list(METRIC_KERNELS), default="CIEDE2000")
+    parser.add_argument("--dtype", choices=["float64", "float32"], default="float64")
+    parser.add_argument(
+        "--memory-limit", type=int, default=DEFAULT_MEMORY_LIMIT // 2 ** 20, help="MiB"
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parsed = parser.parse_args(args)
+
+    codes, colors = _read_palette(parsed.palette)
+    other_codes, other_colors = (
+        _read_palette(parsed.other) if parsed.other else (codes, None)
+    )
+
+    save_distance_matrix(
+        parsed.output,
+        colors,
+        other_colors,
+        metric=parsed.metric,
+        memory_limit=parsed.memory_limit * 2 ** 20,
+        dtype=parsed.dtype,
+        workers=parsed.workers,
+        labels=(codes, other_codes),
+    )
+
+
+if __name__ == "__main__":
+    main()
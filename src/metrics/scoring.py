@@ -0,0 +1,176 @@
+"""
+Helpers for scoring palettes with batch metric kernels.
+"""
+from typing import Optional, Union
+
+import numpy as np
+
+from converters import hex_to_dec_primaries_batch, hex_to_xyz_batch, xyz_to_lab_batch
+from metrics import (
+    cie76_batch,
+    cie94_batch,
+    ciede2000_batch,
+    cmc_1_1_batch,
+    cmc_2_1_batch,
+    rgb_euclidean_batch,
+    rgb_euclidean_gamma_correction_batch,
+)
+from metrics.bounds import ciede2000_lower_bounds, cmc_lower_bounds
+
+
+# Batch kernel of every metric together with the color space of its coordinates
+METRIC_KERNELS = {
+    "RGB euclidean": (rgb_euclidean_batch, "rgb"),
+    "RGB with gamma correction": (rgb_euclidean_gamma_correction_batch, "rgb"),
+    "CIE76": (cie76_batch, "lab"),
+    "CIE94": (cie94_batch, "lab"),
+    "CIEDE2000": (ciede2000_batch, "lab"),
+    "CMC 1:1": (cmc_1_1_batch, "lab"),
+    "CMC 2:1": (cmc_2_1_batch, "lab"),
+}
+
+# Lower bounds of the scores of expensive Lab metrics, computed from the Lab
+# coordinates and chroma of the compared colors
+LOWER_BOUNDS = {
+    "CIEDE2000": ciede2000_lower_bounds,
+    "CMC 1:1": lambda base, others, chroma: cmc_lower_bounds(base, others, chroma),
+    "CMC 2:1": lambda base, others, chroma: cmc_lower_bounds(
+        base, others, chroma, unit_lc_ratio=False
+    ),
+}
+
+# Metrics searched with `pruned_top_n_indices` in palettes of at least the given size,
+# smaller palettes are scored faster by brute force. Bounds of CMC drop the hue term
+# and prune too few colors to pay off.
+PRUNED_SEARCH_METRICS = ("CIEDE2000",)
+PRUNED_SEARCH_MIN_SIZE = 1024
+
+COLOR_SPACES = ("rgb", "xyz", "lab")
+
+# Number of candidates with the lowest bounds scored per requested color to estimate
+# the n-th score
+_SEEDS_PER_RESULT = 4
+
+# Relative slack added to the n-th score so that rounding never prunes a candidate
+_BOUND_SLACK = 1e-9
+
+
+def to_color_space(colors: Union[list[str], np.ndarray], space: str) -> np.ndarray:
+    """
+    Converts hexadecimal color codes to coordinates in the given color space.
+
+    Args:
+        colors (Union[list[str], np.ndarray]): Hexadecimal color codes.
+        space (str): One of 'rgb' (primaries 0-255), 'xyz' or 'lab'.
+
+    Returns:
+        np.ndarray[float]: Nx3 numpy array of coordinates.
+    """
+    if space == "rgb":
+        return hex_to_dec_primaries_batch(colors).astype(float)
+    if space == "xyz":
+        return hex_to_xyz_batch(colors)
+    if space == "lab":
+        return xyz_to_lab_batch(hex_to_xyz_batch(colors))
+
+    raise ValueError(f"Unsupported color space: {space}.")
+
+
+def palette_coordinates(colors: Union[list[str], np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    Converts a palette to read-only coordinate arrays in every supported color space.
+
+    Codes are decoded once and every color space is computed from the primaries.
+
+    Args:
+        colors (Union[list[str], np.ndarray]): Hexadecimal color codes of the palette.
+
+    Returns:
+        dict[str, np.ndarray]: Nx3 arrays of coordinates keyed by the color space.
+    """
+    primaries = hex_to_dec_primaries_batch(colors)
+    coordinates = {}
+    for space in COLOR_SPACES:
+        coordinates[space] = to_color_space(primaries, space)
+        coordinates[space].setflags(write=False)
+
+    return coordinates
+
+
+def top_n_indices(scores: np.ndarray, n: int) -> np.ndarray:
+    """
+    Selects indices of the n smallest scores, ordered by score.
+
+    Uses partial selection so only the selected candidates are sorted. Ties are broken
+    by the lower index, which matches `pd.DataFrame.nsmallest` with keep='first'.
+
+    Args:
+        scores (np.ndarray): 1D array of scores.
+        n (int): Number of indices to select.
+
+    Returns:
+        np.ndarray[int]: Indices of the n smallest scores (fewer if there are less than
+            n scores).
+    """
+    if n <= 0:
+        return np.empty(0, dtype=np.intp)
+    if n >= len(scores):
+        return np.argsort(scores, kind="stable")
+
+    nth_score = scores[np.argpartition(scores, n - 1)[n - 1]]
+    candidates = np.flatnonzero(scores <= nth_score)
+    order = np.argsort(scores[candidates], kind="stable")[:n]
+
+    return candidates[order]
+
+
+def pruned_top_n_indices(
+    base: np.ndarray,
+    others: np.ndarray,
+    metric: str,
+    n: int,
+    others_chroma: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, int]:
+    """
+    Selects indices of the n smallest scores without scoring hopeless colors.
+
+    A lower bound of the score is computed for every color (see `LOWER_BOUNDS`). The
+    colors with the lowest bounds are scored first, which gives an upper bound of the
+    n-th score, and only colors with bounds not above it are scored with the full
+    metric. Results, including ties, are identical to `top_n_indices` of all scores.
+
+    Args:
+        base (np.ndarray): Lab coordinates of the base color.
+        others (np.ndarray): Nx3 array of Lab coordinates of the compared colors.
+        metric (str): One of `LOWER_BOUNDS`.
+        n (int): Number of indices to select.
+        others_chroma (Optional[np.ndarray], optional): Chroma of the compared colors.
+            Defaults to None (computed from the coordinates).
+
+    Returns:
+        tuple[np.ndarray, int]: Indices of the n most similar colors ordered by score
+            and the number of colors scored with the full metric.
+    """
+    metric_f, _ = METRIC_KERNELS[metric]
+    n_seeds = n * _SEEDS_PER_RESULT
+    if n <= 0 or n_seeds >= len(others):
+        return top_n_indices(metric_f(base, others), n), len(others)
+
+    if others_chroma is None:
+        others_chroma = np.sqrt(others[:, 1] ** 2 + others[:, 2] ** 2)
+    bounds = LOWER_BOUNDS[metric](base, others, others_chroma)
+
+    seeds = np.argpartition(bounds, n_seeds - 1)[:n_seeds]
+    seed_scores = metric_f(base, others[seeds])
+    nth_score = np.partition(seed_scores, n - 1)[n - 1]
+
+    bounds[seeds] = np.inf
+    rest = np.flatnonzero(bounds <= nth_score + abs(nth_score) * _BOUND_SLACK)
+
+    rows = np.concatenate((seeds, rest))
+    scores = np.concatenate((seed_scores, metric_f(base, others[rest])))
+    # Ties are broken by the lower index, so candidates are put back in palette order
+    order = np.argsort(rows)
+    rows, scores = rows[order], scores[order]
+
+    return rows[top_n_indices(scores, n)], len(rows)
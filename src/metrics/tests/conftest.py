@@ -1,5 +1,8 @@
+import numpy as np
 import pytest
 
+from converters import hex_to_xyz_batch, xyz_to_lab_batch
+
 
 # Reference values obtained using Bruce Justin Lindbloom calculator
 # http://www.brucelindbloom.com/index.html?ColorCalculator.html
@@ -28,3 +31,16 @@ def black() -> str:
 @pytest.fixture
 def white() -> str:
     return "#ffffff"
+
+
+@pytest.fixture
+def palette() -> list[str]:
+    rng = np.random.default_rng(seed=0)
+    colors = [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=300)]
+
+    return colors + ["#000000", "#ffffff", "#808080", "#c25b08", "#2025c7"]
+
+
+@pytest.fixture
+def palette_lab(palette: list[str]) -> np.ndarray:
+    return xyz_to_lab_batch(hex_to_xyz_batch(palette))
@@ -0,0 +1,105 @@
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from converters import hex_to_dec_primaries_batch
+from metrics import (
+    cie76_batch,
+    cie94_batch,
+    ciede2000_batch,
+    cmc_1_1_batch,
+    cmc_2_1_batch,
+    rgb_euclidean_batch,
+    rgb_euclidean_gamma_correction_batch,
+    squared_euclidean_batch,
+)
+from metrics.bounds import (
+    cie76_search_radius,
+    cie94_search_radius,
+    ciede2000_lower_bounds,
+    ciede2000_search_radius,
+    cmc_lower_bounds,
+    cmc_search_radius,
+    rgb_euclidean_gamma_correction_search_radius,
+    rgb_euclidean_search_radius,
+)
+
+
+def _ciede2000_search_radius(
+    base: np.ndarray, score: float, palette_lab: np.ndarray
+) -> float:
+    chroma = np.sqrt(palette_lab[:, 1] ** 2 + palette_lab[:, 2] ** 2)
+    lightness_range = (palette_lab[:, 0].min(), palette_lab[:, 0].max())
+    return ciede2000_search_radius(base, score, lightness_range, chroma.max())
+
+
+def _assert_nothing_beats_score_outside_radius(
+    metric_batch: Callable, search_radius: Callable, palette_coords: np.ndarray
+) -> None:
+    for base in palette_coords:
+        scores = metric_batch(base, palette_coords)
+        dists = np.sqrt(squared_euclidean_batch(base, palette_coords))
+
+        for score in np.quantile(scores, [0, 0.001, 0.01, 0.1]):
+            outside = dists > search_radius(base, score, palette_coords)
+
+            assert np.all(scores[outside] > score)
+
+
+@pytest.mark.parametrize(
+    "metric_batch, search_radius",
+    [
+        (cie76_batch, lambda base, score, _: cie76_search_radius(base, score)),
+        (cie94_batch, lambda base, score, _: cie94_search_radius(base, score)),
+        (ciede2000_batch, _ciede2000_search_radius),
+        (cmc_1_1_batch, lambda base, score, _: cmc_search_radius(base, score, True)),
+        (cmc_2_1_batch, lambda base, score, _: cmc_search_radius(base, score, False)),
+    ],
+)
+def test_lab_metrics_search_radius(
+    metric_batch: Callable, search_radius: Callable, palette_lab: np.ndarray
+):
+    _assert_nothing_beats_score_outside_radius(
+        metric_batch, search_radius, palette_lab
+    )
+
+
+@pytest.mark.parametrize(
+    "metric_batch, search_radius",
+    [
+        (rgb_euclidean_batch, rgb_euclidean_search_radius),
+        (
+            rgb_euclidean_gamma_correction_batch,
+            rgb_euclidean_gamma_correction_search_radius,
+        ),
+    ],
+)
+def test_rgb_metrics_search_radius(
+    metric_batch: Callable, search_radius: Callable, palette: list[str]
+):
+    _assert_nothing_beats_score_outside_radius(
+        metric_batch,
+        lambda base, score, _: search_radius(base, score),
+        hex_to_dec_primaries_batch(palette),
+    )
+
+
+@pytest.mark.parametrize(
+    "metric_batch, lower_bounds",
+    [
+        (ciede2000_batch, ciede2000_lower_bounds),
+        (cmc_1_1_batch, lambda *args: cmc_lower_bounds(*args, unit_lc_ratio=True)),
+        (cmc_2_1_batch, lambda *args: cmc_lower_bounds(*args, unit_lc_ratio=False)),
+    ],
+)
+def test_lower_bounds(
+    metric_batch: Callable, lower_bounds: Callable, palette_lab: np.ndarray
+):
+    chroma = np.sqrt(palette_lab[:, 1] ** 2 + palette_lab[:, 2] ** 2)
+
+    for base in palette_lab:
+        scores = metric_batch(base, palette_lab)
+        bounds = lower_bounds(base, palette_lab, chroma)
+
+        assert np.all(bounds <= scores * (1 + 1e-9) + 1e-12)
@@ -1,8 +1,12 @@
+from typing import Callable
+
+import numpy as np
 import pytest
 from numpy import sqrt
 from pytest import approx
 
-from metrics import cie76, cie94, ciede2000
+from converters import hex_to_xyz, xyz_to_lab
+from metrics import cie76, cie76_batch, cie94, cie94_batch, ciede2000, ciede2000_batch
 
 
 @pytest.mark.parametrize(
@@ -57,3 +61,31 @@ def test_ciede2000(
     color_2 = request.getfixturevalue(color_2)
 
     assert sqrt(ciede2000(color_1, color_2)) == approx(score, abs=1e-3)
+
+
+@pytest.mark.parametrize(
+    "metric, metric_batch",
+    [(cie76, cie76_batch), (cie94, cie94_batch), (ciede2000, ciede2000_batch)],
+)
+@pytest.mark.parametrize("base", ["orange", "blue", "black", "white"])
+def test_batch_matches_scalar(
+    metric: Callable,
+    metric_batch: Callable,
+    base: str,
+    palette: list[str],
+    palette_lab: np.ndarray,
+    request: pytest.FixtureRequest,
+):
+    base = request.getfixturevalue(base)
+    base_lab = xyz_to_lab(hex_to_xyz(base))
+
+    expected = [metric(base, c) for c in palette]
+
+    assert metric_batch(base_lab, palette_lab) == approx(expected, rel=0, abs=1e-9)
+
+
+def test_batch_broadcasts_to_matrix(palette_lab: np.ndarray):
+    scores = ciede2000_batch(palette_lab[:4, np.newaxis], palette_lab)
+
+    assert scores.shape == (4, len(palette_lab))
+    assert scores[2] == approx(ciede2000_batch(palette_lab[2], palette_lab), abs=1e-12)
@@ -1,8 +1,10 @@
+import numpy as np
 import pytest
 from numpy import sqrt
 from pytest import approx
 
-from metrics import _cmc, cmc_1_1, cmc_2_1
+from converters import hex_to_xyz, xyz_to_lab
+from metrics import _cmc, _cmc_batch, cmc_1_1, cmc_1_1_batch, cmc_2_1, cmc_2_1_batch
 
 
 @pytest.mark.parametrize(
@@ -43,3 +45,24 @@ def test_cmc_2_1(
 
     assert result == approx(score, abs=1e-3)
     assert result == sqrt(_cmc(color_1, color_2, unit_lc_ratio=False))
+
+
+@pytest.mark.parametrize("unit_lc_ratio", [True, False])
+@pytest.mark.parametrize("base", ["orange", "blue", "black", "white"])
+def test_cmc_batch_matches_scalar(
+    unit_lc_ratio: bool,
+    base: str,
+    palette: list[str],
+    palette_lab: np.ndarray,
+    request: pytest.FixtureRequest,
+):
+    base = request.getfixturevalue(base)
+    base_lab = xyz_to_lab(hex_to_xyz(base))
+
+    expected = [_cmc(base, c, unit_lc_ratio=unit_lc_ratio) for c in palette]
+    result = _cmc_batch(base_lab, palette_lab, unit_lc_ratio=unit_lc_ratio)
+
+    assert result == approx(expected, rel=0, abs=1e-9)
+
+    wrapper = cmc_1_1_batch if unit_lc_ratio else cmc_2_1_batch
+    np.testing.assert_array_equal(wrapper(base_lab, palette_lab), result)
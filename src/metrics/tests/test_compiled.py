@@ -0,0 +1,93 @@
+from typing import Callable
+
+import numpy as np
+import pytest
+
+from converters import InvalidColorError, hex_to_xyz, xyz_to_lab
+from metrics import cie76, cie94, ciede2000, cmc_1_1, cmc_2_1
+from metrics.compiled import (
+    JIT_AVAILABLE,
+    SCALAR_KERNELS,
+    delta_e,
+    hex_to_lab,
+    nearest,
+    rgb_to_lab,
+)
+from metrics.scoring import METRIC_KERNELS, to_color_space
+
+
+@pytest.mark.parametrize(
+    "metric, metric_f",
+    [
+        ("CIE76", cie76),
+        ("CIE94", cie94),
+        ("CIEDE2000", ciede2000),
+        ("CMC 1:1", cmc_1_1),
+        ("CMC 2:1", cmc_2_1),
+    ],
+)
+def test_delta_e_matches_scalar_metrics(
+    palette: list[str], metric: str, metric_f: Callable
+):
+    for base, other in zip(palette, palette[::-1]):
+        assert delta_e(base, other, metric) == pytest.approx(
+            metric_f(base, other), rel=1e-9, abs=1e-9
+        )
+
+
+def test_hex_to_lab(palette: list[str]):
+    for color in palette:
+        np.testing.assert_allclose(
+            hex_to_lab(color), xyz_to_lab(hex_to_xyz(color)), rtol=1e-12, atol=1e-12
+        )
+
+
+@pytest.mark.parametrize("color", ["#fff", "0x00ff00", "-1", "ff_ff_ff", "#c25b0g"])
+def test_hex_to_lab_rejects_malformed_colors(color: str):
+    with pytest.raises(InvalidColorError):
+        hex_to_lab(color)
+    with pytest.raises(InvalidColorError):
+        delta_e(color, "#000000", "CIE76")
+
+
+@pytest.mark.parametrize("metric", list(SCALAR_KERNELS))
+def test_nearest_matches_batch_kernels(palette_lab: np.ndarray, metric: str):
+    kernel, _ = METRIC_KERNELS[metric]
+
+    for base in palette_lab[:50]:
+        index, score = nearest(base, palette_lab[50:], metric)
+        scores = kernel(base, palette_lab[50:])
+
+        assert index == np.argmin(scores)
+        assert score == pytest.approx(scores.min(), rel=1e-9, abs=1e-9)
+
+
+def test_nearest_unsupported_metric(palette_lab: np.ndarray):
+    with pytest.raises(ValueError, match="metric"):
+        nearest(palette_lab[0], palette_lab, "RGB euclidean")
+
+
+@pytest.mark.parametrize("metric", list(SCALAR_KERNELS))
+def test_jit_kernels_match_numpy_fallback(
+    palette: list[str], palette_lab: np.ndarray, metric: str
+):
+    pytest.importorskip("numba")
+    batch_kernel, _ = METRIC_KERNELS[metric]
+    kernel = SCALAR_KERNELS[metric]
+
+    # Compiled dispatchers keep the Python function they were built from
+    assert JIT_AVAILABLE and hasattr(kernel, "py_func")
+
+    primaries = to_color_space(palette[:20], "rgb").astype(int)
+    for (r, g, b), expected in zip(primaries, palette_lab[:20]):
+        np.testing.assert_allclose(rgb_to_lab(r, g, b), expected, atol=1e-9)
+
+    others = palette_lab[20:]
+    for base in palette_lab[:20]:
+        scores = batch_kernel(base, others)
+        index, score = nearest(base, others, metric)
+        compiled = [kernel(tuple(base), tuple(other)) for other in others[:20]]
+
+        assert index == np.argmin(scores)
+        assert score == pytest.approx(scores.min(), rel=1e-9, abs=1e-9)
+        np.testing.assert_allclose(compiled, scores[:20], rtol=1e-9, atol=1e-9)
@@ -1,8 +1,18 @@
+from typing import Callable
+
 import pytest
 from numpy import sqrt
 from pytest import approx
 
-from metrics import rgb_euclidean, rgb_euclidean_gamma_correction, xyz_euclidean
+from converters import hex_to_dec_primaries_batch, hex_to_xyz_batch
+from metrics import (
+    rgb_euclidean,
+    rgb_euclidean_batch,
+    rgb_euclidean_gamma_correction,
+    rgb_euclidean_gamma_correction_batch,
+    xyz_euclidean,
+    xyz_euclidean_batch,
+)
 
 
 @pytest.mark.parametrize(
@@ -59,3 +69,32 @@ def test_xyz_euclidean(
     color_2 = request.getfixturevalue(color_2)
 
     assert sqrt(xyz_euclidean(color_1, color_2)) == approx(score, abs=1e-3)
+
+
+@pytest.mark.parametrize(
+    "metric, metric_batch, to_coordinates",
+    [
+        (rgb_euclidean, rgb_euclidean_batch, hex_to_dec_primaries_batch),
+        (
+            rgb_euclidean_gamma_correction,
+            rgb_euclidean_gamma_correction_batch,
+            hex_to_dec_primaries_batch,
+        ),
+        (xyz_euclidean, xyz_euclidean_batch, hex_to_xyz_batch),
+    ],
+)
+@pytest.mark.parametrize("base", ["orange", "blue", "black", "white"])
+def test_batch_matches_scalar(
+    metric: Callable,
+    metric_batch: Callable,
+    to_coordinates: Callable,
+    base: str,
+    palette: list[str],
+    request: pytest.FixtureRequest,
+):
+    base = request.getfixturevalue(base)
+
+    expected = [metric(base, c) for c in palette]
+    result = metric_batch(to_coordinates([base])[0], to_coordinates(palette))
+
+    assert result == approx(expected, rel=0, abs=1e-9)
@@ -1,8 +1,9 @@
+import numpy as np
 import pytest
 from numpy import sqrt
 from pytest import approx
 
-from metrics import squared_euclidean
+from metrics import squared_euclidean, squared_euclidean_batch
 from metrics.helpers import Coordinates
 
 
@@ -20,3 +21,12 @@ def test_euclidean_without_weights(
     first: Coordinates, second: Coordinates, result: float
 ):
     assert sqrt(squared_euclidean(first, second)) == approx(result, abs=1e-3)
+
+
+def test_squared_euclidean_batch():
+    first = np.array([2.3, 1.5, 6])
+    second = np.array([[0, 1.1, -5], [2.3, 1.5, 6]])
+
+    result = squared_euclidean_batch(first, second, weights=np.array([1, 2, 3]))
+
+    assert result == approx([squared_euclidean(first, s, [1, 2, 3]) for s in second])
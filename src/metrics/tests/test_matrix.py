@@ -0,0 +1,163 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from converters import InvalidColorError
+from metrics.matrix import (
+    block_rows,
+    distance_matrix,
+    iter_distance_blocks,
+    main,
+    save_distance_matrix,
+)
+from metrics.scoring import METRIC_KERNELS, to_color_space
+
+
+DATA_DIR = Path(__file__).parents[3] / "data"
+
+
+@pytest.fixture(scope="module")
+def palettes() -> tuple[list[str], list[str]]:
+    rng = np.random.default_rng(seed=0)
+    first, second = rng.integers(0, 2 ** 24, size=(2, 40))
+    return [f"#{c:06x}" for c in first], [f"#{c:06x}" for c in second[:25]]
+
+
+@pytest.mark.parametrize("metric", list(METRIC_KERNELS))
+def test_distance_matrix_matches_kernels(
+    palettes: tuple[list[str], list[str]], metric: str
+):
+    first, second = palettes
+    metric_f, space = METRIC_KERNELS[metric]
+    rows, columns = to_color_space(first, space), to_color_space(second, space)
+
+    np.testing.assert_array_equal(
+        distance_matrix(first, second, metric),
+        metric_f(rows[:, np.newaxis], columns),
+    )
+    np.testing.assert_array_equal(
+        distance_matrix(first, metric=metric), metric_f(rows[:, np.newaxis], rows)
+    )
+
+
+def test_blocks_respect_memory_limit(palettes: tuple[list[str], list[str]]):
+    first, second = palettes
+    size = block_rows(len(second), memory_limit=50_000)
+
+    blocks = list(iter_distance_blocks(first, second, "CIE94", memory_limit=50_000))
+
+    assert size == 7
+    assert [len(block) for block in blocks] == [7] * 5 + [5]
+    np.testing.assert_array_equal(
+        np.concatenate(blocks), distance_matrix(first, second, "CIE94")
+    )
+    assert block_rows(10 ** 6, memory_limit=1) == 1
+
+
+def test_distance_matrix_in_workers(palettes: tuple[list[str], list[str]]):
+    first, second = palettes
+
+    result = distance_matrix(
+        first, second, "CMC 2:1", memory_limit=50_000, dtype=np.float32, workers=2
+    )
+
+    assert result.dtype == np.float32
+    np.testing.assert_array_equal(
+        result, distance_matrix(first, second, "CMC 2:1").astype(np.float32)
+    )
+
+
+def test_save_npz(tmp_path: Path, palettes: tuple[list[str], list[str]]):
+    first, second = palettes
+    labels = ([f"a{i}" for i in range(len(first))], [f"b{i}" for i in range(25)])
+
+    path = save_distance_matrix(
+        tmp_path / "matrix.npz",
+        first,
+        second,
+        "CIEDE2000",
+        memory_limit=50_000,
+        dtype="float32",
+        labels=labels,
+    )
+
+    with np.load(path) as archive:
+        np.testing.assert_array_equal(
+            archive["distances"],
+            distance_matrix(first, second, "CIEDE2000", dtype=np.float32),
+        )
+        assert archive["rows"].tolist() == labels[0]
+        assert archive["columns"].tolist() == labels[1]
+        assert archive["metric"] == "CIEDE2000"
+    assert [p.name for p in tmp_path.iterdir()] == ["matrix.npz"]
+
+
+def test_save_parquet(tmp_path: Path, palettes: tuple[list[str], list[str]]):
+    pq = pytest.importorskip("pyarrow.parquet")
+    first, second = palettes
+
+    path = save_distance_matrix(
+        tmp_path / "matrix.parquet", first, second, "CIE76", memory_limit=50_000
+    )
+
+    table = pq.read_table(path)
+    assert table.schema.metadata[b"metric"] == b"CIE76"
+    assert table.schema.names == ["row", "column", "score"]
+    assert table.column("row").to_pylist() == [
+        str(i) for i in range(len(first)) for _ in range(len(second))
+    ]
+    assert table.column("column").to_pylist() == [
+        str(i) for _ in range(len(first)) for i in range(len(second))
+    ]
+    np.testing.assert_array_equal(
+        table.column("score").to_numpy().reshape(len(first), len(second)),
+        distance_matrix(first, second, "CIE76"),
+    )
+    assert pq.ParquetFile(path).num_row_groups == 6
+
+
+def test_failed_save_removes_temporary_file(
+    tmp_path: Path, palettes: tuple[list[str], list[str]]
+):
+    first, _ = palettes
+
+    with pytest.raises(InvalidColorError):
+        save_distance_matrix(tmp_path / "matrix.npz", first, first[:-1] + ["#fff"])
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_save_invalid_arguments(tmp_path: Path, palettes: tuple[list[str], list[str]]):
+    first, second = palettes
+
+    with pytest.raises(ValueError, match="format"):
+        save_distance_matrix(tmp_path / "matrix.csv", first, second)
+    with pytest.raises(ValueError, match="labels"):
+        save_distance_matrix(
+            tmp_path / "matrix.npz", first, second, labels=(["a"], ["b"])
+        )
+
+
+def test_main(tmp_path: Path):
+    output = tmp_path / "dmc_ariadna.npz"
+
+    main(
+        [
+            str(DATA_DIR / "dmc.csv"),
+            str(output),
+            "--other",
+            str(DATA_DIR / "ariadna.csv"),
+            "--metric",
+            "CIE94",
+            "--workers",
+            "0",
+        ]
+    )
+
+    dmc = (DATA_DIR / "dmc.csv").read_text().splitlines()[1:]
+    ariadna = (DATA_DIR / "ariadna.csv").read_text().splitlines()[1:]
+    with np.load(output) as archive:
+        assert archive["distances"].shape == (len(dmc), len(ariadna))
+        assert archive["rows"].tolist() == [line.split(",")[0] for line in dmc]
+        assert archive["columns"][0] == "1500"
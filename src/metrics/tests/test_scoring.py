@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from metrics.scoring import (
+    LOWER_BOUNDS,
+    METRIC_KERNELS,
+    palette_coordinates,
+    pruned_top_n_indices,
+    to_color_space,
+    top_n_indices,
+)
+
+
+@pytest.mark.parametrize("n", [1, 3, 5, 10])
+def test_top_n_indices_breaks_ties_by_index(n: int):
+    scores = np.array([3.0, 1.0, 2.0, 1.0, 2.0, 0.5, 2.0, 1.0])
+
+    expected = pd.Series(scores).nsmallest(n, keep="first").index.to_list()
+
+    assert top_n_indices(scores, n).tolist() == expected
+
+
+def test_top_n_indices_of_empty_selection():
+    assert top_n_indices(np.array([1.0, 2.0]), 0).tolist() == []
+
+
+def test_palette_coordinates():
+    coordinates = palette_coordinates(["#c25b08", "#2025c7"])
+
+    assert sorted(coordinates) == ["lab", "rgb", "xyz"]
+    assert coordinates["rgb"].tolist() == [[194, 91, 8], [32, 37, 199]]
+    np.testing.assert_array_equal(
+        coordinates["lab"], to_color_space(["#c25b08", "#2025c7"], "lab")
+    )
+
+
+def test_to_color_space_rejects_unknown_spaces():
+    with pytest.raises(ValueError):
+        to_color_space(["#c25b08"], "hsv")
+
+
+@pytest.mark.parametrize("metric", list(LOWER_BOUNDS))
+@pytest.mark.parametrize("n", [1, 5, 12])
+def test_pruned_top_n_indices_matches_exhaustive_search(
+    palette_lab: np.ndarray, metric: str, n: int
+):
+    metric_f, _ = METRIC_KERNELS[metric]
+    # duplicated colors give tied scores
+    others = np.concatenate((palette_lab, palette_lab[::7]))
+
+    for base in palette_lab[::10]:
+        rows, evaluated = pruned_top_n_indices(base, others, metric, n)
+
+        assert rows.tolist() == top_n_indices(metric_f(base, others), n).tolist()
+        assert n <= evaluated <= len(others)
+
+
+def test_pruned_top_n_indices_prunes_large_palettes():
+    rng = np.random.default_rng(seed=0)
+    colors = [f"#{c:06x}" for c in rng.integers(0, 2 ** 24, size=4096)]
+    others = palette_coordinates(colors)["lab"]
+
+    rows, evaluated = pruned_top_n_indices(others[0], others[1:], "CIEDE2000", 5)
+
+    assert evaluated < len(others) / 4
+    assert len(rows) == 5
+
+
+def test_pruned_top_n_indices_of_small_palettes(palette_lab: np.ndarray):
+    rows, evaluated = pruned_top_n_indices(
+        palette_lab[0], palette_lab[:8], "CMC 1:1", 5
+    )
+
+    assert evaluated == 8
+    assert rows[0] == 0